@@ -11,5 +11,6 @@ class CustomUserAdmin(UserAdmin):
     add_fieldsets = UserAdmin.add_fieldsets + (
         ('Identity', {'fields': ('phone', 'national_id', 'email')}),
     )
-    list_display = ('id', 'username', 'email', 'phone', 'national_id', 'is_staff')
+    list_display = ('id', 'username', 'email', 'phone', 'national_id', 'police_rank', 'is_staff')
+    readonly_fields = ('police_rank',)
     search_fields = ('username', 'email', 'phone', 'national_id')
@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+# Frozen copy of rbac.ranks.POLICE_RANK at the time of this migration.
+POLICE_RANK = {
+    'cadet': 1,
+    'patrol officer': 2,
+    'police officer': 3,
+    'detective': 3,
+    'sergeant': 4,
+    'captain': 5,
+    'chief': 6,
+}
+
+
+def backfill_police_rank(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    UserRole = apps.get_model('rbac', 'UserRole')
+    ranks = {}
+    for user_id, role_name in UserRole.objects.values_list('user_id', 'role__name'):
+        rank = POLICE_RANK.get(role_name.lower(), 0)
+        ranks[user_id] = max(ranks.get(user_id, 0), rank)
+    by_rank = {}
+    for user_id, rank in ranks.items():
+        if rank:
+            by_rank.setdefault(rank, []).append(user_id)
+    for rank, user_ids in by_rank.items():
+        User.objects.filter(id__in=user_ids).update(police_rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('rbac', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='police_rank',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_police_rank, migrations.RunPython.noop),
+    ]
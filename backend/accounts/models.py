@@ -6,6 +6,8 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     phone = models.CharField(max_length=20, unique=True)
     national_id = models.CharField(max_length=20, unique=True)
+    # Highest police rank among the user's roles; maintained by rbac signals.
+    police_rank = models.PositiveSmallIntegerField(default=0, db_index=True, editable=False)
 
     REQUIRED_FIELDS = ['email', 'phone', 'national_id']
 
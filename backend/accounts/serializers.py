@@ -39,4 +39,6 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
     def get_roles(self, obj):
+        if 'user_roles' in getattr(obj, '_prefetched_objects_cache', {}):
+            return [user_role.role.name for user_role in obj.user_roles.all()]
         return list(obj.user_roles.values_list('role__name', flat=True))
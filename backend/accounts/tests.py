@@ -1,8 +1,18 @@
+from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APITestCase
 import importlib.util
+import unittest
+
+from rbac.models import Role, RolePermission, UserRole
+from rbac.policy import get_policy_version, get_user_role_version
 
 HAS_SIMPLEJWT = importlib.util.find_spec('rest_framework_simplejwt') is not None
+if HAS_SIMPLEJWT:
+    from rest_framework_simplejwt.tokens import AccessToken
+    from rbac.tokens import decode_actions, encode_actions
+
+User = get_user_model()
 
 
 class AccountsAPITest(APITestCase):
@@ -52,3 +62,76 @@ class AccountsAPITest(APITestCase):
     def test_me_endpoint_requires_auth(self):
         resp = self.client.get('/api/auth/me/')
         self.assertIn(resp.status_code, [401, 403])
+
+
+@unittest.skipUnless(HAS_SIMPLEJWT, 'simplejwt is not installed')
+class PolicyClaimsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='claims_user',
+            password='VeryStrong123',
+            email='claims@example.com',
+            phone='09120000009',
+            national_id='009',
+        )
+        role = Role.objects.create(name='Sergeant')
+        RolePermission.objects.create(role=role, action='suspect.manage')
+        RolePermission.objects.create(role=role, action='case.read_all')
+        UserRole.objects.create(user=self.user, role=role)
+
+    def login(self):
+        return self.client.post('/api/auth/login/', {'identifier': 'claims_user', 'password': 'VeryStrong123'}, format='json')
+
+    def test_login_access_token_carries_policy_claims(self):
+        resp = self.login()
+        self.assertEqual(resp.status_code, 200)
+        access = AccessToken(resp.data['access'])
+        self.assertEqual(access['roles'], ['Sergeant'])
+        self.assertEqual(access['rank'], 4)
+        self.assertEqual(decode_actions(access['act']), {'suspect.manage', 'case.read_all'})
+        self.assertEqual(access['rbac_v'], get_policy_version())
+        self.assertEqual(access['rbac_uv'], get_user_role_version(self.user.pk))
+
+    def test_refresh_recomputes_claims(self):
+        refresh = self.login().data['refresh']
+        RolePermission.objects.create(role=Role.objects.get(name='Sergeant'), action='judiciary.verdict')
+        resp = self.client.post('/api/auth/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        access = AccessToken(resp.data['access'])
+        self.assertIn('judiciary.verdict', decode_actions(access['act']))
+        self.assertEqual(access['rbac_v'], get_policy_version())
+
+    def test_current_token_authorizes_without_rbac_queries(self):
+        access = self.login().data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        # user lookup by JWT auth + the suspect-profile lookup in modules.
+        with self.assertNumQueries(2):
+            resp = self.client.get('/api/dashboard/modules/')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_stale_token_falls_back_to_database(self):
+        access = self.login().data['access']
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.filter(user=self.user).delete()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        resp = self.client.get('/api/dashboard/modules/')
+        keys = {m['key'] for m in resp.data['modules']}
+        self.assertNotIn('sergeant_review', keys)
+
+    def test_other_users_role_changes_keep_token_current(self):
+        access = self.login().data['access']
+        other = User.objects.create_user(
+            username='claims_other', password='VeryStrong123', email='claims_other@example.com',
+            phone='09129990010', national_id='010',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.create(user=other, role=Role.objects.get(name='Sergeant'))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        # user lookup by JWT auth + the suspect-profile lookup in modules.
+        with self.assertNumQueries(2):
+            resp = self.client.get('/api/dashboard/modules/')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_action_encoding_round_trip(self):
+        actions = {'case.read_all', 'case.scene.create', 'tip.submit', 'rbac'}
+        self.assertEqual(decode_actions(encode_actions(actions)), actions)
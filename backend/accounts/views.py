@@ -5,7 +5,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 try:
-    from rest_framework_simplejwt.tokens import RefreshToken
+    from rbac.tokens import PolicyRefreshToken as RefreshToken
 except Exception:
     RefreshToken = None
 
@@ -62,4 +62,4 @@ class UserListView(generics.ListAPIView):
     def get_queryset(self):
         if not self.request.user.is_superuser:
             return User.objects.none()
-        return User.objects.all().order_by('id')
+        return User.objects.prefetch_related('user_roles__role').order_by('id')
@@ -0,0 +1,34 @@
+from rbac.permissions import user_has_action
+from .models import Case, CaseComplainant
+
+
+def can_read_all_cases(user):
+    return user.is_superuser or user_has_action(user, 'case.read_all')
+
+
+def is_assigned_detective(user, case):
+    return user.is_superuser or case.assigned_detective_id == user.id
+
+
+def own_case_ids(user):
+    """Subquery of ids of cases the user created or is a complainant on.
+
+    A UNION of two indexed lookups, so its cost follows the user's own cases
+    instead of joining and de-duplicating the whole cases table.
+    """
+    return Case.objects.filter(created_by=user).values('pk').union(
+        CaseComplainant.objects.filter(user=user).values('case_id')
+    )
+
+
+def readable_cases(user, qs=None):
+    """Cases the user can read through the case endpoints."""
+    qs = Case.objects.all() if qs is None else qs
+    if can_read_all_cases(user):
+        return qs
+    return qs.filter(pk__in=own_case_ids(user))
+
+
+def visible_case_ids(user, case_ids):
+    """Return the subset of ``case_ids`` the user may read, in one query."""
+    return set(readable_cases(user, Case.objects.filter(id__in=set(case_ids))).values_list('id', flat=True))
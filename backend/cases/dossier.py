@@ -0,0 +1,269 @@
+import json
+from collections import defaultdict
+from functools import cached_property
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import prefetch_related_objects
+from rest_framework.utils.encoders import JSONEncoder
+
+from evidence.models import BiologicalEvidence, IdentificationEvidence, OtherEvidence, VehicleEvidence, WitnessEvidence
+from evidence.serializers import (
+    BiologicalEvidenceSerializer,
+    IdentificationEvidenceSerializer,
+    OtherEvidenceSerializer,
+    VehicleEvidenceSerializer,
+    WitnessEvidenceSerializer,
+)
+from investigation.models import Interrogation, Suspect, SuspectSubmission
+from investigation.serializers import InterrogationSerializer, SuspectSerializer, SuspectSubmissionSerializer
+from judiciary.models import CourtSession
+from judiciary.serializers import CourtSessionSerializer
+from rbac.models import UserRole
+from .models import CaseWitness
+from .serializers import CaseLogSerializer, CaseSerializer, CaseWitnessSerializer
+
+User = get_user_model()
+
+SECTIONS = (
+    'case', 'complainants', 'witnesses', 'evidence', 'suspects', 'interrogations',
+    'suspect_submissions', 'court_sessions', 'logs', 'involved_members',
+)
+# Where involved members are collected from, in output order.
+MEMBER_SOURCES = ('case', 'logs', 'complainants', 'interrogations', 'suspect_submissions', 'court_sessions')
+
+EVIDENCE = [
+    ('witness', WitnessEvidence, WitnessEvidenceSerializer),
+    ('biological', BiologicalEvidence, BiologicalEvidenceSerializer),
+    ('vehicle', VehicleEvidence, VehicleEvidenceSerializer),
+    ('identification', IdentificationEvidence, IdentificationEvidenceSerializer),
+    ('other', OtherEvidence, OtherEvidenceSerializer),
+]
+
+
+def stream_chunk_size():
+    return getattr(settings, 'CASE_REPORT_STREAM_CHUNK_SIZE', 2000)
+
+
+def dump(value):
+    # Same encoding as the JSON renderer, so streamed and rendered reports match.
+    return json.dumps(value, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def parse_sections(request, allowed=SECTIONS):
+    raw = request.query_params.get('sections', '')
+    requested = {name.strip() for name in raw.split(',') if name.strip()}
+    if not requested:
+        return set(allowed)
+    return requested & set(allowed)
+
+
+class CaseDossier:
+    """Everything recorded about one case, loaded with a fixed number of queries.
+
+    Each section reads its rows once and only when asked for. Users referenced
+    by the requested sections are resolved together with their role names in
+    two queries, however many of them there are.
+    """
+
+    def __init__(self, case, sections=SECTIONS, member_sources=MEMBER_SOURCES, contact_details=False):
+        self.case = case
+        self.sections = set(sections)
+        self.member_sources = member_sources
+        self.contact_details = contact_details
+        self.streaming = False
+
+    def build(self, section):
+        return getattr(self, f'build_{section}')()
+
+    def layout(self, keys=None, extra_sections=()):
+        """``(output key, section)`` pairs for the requested sections, in report order."""
+        keys = keys or {}
+        names = [section for section in SECTIONS if section in self.sections] + list(extra_sections)
+        return [(keys.get(name, name), name) for name in names]
+
+    def payload(self, keys=None, extra_sections=()):
+        """Build the requested sections, renamed through ``keys`` where the endpoint needs it."""
+        return {key: self.build(name) for key, name in self.layout(keys, extra_sections)}
+
+    def queryset(self, section):
+        """Rows and serializer behind a list section."""
+        case = self.case
+        return {
+            'witnesses': (CaseWitness.objects.filter(case=case), CaseWitnessSerializer),
+            'suspects': (Suspect.objects.filter(case=case).order_by('id'), SuspectSerializer),
+            'criminals': (
+                Suspect.objects.filter(case=case, status=Suspect.Status.CRIMINAL).order_by('id'), SuspectSerializer,
+            ),
+            'interrogations': (Interrogation.objects.filter(case=case).order_by('id'), InterrogationSerializer),
+            'suspect_submissions': (
+                SuspectSubmission.objects.filter(case=case).prefetch_related('suspects'), SuspectSubmissionSerializer,
+            ),
+            'court_sessions': (
+                CourtSession.objects.filter(case=case).select_related('convicted_suspect').order_by('-id'),
+                CourtSessionSerializer,
+            ),
+            'logs': (case.logs.all(), CaseLogSerializer),
+        }[section]
+
+    @cached_property
+    def complainants(self):
+        prefetch_related_objects([self.case], 'complainants')
+        return list(self.case.complainants.all())
+
+    @cached_property
+    def suspects(self):
+        return list(self.queryset('suspects')[0])
+
+    @cached_property
+    def interrogations(self):
+        return list(self.queryset('interrogations')[0])
+
+    @cached_property
+    def suspect_submissions(self):
+        return list(self.queryset('suspect_submissions')[0])
+
+    @cached_property
+    def court_sessions(self):
+        return list(self.queryset('court_sessions')[0])
+
+    @cached_property
+    def logs(self):
+        return list(self.queryset('logs')[0])
+
+    def column(self, section, *fields):
+        """Values of ``fields`` per row, read from the section's rows when they are loaded anyway."""
+        if section in self.__dict__ or (section in self.sections and not self.streaming):
+            return [tuple(getattr(row, name) for name in fields) for row in getattr(self, section)]
+        queryset = self.queryset(section)[0].prefetch_related(None)
+        return queryset.values_list(*fields).iterator(chunk_size=stream_chunk_size())
+
+    @cached_property
+    def member_ids(self):
+        ids = {}
+        sources = {
+            'case': lambda: [(self.case.created_by_id, self.case.assigned_detective_id)],
+            'logs': lambda: self.column('logs', 'actor_id'),
+            'complainants': lambda: [(row.user_id,) for row in self.complainants],
+            'interrogations': lambda: self.column(
+                'interrogations', 'detective_id', 'sergeant_id', 'captain_by_id', 'chief_by_id',
+            ),
+            'suspect_submissions': lambda: self.column('suspect_submissions', 'detective_id', 'sergeant_id'),
+            'court_sessions': lambda: self.column('court_sessions', 'judge_id'),
+        }
+        for source in self.member_sources:
+            for row in sources[source]():
+                for uid in row:
+                    if uid:
+                        ids[uid] = None
+        return list(ids)
+
+    @cached_property
+    def users(self):
+        """Rows for every user the requested sections mention, keyed by id."""
+        ids = set()
+        if 'complainants' in self.sections:
+            ids.update(row.user_id for row in self.complainants)
+        if 'involved_members' in self.sections:
+            ids.update(self.member_ids)
+        if not ids:
+            return {}
+        roles = defaultdict(list)
+        for user_id, role_name in UserRole.objects.filter(user_id__in=ids).order_by('id').values_list('user_id', 'role__name'):
+            roles[user_id].append(role_name)
+        return {user.id: self.user_row(user, roles[user.id]) for user in User.objects.filter(id__in=ids)}
+
+    def user_row(self, user, roles):
+        row = {
+            'id': user.id,
+            'username': user.username,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'national_id': user.national_id,
+        }
+        if self.contact_details:
+            row['phone'] = user.phone
+            row['email'] = user.email
+        row['roles'] = roles
+        return row
+
+    def build_case(self):
+        prefetch_related_objects([self.case], 'complainants', 'witnesses', 'complaint_submission')
+        return CaseSerializer(self.case).data
+
+    def build_complainants(self):
+        return [
+            {'id': row.id, 'status': row.status, 'review_note': row.review_note, 'user': self.users.get(row.user_id)}
+            for row in self.complainants
+        ]
+
+    def build_witnesses(self):
+        prefetch_related_objects([self.case], 'witnesses')
+        return CaseWitnessSerializer(self.case.witnesses.all(), many=True).data
+
+    def build_evidence(self):
+        return {
+            kind: serializer_class(model.objects.filter(case=self.case), many=True).data
+            for kind, model, serializer_class in EVIDENCE
+        }
+
+    def build_suspects(self):
+        return SuspectSerializer(self.suspects, many=True).data
+
+    def build_criminals(self):
+        rows = [row for row in self.suspects if row.status == Suspect.Status.CRIMINAL]
+        return SuspectSerializer(rows, many=True).data
+
+    def build_interrogations(self):
+        return InterrogationSerializer(self.interrogations, many=True).data
+
+    def build_suspect_submissions(self):
+        return SuspectSubmissionSerializer(self.suspect_submissions, many=True).data
+
+    def build_court_sessions(self):
+        return CourtSessionSerializer(self.court_sessions, many=True).data
+
+    def build_logs(self):
+        return CaseLogSerializer(self.logs, many=True).data
+
+    def build_involved_members(self):
+        return [self.users[uid] for uid in self.member_ids if uid in self.users]
+
+    def stream(self, keys=None, extra_sections=(), values=None):
+        """Yield the report as JSON text, reading the list sections in chunks.
+
+        Only one chunk of rows is held at a time, so memory does not grow with
+        the size of the case. ``values`` are plain extra keys emitted first.
+        """
+        self.streaming = True
+        yield '{'
+        separator = ''
+        for key, value in (values or {}).items():
+            yield f'{separator}{dump(key)}:{dump(value)}'
+            separator = ','
+        for key, name in self.layout(keys, extra_sections):
+            yield f'{separator}{dump(key)}:'
+            separator = ','
+            yield from self.stream_section(name)
+        yield '}'
+
+    def stream_section(self, name):
+        if name == 'evidence':
+            yield '{'
+            for index, (kind, model, serializer_class) in enumerate(EVIDENCE):
+                yield f'{"," if index else ""}{dump(kind)}:'
+                yield from self.stream_rows(model.objects.filter(case=self.case), serializer_class)
+            yield '}'
+        elif name in ('case', 'complainants', 'involved_members'):
+            yield dump(self.build(name))
+        else:
+            yield from self.stream_rows(*self.queryset(name))
+
+    def stream_rows(self, queryset, serializer_class):
+        serializer = serializer_class()
+        separator = ''
+        yield '['
+        for row in queryset.iterator(chunk_size=stream_chunk_size()):
+            yield separator + dump(serializer.to_representation(row))
+            separator = ','
+        yield ']'
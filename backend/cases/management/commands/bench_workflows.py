@@ -0,0 +1,352 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.signals import got_request_exception
+from django.core.wsgi import get_wsgi_application
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+
+from core.middleware import QUERY_COUNT_HEADER
+from rbac.models import Role, UserRole
+
+User = get_user_model()
+
+PASSWORD = 'BenchPass12345!'
+# Set on responses of the in-process server whose request failed on a database lock.
+LOCKED_HEADER = 'X-Bench-Database-Locked'
+# Seconds an SQLite connection waits for a competing writer before giving up.
+SQLITE_BUSY_TIMEOUT = 20
+# Actor name -> role granted to the benchmark user playing it.
+ACTORS = {
+    'complainant': 'complainant',
+    'cadet': 'cadet',
+    'officer': 'police officer',
+    'detective': 'detective',
+    'sergeant': 'sergeant',
+    'captain': 'captain',
+    'chief': 'chief',
+    'judge': 'judge',
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class WorkflowError(Exception):
+    pass
+
+
+class DatabaseLocked(WorkflowError):
+    """A step failed because the database was busy, not because the workflow is broken."""
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and 'locked' in str(exc)
+
+
+class LockReportingApp:
+    """Marks responses to requests that failed on a database lock with ``LOCKED_HEADER``."""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+        got_request_exception.connect(self.record, weak=False)
+
+    def record(self, sender, **kwargs):
+        # Sent while the exception is being handled, in the thread serving the request.
+        if is_lock_error(sys.exc_info()[1]):
+            self.local.locked = True
+
+    def __call__(self, environ, start_response):
+        self.local.locked = False
+
+        def reporting_start_response(status, headers, exc_info=None):
+            if self.local.locked:
+                headers = [*headers, (LOCKED_HEADER, '1')]
+            return start_response(status, headers, exc_info)
+
+        return self.app(environ, reporting_start_response)
+
+    def close(self):
+        got_request_exception.disconnect(self.record)
+
+
+class Client:
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+
+    def request(self, step, method, path, token=None, data=None):
+        body = json.dumps(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        req.add_header('Content-Type', 'application/json')
+        if token:
+            req.add_header('Authorization', f'Bearer {token}')
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=60) as resp:
+                status, headers, payload = resp.status, resp.headers, resp.read()
+        except urllib.error.HTTPError as exc:
+            status, headers, payload = exc.code, exc.headers, exc.read()
+        elapsed = time.perf_counter() - started
+        queries = headers.get(QUERY_COUNT_HEADER)
+        # A server started elsewhere only reveals the lock on its DEBUG error page.
+        locked = status >= 500 and (headers.get(LOCKED_HEADER) or b'database is locked' in payload)
+        self.recorder.add(step, elapsed, int(queries) if queries is not None else None, status < 400, locked)
+        if locked:
+            raise DatabaseLocked(f'{step}: HTTP {status} database is locked')
+        if status >= 400:
+            raise WorkflowError(f'{step}: HTTP {status} {payload[:200]!r}')
+        return json.loads(payload) if payload else None
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+
+    def add(self, step, elapsed, queries, ok, locked=False):
+        with self.lock:
+            self.samples[step].append((elapsed, queries, ok, locked))
+
+    def summary(self, wall_time):
+        steps = {}
+        for step, all_samples in self.samples.items():
+            # Requests that died on a database lock measure contention, not the step.
+            samples = [s for s in all_samples if not s[3]]
+            if not samples:
+                continue
+            latencies = sorted(s[0] * 1000 for s in samples)
+            queries = [s[1] for s in samples if s[1] is not None]
+            steps[step] = {
+                'requests': len(samples),
+                'errors': sum(1 for s in samples if not s[2]),
+                'locked': len(all_samples) - len(samples),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_ms': round(sum(latencies) / len(latencies), 2),
+                'throughput_rps': round(len(samples) / wall_time, 2) if wall_time else None,
+                'queries_mean': round(sum(queries) / len(queries), 2) if queries else None,
+                'queries_max': max(queries) if queries else None,
+            }
+        return steps
+
+
+def run_workflow(client, tokens, n):
+    """Drive one complaint from submission to court verdict."""
+    t = tokens
+    case = client.request('complaint.submit', 'POST', '/api/cases/cases/submit_complaint/', t['complainant'], {
+        'title': f'Bench case {n}', 'description': 'Benchmark workflow.', 'severity': 4,
+    })
+    case_id = case['id']
+    for complainant in case['complainants']:
+        client.request('cadet.review_complainant', 'POST', f'/api/cases/cases/{case_id}/intern_review_complainant/',
+                       t['cadet'], {'complainant_id': complainant['id'], 'approved': True})
+    client.request('cadet.review', 'POST', f'/api/cases/cases/{case_id}/intern_review/', t['cadet'], {'approved': True})
+    client.request('officer.review', 'POST', f'/api/cases/cases/{case_id}/officer_review/', t['officer'], {'approved': True})
+    client.request('detective.take', 'POST', f'/api/cases/cases/{case_id}/detective_take_case/', t['detective'])
+    client.request('evidence.create', 'POST', '/api/evidence/other/', t['officer'], {
+        'case': case_id, 'title': f'Bench evidence {n}', 'description': 'Found at the scene.',
+    })
+    suspect = client.request('suspect.create', 'POST', '/api/investigation/suspects/', t['detective'], {
+        'case': case_id, 'full_name': f'Bench suspect {n}', 'national_id': f'bench-{n}',
+    })
+    submission = client.request('suspects.submit', 'POST', '/api/investigation/suspect-submissions/submit_main_suspects/',
+                                t['detective'], {'case_id': case_id, 'suspect_ids': [suspect['id']], 'detective_reason': 'Motive.'})
+    client.request('suspects.sergeant_review', 'POST',
+                   f'/api/investigation/suspect-submissions/{submission["id"]}/sergeant_review/', t['sergeant'], {'approved': True})
+    client.request('interrogation.detective', 'POST', '/api/investigation/interrogations/record_assessment/', t['detective'], {
+        'case_id': case_id, 'suspect_id': suspect['id'], 'transcription': 'Statement.', 'detective_score': 7,
+    })
+    interrogation = client.request('interrogation.sergeant', 'POST', '/api/investigation/interrogations/record_assessment/',
+                                   t['sergeant'], {'case_id': case_id, 'suspect_id': suspect['id'], 'sergeant_score': 6})
+    client.request('interrogation.captain', 'POST', f'/api/investigation/interrogations/{interrogation["id"]}/captain_decision/',
+                   t['captain'], {'approved': True, 'captain_note': 'Send to trial.'})
+    client.request('interrogation.chief', 'POST', f'/api/investigation/interrogations/{interrogation["id"]}/chief_review/',
+                   t['chief'], {'approved': True, 'chief_note': 'Approved.'})
+    client.request('court.verdict', 'POST', '/api/judiciary/court-sessions/', t['judge'], {
+        'case': case_id, 'convicted_suspect': suspect['id'], 'verdict': 'guilty', 'punishment_title': 'Prison',
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the complaint-to-verdict workflow over HTTP and report latency percentiles, '
+        'throughput and queries per request for every step. Unless --base-url is given, the '
+        'run uses a throwaway database that is created first and destroyed afterwards. On '
+        'SQLite that database runs in WAL mode with a busy timeout and immediate transactions, '
+        'so concurrent workers wait for each other instead of failing; requests that still hit '
+        '"database is locked" are reported apart from workflow errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help='Benchmark a running server instead of starting one in-process. '
+                                               'It must share this database, which the run writes its '
+                                               'users and workflows to; run it with QUERY_COUNT_HEADER=1 '
+                                               'to collect query counts.')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--iterations', type=int, default=10, help='Workflows run by each worker.')
+        parser.add_argument('--output', default='bench-results.json')
+        parser.add_argument('--prefix', default='bench')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['iterations'] < 1:
+            raise CommandError('--workers and --iterations must be positive.')
+        if options['base_url']:
+            self.setup_actors(options['prefix'])
+            results = self.run(options['base_url'], options)
+        else:
+            results = self.run_in_process(options)
+
+        with open(options['output'], 'w') as fh:
+            json.dump(results, fh, indent=2)
+        for step, row in results['steps'].items():
+            self.stdout.write(
+                f'{step:28} n={row["requests"]:<5} err={row["errors"]:<3} locked={row["locked"]:<3} p50={row["p50_ms"]:>8}ms '
+                f'p95={row["p95_ms"]:>8}ms p99={row["p99_ms"]:>8}ms queries={row["queries_mean"]}'
+            )
+        if results['locked_workflows']:
+            self.stdout.write(self.style.WARNING(
+                f'{results["locked_workflows"]} workflows stopped on a database lock and are left out of the results.'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def run_in_process(self, options):
+        old_settings = {key: connection.settings_dict.get(key) for key in ('NAME', 'OPTIONS', 'TEST')}
+        workdir = None
+        if connection.vendor == 'sqlite':
+            # The default SQLite test database lives in memory, where threads share one cache and lock
+            # whole tables; a file in WAL mode lets readers run alongside the one writer.
+            workdir = tempfile.mkdtemp(prefix='bench-workflows-')
+            connection.settings_dict['TEST'] = {**(old_settings['TEST'] or {}), 'NAME': os.path.join(workdir, 'bench.sqlite3')}
+            connection.settings_dict['OPTIONS'] = {
+                **(old_settings['OPTIONS'] or {}),
+                'timeout': SQLITE_BUSY_TIMEOUT,
+                # Take the write lock when a transaction starts, so a waiting writer gets the busy
+                # timeout rather than a lock error from upgrading a read transaction.
+                'transaction_mode': 'IMMEDIATE',
+            }
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        server = None
+        try:
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode=WAL')
+            self.setup_actors(options['prefix'])
+            server = self.start_server()
+            return self.run(f'http://127.0.0.1:{server.server_address[1]}', options)
+        finally:
+            if server:
+                server.shutdown()
+                server.server_close()
+                server.get_app().close()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict.update(old_settings)
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    def setup_actors(self, prefix):
+        call_command('seed_roles', stdout=self.stdout)
+        roles = {r.name: r for r in Role.objects.all()}
+        self.identifiers = {}
+        for actor, role_name in ACTORS.items():
+            username = f'{prefix}_{actor}'
+            user = User.objects.filter(username=username).first()
+            if not user:
+                user = User.objects.create_user(
+                    username=username, password=PASSWORD, email=f'{username}@bench.example.com',
+                    phone=f'{prefix}-{actor}'[:20], national_id=f'{prefix}-{actor}'[:20],
+                )
+            UserRole.objects.get_or_create(user=user, role=roles[role_name])
+            self.identifiers[actor] = username
+
+    def start_server(self):
+        with override_settings(QUERY_COUNT_HEADER=True):
+            app = get_wsgi_application()
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False)
+        server.set_app(LockReportingApp(app))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def run(self, base_url, options):
+        # Logins happen before the timed run and are kept out of the results.
+        login_client = Client(base_url, Recorder())
+        tokens = {
+            actor: login_client.request('auth.login', 'POST', '/api/auth/login/', data={
+                'identifier': identifier, 'password': PASSWORD,
+            })['access']
+            for actor, identifier in self.identifiers.items()
+        }
+
+        recorder = Recorder()
+        client = Client(base_url, recorder)
+        failures = []
+        locked = []
+        run_id = int(time.time())
+
+        def worker(index):
+            for i in range(options['iterations']):
+                try:
+                    run_workflow(client, tokens, f'{run_id}-{index}-{i}')
+                except DatabaseLocked as exc:
+                    locked.append(str(exc))
+                except WorkflowError as exc:
+                    failures.append(str(exc))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['workers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - started
+
+        workflows = options['workers'] * options['iterations']
+        return {
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+            'commit': self.git_commit(),
+            'base_url': base_url,
+            'workers': options['workers'],
+            'iterations': options['iterations'],
+            'workflows': workflows,
+            'failed_workflows': len(failures),
+            'failures': failures[:20],
+            'locked_workflows': len(locked),
+            'locked': locked[:20],
+            'wall_time_s': round(wall_time, 3),
+            'workflows_per_s': round((workflows - len(failures) - len(locked)) / wall_time, 2),
+            'steps': recorder.summary(wall_time),
+        }
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,267 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from cases.models import Case, CaseComplainant, CaseLog, CaseWitness, ComplaintSubmission
+from evidence.index import index_evidence
+from evidence.models import BiologicalEvidence, IdentificationEvidence, OtherEvidence, VehicleEvidence, WitnessEvidence
+from investigation.models import Interrogation, Suspect
+from payments.models import BailPayment
+from rbac.models import Role, UserRole
+from rbac.policy import forget_user
+from rbac.ranks import rank_for_role_names
+from rewards.models import RewardClaim, Tip
+
+User = get_user_model()
+
+# Relative weights of the role a generated user gets.
+ROLE_MIX = [
+    ('base user', 55),
+    ('complainant', 20),
+    ('witness', 5),
+    ('cadet', 3),
+    ('patrol officer', 4),
+    ('police officer', 4),
+    ('detective', 4),
+    ('sergeant', 2),
+    ('captain', 1),
+    ('chief', 0.2),
+    ('judge', 1),
+    ('coroner', 0.8),
+]
+
+STATUS_MIX = [
+    (Case.Status.DRAFT, 5),
+    (Case.Status.UNDER_REVIEW, 15),
+    (Case.Status.OPEN, 15),
+    (Case.Status.INVESTIGATING, 25),
+    (Case.Status.SENT_TO_COURT, 10),
+    (Case.Status.CLOSED, 25),
+    (Case.Status.VOID, 5),
+]
+
+INVESTIGATED = {Case.Status.INVESTIGATING, Case.Status.SENT_TO_COURT, Case.Status.CLOSED}
+EVIDENCE_MODELS = [WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence]
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate deterministic, production-scale load data across all apps.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--cases', type=int, default=1_000_000)
+        parser.add_argument('--logs-per-case', type=int, default=8, help='Maximum CaseLog rows per case.')
+        parser.add_argument('--seed', type=int, default=20260101)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--prefix', default='load', help='Prefix for generated usernames and identifiers.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 10 or options['cases'] < 1:
+            raise CommandError('At least 10 users and 1 case are required.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.now = timezone.now()
+
+        call_command('seed_roles', stdout=self.stdout)
+        self.roles = {r.name: r for r in Role.objects.all()}
+        self.create_users(options['users'])
+        self.create_cases(options['cases'], options['logs_per_case'])
+        self.stdout.write(self.style.SUCCESS('Load data generated.'))
+
+    def pick(self, weighted):
+        values, weights = zip(*weighted)
+        return self.rng.choices(values, weights=weights)[0]
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(start + self.batch_size, total)
+
+    def create_users(self, total):
+        password = make_password('LoadTest12345!')
+        self.users_by_role = {name: [] for name, _ in ROLE_MIX}
+        all_user_ids = []
+        for start, end in self.batches(total):
+            role_names = [self.pick(ROLE_MIX) for _ in range(start, end)]
+            users = [
+                User(
+                    username=f'{self.prefix}_u{i}',
+                    email=f'{self.prefix}_u{i}@load.example.com',
+                    phone=f'{self.prefix}-p{i}',
+                    national_id=f'{self.prefix}-n{i}',
+                    first_name=f'First{i}',
+                    last_name=f'Last{i}',
+                    password=password,
+                    police_rank=rank_for_role_names([role_name]),
+                )
+                for i, role_name in zip(range(start, end), role_names)
+            ]
+            with transaction.atomic():
+                users = User.objects.bulk_create(users, batch_size=self.batch_size)
+                UserRole.objects.bulk_create(
+                    [UserRole(user_id=u.id, role=self.roles[name]) for u, name in zip(users, role_names)],
+                    batch_size=self.batch_size,
+                )
+            for u, name in zip(users, role_names):
+                # Bulk creation skips the signals that drop roles cached for a reused id.
+                forget_user(u.id)
+                self.users_by_role[name].append(u.id)
+                all_user_ids.append(u.id)
+            self.stdout.write(f'users: {end}/{total}')
+
+        self.citizens = self.users_by_role['base user'] + self.users_by_role['complainant'] + self.users_by_role['witness']
+        self.police = [
+            uid for name in ('patrol officer', 'police officer', 'sergeant', 'captain', 'chief')
+            for uid in self.users_by_role[name]
+        ]
+        # Tiny runs may not draw every role; fall back to any generated user.
+        self.citizens = self.citizens or all_user_ids
+        self.police = self.police or all_user_ids
+        for name in ('detective', 'sergeant', 'judge'):
+            self.users_by_role[name] = self.users_by_role[name] or all_user_ids
+
+    def create_cases(self, total, max_logs):
+        # A small pool of national ids makes the same person appear as a suspect across many cases.
+        self.national_id_pool = [f'{self.prefix}-s{i}' for i in range(max(total // 4, 1))]
+        for start, end in self.batches(total):
+            with transaction.atomic():
+                self.create_case_batch(start, end, max_logs)
+            self.stdout.write(f'cases: {end}/{total}')
+
+    def create_case_batch(self, start, end, max_logs):
+        rng = self.rng
+        cases = []
+        for i in range(start, end):
+            status = self.pick(STATUS_MIX)
+            source = Case.Source.COMPLAINT if rng.random() < 0.6 else Case.Source.SCENE
+            creator = rng.choice(self.citizens if source == Case.Source.COMPLAINT else self.police)
+            cases.append(Case(
+                title=f'Load case {i}',
+                description=f'Generated case {i} for load testing.',
+                source=source,
+                status=status,
+                severity=rng.randint(1, 4),
+                scene_reported_at=self.now - timedelta(days=rng.randint(0, 720)) if source == Case.Source.SCENE else None,
+                created_by_id=creator,
+                assigned_detective_id=rng.choice(self.users_by_role['detective']) if status in INVESTIGATED else None,
+            ))
+        cases = Case.objects.bulk_create(cases, batch_size=self.batch_size)
+
+        submissions, complainants, witnesses, logs = [], [], [], []
+        evidence = {model: [] for model in EVIDENCE_MODELS}
+        suspects = []
+        for case in cases:
+            if case.source == Case.Source.COMPLAINT:
+                submissions.append(ComplaintSubmission(
+                    case=case,
+                    complainant_id=case.created_by_id,
+                    attempt_count=rng.randint(0, 2),
+                    stage=ComplaintSubmission.Stage.FORMED if case.status in INVESTIGATED else ComplaintSubmission.Stage.TO_CADET,
+                ))
+                extra = rng.sample(self.citizens, k=min(rng.randint(0, 2), len(self.citizens)))
+                for user_id in {case.created_by_id, *extra}:
+                    complainants.append(CaseComplainant(
+                        case=case, user_id=user_id, status=CaseComplainant.Status.APPROVED,
+                    ))
+            else:
+                for w in range(rng.randint(0, 3)):
+                    witnesses.append(CaseWitness(
+                        case=case, full_name=f'Witness {case.id}-{w}', national_id=f'w{case.id}-{w}',
+                        phone=f'w{case.id}-{w}', statement='Saw the incident.',
+                    ))
+            for n in range(rng.randint(1, max(max_logs, 1))):
+                logs.append(CaseLog(case=case, actor_id=case.created_by_id, action=f'load.step{n}', details='generated'))
+            if case.status in INVESTIGATED or case.status == Case.Status.OPEN:
+                self.add_evidence(case, evidence)
+                for _ in range(rng.randint(0, 3)):
+                    suspects.append(Suspect(
+                        case=case,
+                        full_name=f'Suspect {case.id}',
+                        national_id=rng.choice(self.national_id_pool),
+                        status=self.suspect_status(case),
+                        marked_at=self.now - timedelta(days=rng.randint(0, 120)),
+                    ))
+
+        ComplaintSubmission.objects.bulk_create(submissions, batch_size=self.batch_size)
+        CaseComplainant.objects.bulk_create(complainants, batch_size=self.batch_size)
+        CaseWitness.objects.bulk_create(witnesses, batch_size=self.batch_size)
+        CaseLog.objects.bulk_create(logs, batch_size=self.batch_size)
+        for model, rows in evidence.items():
+            # bulk_create skips the post_save signal that maintains the evidence index.
+            index_evidence(model.objects.bulk_create(rows, batch_size=self.batch_size), batch_size=self.batch_size)
+        suspects = Suspect.objects.bulk_create(suspects, batch_size=self.batch_size)
+        self.create_suspect_rows(suspects)
+
+    def suspect_status(self, case):
+        if case.status == Case.Status.CLOSED:
+            return self.rng.choice([Suspect.Status.CRIMINAL, Suspect.Status.CLEARED])
+        if case.status == Case.Status.SENT_TO_COURT:
+            return Suspect.Status.ARRESTED
+        return self.rng.choice([Suspect.Status.WANTED, Suspect.Status.WANTED, Suspect.Status.ARRESTED])
+
+    def add_evidence(self, case, evidence):
+        rng = self.rng
+        recorder = rng.choice(self.police)
+        common = {'case': case, 'description': 'Generated evidence.', 'recorded_by_id': recorder}
+        for model in EVIDENCE_MODELS:
+            for n in range(rng.randint(0, 2)):
+                title = f'{model.__name__} {case.id}-{n}'
+                if model is WitnessEvidence:
+                    row = model(title=title, transcript='Recorded statement.', **common)
+                elif model is BiologicalEvidence:
+                    row = model(title=title, image_urls=[f'https://media.example.com/{case.id}-{n}.jpg'], **common)
+                elif model is VehicleEvidence:
+                    row = model(title=title, model_name='Sedan', color='white', plate_number=f'{case.id}-{n}', **common)
+                elif model is IdentificationEvidence:
+                    row = model(title=title, owner_full_name=f'Owner {case.id}', metadata={'doc': 'id-card'}, **common)
+                else:
+                    row = model(title=title, **common)
+                evidence[model].append(row)
+
+    def create_suspect_rows(self, suspects):
+        rng = self.rng
+        interrogations, tips, bails = [], [], []
+        for suspect in suspects:
+            case = suspect.case
+            if suspect.status != Suspect.Status.WANTED and case.assigned_detective_id:
+                interrogations.append(Interrogation(
+                    case=case,
+                    suspect=suspect,
+                    detective_id=case.assigned_detective_id,
+                    sergeant_id=rng.choice(self.users_by_role['sergeant']),
+                    transcription='Generated transcript. ' * rng.randint(5, 50),
+                    key_values={'alibi': 'none', 'score': rng.randint(1, 10)},
+                    detective_score=rng.randint(1, 10),
+                    sergeant_score=rng.randint(1, 10),
+                    detective_submitted=True,
+                    sergeant_submitted=True,
+                ))
+            if rng.random() < 0.2:
+                tips.append(Tip(
+                    submitter_id=rng.choice(self.citizens),
+                    case=case,
+                    suspect=suspect,
+                    content='I saw this person near the scene.',
+                    status=rng.choice(list(Tip.Status)),
+                ))
+            if suspect.status == Suspect.Status.ARRESTED and case.severity <= Case.Severity.LEVEL_2 and rng.random() < 0.3:
+                bails.append(BailPayment(
+                    case=case,
+                    suspect=suspect,
+                    amount=rng.randint(1, 500) * 1_000_000,
+                    created_by_id=rng.choice(self.users_by_role['sergeant']),
+                    status=rng.choice(list(BailPayment.Status)),
+                ))
+        Interrogation.objects.bulk_create(interrogations, batch_size=self.batch_size)
+        BailPayment.objects.bulk_create(bails, batch_size=self.batch_size)
+        tips = Tip.objects.bulk_create(tips, batch_size=self.batch_size)
+        RewardClaim.objects.bulk_create([
+            RewardClaim(tip=tip, unique_code=f'{self.prefix}-{tip.id}', amount=50_000_000, is_paid=rng.random() < 0.5)
+            for tip in tips if tip.status == Tip.Status.APPROVED
+        ], batch_size=self.batch_size)
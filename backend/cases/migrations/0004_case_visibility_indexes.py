@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0003_case_scene_reported_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['created_by', 'updated_at'], name='case_creator_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='casecomplainant',
+            index=models.Index(fields=['user', 'case'], name='complainant_user_case_idx'),
+        ),
+    ]
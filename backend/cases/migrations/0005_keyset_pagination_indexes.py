@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0004_case_visibility_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['updated_at', 'id'], name='case_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='caselog',
+            index=models.Index(fields=['case', 'created_at', 'id'], name='caselog_case_created_idx'),
+        ),
+    ]
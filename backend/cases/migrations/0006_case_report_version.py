@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0005_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='case',
+            name='report_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
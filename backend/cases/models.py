@@ -34,6 +34,14 @@ class Case(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped on every write that changes the case reports; see cases.reports.
+    report_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_by', 'updated_at'], name='case_creator_updated_idx'),
+            models.Index(fields=['updated_at', 'id'], name='case_updated_id_idx'),
+        ]
 
     def __str__(self):
         return f'Case#{self.id} - {self.title}'
@@ -70,6 +78,9 @@ class CaseComplainant(models.Model):
 
     class Meta:
         unique_together = ('case', 'user')
+        indexes = [
+            models.Index(fields=['user', 'case'], name='complainant_user_case_idx'),
+        ]
 
 
 class CaseWitness(models.Model):
@@ -89,3 +100,6 @@ class CaseLog(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['case', 'created_at', 'id'], name='caselog_case_created_idx'),
+        ]
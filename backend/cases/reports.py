@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+
+from .models import Case
+
+
+def _cache():
+    return caches[getattr(settings, 'CASE_REPORT_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'CASE_REPORT_CACHE_TIMEOUT', 3600)
+
+
+def bump_report_version(case_id):
+    # A plain UPDATE: it neither fires signals nor touches updated_at.
+    Case.objects.filter(pk=case_id).update(report_version=F('report_version') + 1)
+
+
+def bump_reports(cases):
+    """Bump every case in the ``cases`` queryset with one UPDATE."""
+    cases.update(report_version=F('report_version') + 1)
+
+
+def report_key(kind, case, variant=''):
+    # Changes to the users a report shows bump report_version too (see
+    # cases.signals). The creation time guards against primary keys reused
+    # after a rollback.
+    created = int(case.created_at.timestamp() * 1_000_000)
+    return f'case-report:{kind}:{case.pk}.{created}:{case.report_version}:{variant}'
+
+
+def report_etag(key):
+    # If-None-Match is a comma-separated list, so the tag itself holds no commas.
+    return '"%s"' % key.replace(':', '-').replace(',', '.')
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    return header.strip() == '*' or etag in [value.strip() for value in header.split(',')]
+
+
+def wants_stream(request):
+    return request.query_params.get('stream') in ('1', 'true')
+
+
+def report_response(request, kind, case, build, variant='', stream=None):
+    """Serve a case report from its snapshot, building it on the first read of a version.
+
+    ``case`` must be freshly loaded so its ``report_version`` is current. With
+    ``?stream=1`` and a ``stream`` callable, the report is written out as it is
+    read instead, and never cached.
+    """
+    streaming = stream is not None and wants_stream(request)
+    key = report_key(kind, case, f'{variant}:stream' if streaming else variant)
+    etag = report_etag(key)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if etag_matches(request, etag):
+        return Response(status=304, headers=headers)
+    if streaming:
+        return StreamingHttpResponse(stream(), content_type='application/json', headers=headers)
+    cache = _cache()
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, _timeout())
+    return Response(payload, headers=headers)
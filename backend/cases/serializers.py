@@ -36,6 +36,19 @@ class CaseSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_by',)
 
 
+class CaseListSerializer(CaseSerializer):
+    """Compact case row; nested collections are included only when listed in ``?expand=``."""
+
+    EXPANDABLE = ('complainants', 'witnesses', 'complaint_submission')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand', ())
+        for name in self.EXPANDABLE:
+            if name not in expand:
+                self.fields.pop(name)
+
+
 class CaseLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = CaseLog
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from evidence.models import BiologicalEvidence, IdentificationEvidence, OtherEvidence, VehicleEvidence, WitnessEvidence
+from investigation.models import Interrogation, Suspect, SuspectSubmission
+from judiciary.models import CourtSession
+from rbac.models import Role, UserRole
+from .models import Case, CaseComplainant, CaseLog, CaseWitness, ComplaintSubmission
+from .reports import bump_report_version, bump_reports
+
+# Every model whose rows appear in the case reports.
+REPORT_MODELS = [
+    CaseLog, CaseComplainant, CaseWitness, ComplaintSubmission,
+    WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence,
+    Suspect, Interrogation, SuspectSubmission, CourtSession,
+]
+# User fields the reports print for complainants and involved members.
+REPORT_USER_FIELDS = {'username', 'first_name', 'last_name', 'national_id', 'phone', 'email'}
+
+
+def cases_showing(user_ids):
+    """Cases whose reports list any of ``user_ids`` as a complainant or involved member (see CaseDossier)."""
+    return Case.objects.filter(
+        Q(created_by__in=user_ids)
+        | Q(assigned_detective__in=user_ids)
+        | Q(pk__in=CaseLog.objects.filter(actor__in=user_ids).values('case_id'))
+        | Q(pk__in=CaseComplainant.objects.filter(user__in=user_ids).values('case_id'))
+        | Q(pk__in=Interrogation.objects.filter(
+            Q(detective__in=user_ids) | Q(sergeant__in=user_ids) | Q(captain_by__in=user_ids) | Q(chief_by__in=user_ids)
+        ).values('case_id'))
+        | Q(pk__in=SuspectSubmission.objects.filter(Q(detective__in=user_ids) | Q(sergeant__in=user_ids)).values('case_id'))
+        | Q(pk__in=CourtSession.objects.filter(judge__in=user_ids).values('case_id'))
+    )
+
+
+def bump_for_case(sender, instance, **kwargs):
+    bump_report_version(instance.pk)
+
+
+def bump_for_related(sender, instance, **kwargs):
+    bump_report_version(instance.case_id)
+
+
+def bump_for_submission_suspects(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        bump_report_version(instance.case_id)
+
+
+def bump_for_user(sender, instance, created, update_fields=None, **kwargs):
+    # A new user is in no case yet, and logins only save last_login.
+    if created or (update_fields is not None and not REPORT_USER_FIELDS & set(update_fields)):
+        return
+    bump_reports(cases_showing([instance.pk]))
+
+
+def bump_for_user_role(sender, instance, **kwargs):
+    bump_reports(cases_showing([instance.user_id]))
+
+
+def bump_for_role(sender, instance, created, update_fields=None, **kwargs):
+    # Reports print role names, so only a rename matters.
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    bump_reports(cases_showing(instance.user_roles.values('user_id')))
+
+
+post_save.connect(bump_for_case, sender=Case, dispatch_uid='case_report_case_save')
+for model in REPORT_MODELS:
+    post_save.connect(bump_for_related, sender=model, dispatch_uid=f'case_report_save_{model.__name__}')
+    post_delete.connect(bump_for_related, sender=model, dispatch_uid=f'case_report_delete_{model.__name__}')
+post_save.connect(bump_for_user, sender=settings.AUTH_USER_MODEL, dispatch_uid='case_report_user_save')
+post_save.connect(bump_for_user_role, sender=UserRole, dispatch_uid='case_report_user_role_save')
+post_delete.connect(bump_for_user_role, sender=UserRole, dispatch_uid='case_report_user_role_delete')
+post_save.connect(bump_for_role, sender=Role, dispatch_uid='case_report_role_save')
+m2m_changed.connect(
+    bump_for_submission_suspects,
+    sender=SuspectSubmission.suspects.through,
+    dispatch_uid='case_report_submission_suspects',
+)
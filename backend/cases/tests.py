@@ -1,8 +1,16 @@
+import json
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 
-from cases.models import Case, CaseComplainant, ComplaintSubmission
+from cases.models import Case, CaseComplainant, CaseLog, ComplaintSubmission
 from evidence.models import OtherEvidence
+from investigation.models import Suspect
 from rbac.models import Role, RolePermission, UserRole
 
 User = get_user_model()
@@ -408,3 +416,227 @@ class CasesFlowTest(APITestCase):
         self.assertIn('suspects', resp.data)
         self.assertIn('criminals', resp.data)
         self.assertIn('involved_members', resp.data)
+
+    def test_case_logs_require_report_permission(self):
+        reader = User.objects.create_user(
+            username='log_reader',
+            password='VeryStrong123',
+            email='log_reader@example.com',
+            phone='09130000201',
+            national_id='3201',
+        )
+        role = Role.objects.create(name='log_reader_role')
+        RolePermission.objects.create(role=role, action='case.read_all')
+        UserRole.objects.create(user=reader, role=role)
+        case = Case.objects.create(
+            title='Logged case',
+            description='desc',
+            source=Case.Source.COMPLAINT,
+            status=Case.Status.OPEN,
+            severity=Case.Severity.LEVEL_1,
+            created_by=self.user,
+        )
+        CaseComplainant.objects.create(case=case, user=self.user, status=CaseComplainant.Status.APPROVED)
+        CaseLog.objects.bulk_create([CaseLog(case=case, actor=reader, action=f'step{i}') for i in range(25)])
+
+        resp = self.client.get(f'/api/cases/cases/{case.id}/logs/')
+        self.assertEqual(resp.status_code, 403)
+
+        self.client.force_authenticate(reader)
+        resp = self.client.get(f'/api/cases/cases/{case.id}/logs/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['count'], 25)
+        ids, url = [], f'/api/cases/cases/{case.id}/logs/?paginate=cursor'
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn('count', resp.data)
+            ids.extend(row['id'] for row in resp.data['results'])
+            url = resp.data['next']
+        self.assertEqual(ids, list(case.logs.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+
+class CaseReportSnapshotTest(APITestCase):
+    def setUp(self):
+        self.judge = User.objects.create_user(
+            username='snapshot_judge', password='VeryStrong123', email='snapshot_judge@example.com',
+            phone='09126666666', national_id='666',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            role = Role.objects.create(name='judge')
+            RolePermission.objects.create(role=role, action='judiciary.verdict')
+            UserRole.objects.create(user=self.judge, role=role)
+        self.case = Case.objects.create(
+            title='Snapshot', description='d', source=Case.Source.COMPLAINT,
+            status=Case.Status.SENT_TO_COURT, created_by=self.judge,
+        )
+        self.client.force_authenticate(self.judge)
+
+    def test_report_is_served_from_snapshot_with_etag(self):
+        for url in (
+            f'/api/cases/cases/{self.case.id}/global_report/',
+            f'/api/judiciary/court-sessions/case_summary/?case_id={self.case.id}',
+        ):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            with CaptureQueriesContext(connection) as ctx:
+                second = self.client.get(url)
+            self.assertEqual(second.data, first.data)
+            self.assertLessEqual(len(ctx.captured_queries), 2, url)
+
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(resp.status_code, 304, url)
+
+    def test_contributing_writes_bump_the_version(self):
+        url = f'/api/cases/cases/{self.case.id}/global_report/'
+        first = self.client.get(url)
+        version = Case.objects.get(pk=self.case.pk).report_version
+
+        OtherEvidence.objects.create(case=self.case, title='New', description='d', recorded_by=self.judge)
+        self.assertGreater(Case.objects.get(pk=self.case.pk).report_version, version)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], first['ETag'])
+        self.assertEqual([row['title'] for row in resp.data['evidence']['other']], ['New'])
+
+    def test_unrelated_signup_keeps_the_snapshot(self):
+        url = f'/api/cases/cases/{self.case.id}/global_report/'
+        first = self.client.get(url)
+        self.client.force_authenticate(None)
+        # Signing up creates the base role on first use and assigns it.
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post('/api/auth/register/', {
+                'username': 'snapshot_newcomer', 'password': 'VeryStrong123', 'email': 'newcomer@example.com',
+                'phone': '09126666667', 'national_id': '667', 'first_name': 'New', 'last_name': 'Comer',
+            }, format='json')
+        self.assertEqual(resp.status_code, 201, resp.data)
+        self.client.force_authenticate(self.judge)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_member_details_and_roles_bump_the_version(self):
+        url = f'/api/cases/cases/{self.case.id}/global_report/'
+        first = self.client.get(url)
+        self.judge.email = 'renamed_judge@example.com'
+        self.judge.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(resp.status_code, 200)
+        [member] = resp.data['involved_members']
+        self.assertEqual(member['email'], 'renamed_judge@example.com')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.create(user=self.judge, role=Role.objects.create(name='captain'))
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(sorted(resp.data['involved_members'][0]['roles']), ['captain', 'judge'])
+
+        version = Case.objects.get(pk=self.case.pk).report_version
+        self.judge.save(update_fields=['last_login'])
+        self.assertEqual(Case.objects.get(pk=self.case.pk).report_version, version)
+
+    def test_sections_narrow_the_report(self):
+        url = f'/api/cases/cases/{self.case.id}/global_report/'
+        full = self.client.get(url)
+        self.assertIn('witness_statements', full.data)
+        self.assertEqual(full.data['involved_members'][0]['phone'], self.judge.phone)
+
+        resp = self.client.get(f'{url}?sections=involved_members,bogus')
+        self.assertEqual(list(resp.data), ['involved_members'])
+        self.assertEqual(resp.data['involved_members'][0]['roles'], ['judge'])
+        self.assertNotEqual(resp['ETag'], full['ETag'])
+
+        resp = self.client.get(f'/api/judiciary/court-sessions/case_summary/?case_id={self.case.id}&sections=suspects,witnesses')
+        self.assertEqual(list(resp.data), ['suspects'])
+        resp = self.client.get(f'/api/judiciary/court-sessions/case_summary/?case_id={self.case.id}')
+        self.assertNotIn('phone', resp.data['involved_members'][0])
+
+    @override_settings(CASE_REPORT_STREAM_CHUNK_SIZE=2)
+    def test_streamed_report_matches_rendered_report(self):
+        for i in range(5):
+            CaseLog.objects.create(case=self.case, actor=self.judge, action=f'touch {i}')
+            OtherEvidence.objects.create(case=self.case, title=f'E{i}', description='d', recorded_by=self.judge)
+        Suspect.objects.create(case=self.case, full_name='S', national_id='S1', status=Suspect.Status.CRIMINAL)
+        for url in (
+            f'/api/cases/cases/{self.case.id}/global_report/',
+            f'/api/judiciary/court-sessions/case_summary/?case_id={self.case.id}',
+        ):
+            rendered = self.client.get(url)
+            sep = '&' if '?' in url else '?'
+            streamed = self.client.get(f'{url}{sep}stream=1')
+            self.assertTrue(streamed.streaming, url)
+            self.assertEqual(streamed['Content-Type'], 'application/json')
+            self.assertEqual(json.loads(b''.join(streamed.streaming_content)), json.loads(rendered.content), url)
+            self.assertNotEqual(streamed['ETag'], rendered['ETag'])
+
+            resp = self.client.get(f'{url}{sep}stream=1', HTTP_IF_NONE_MATCH=streamed['ETag'])
+            self.assertEqual(resp.status_code, 304, url)
+
+
+class CaseVisibilityTest(APITestCase):
+    def setUp(self):
+        self.citizen = User.objects.create_user(
+            username='citizen', password='VeryStrong123', email='citizen@example.com',
+            phone='09124444444', national_id='444',
+        )
+        self.other = User.objects.create_user(
+            username='other', password='VeryStrong123', email='other@example.com',
+            phone='09125555555', national_id='555',
+        )
+        self.own = Case.objects.create(title='Own', description='d', source=Case.Source.COMPLAINT, created_by=self.citizen)
+        self.joined = Case.objects.create(title='Joined', description='d', source=Case.Source.COMPLAINT, created_by=self.other)
+        self.foreign = Case.objects.create(title='Foreign', description='d', source=Case.Source.COMPLAINT, created_by=self.other)
+        CaseComplainant.objects.create(case=self.own, user=self.citizen)
+        CaseComplainant.objects.create(case=self.joined, user=self.citizen)
+        CaseComplainant.objects.create(case=self.joined, user=self.other)
+        for case in (self.own, self.joined, self.foreign):
+            ComplaintSubmission.objects.create(case=case, complainant=case.created_by)
+        self.client.force_authenticate(self.citizen)
+
+    def test_citizen_sees_created_and_joined_cases_once(self):
+        expected = sorted([self.own.id, self.joined.id])
+        resp = self.client.get('/api/cases/cases/')
+        self.assertEqual(sorted(row['id'] for row in resp.data['results']), expected)
+        resp = self.client.get('/api/cases/complaint-submissions/')
+        self.assertEqual(sorted(row['case'] for row in resp.data['results']), expected)
+
+        resp = self.client.get('/api/cases/case-complainants/')
+        self.assertEqual(len(resp.data['results']), 3)
+
+    def test_case_list_is_compact_unless_expanded(self):
+        row = self.client.get('/api/cases/cases/').data['results'][0]
+        self.assertNotIn('complainants', row)
+        self.assertNotIn('complaint_submission', row)
+
+        row = self.client.get('/api/cases/cases/?expand=complainants').data['results'][0]
+        self.assertIn('complainants', row)
+        self.assertNotIn('witnesses', row)
+
+        detail = self.client.get(f'/api/cases/cases/{self.own.id}/').data
+        self.assertEqual(detail['complaint_submission']['case'], self.own.id)
+        self.assertEqual(len(detail['complainants']), 1)
+
+    def test_citizen_case_list_avoids_distinct_join(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/cases/cases/')
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('DISTINCT', sql)
+        self.assertIn('UNION', sql)
+
+
+class SeedLoadDataCommandTest(TestCase):
+    def run_command(self, prefix):
+        call_command(
+            'seed_load_data', users=40, cases=30, seed=7, batch_size=8, prefix=prefix, stdout=StringIO(),
+        )
+
+    def test_generates_every_model_deterministically(self):
+        self.run_command('lda')
+        statuses = list(Case.objects.order_by('id').values_list('status', flat=True))
+        self.assertEqual(len(statuses), 30)
+        self.assertEqual(User.objects.filter(username__startswith='lda_').count(), 40)
+        self.assertTrue(CaseLog.objects.exists())
+        self.assertTrue(OtherEvidence.objects.exists())
+
+        Case.objects.all().delete()
+        self.run_command('ldb')
+        self.assertEqual(list(Case.objects.order_by('id').values_list('status', flat=True)), statuses)
@@ -1,11 +1,16 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 from rest_framework import decorators, permissions, status, viewsets
 from rest_framework.response import Response
 
-from rbac.permissions import user_has_action
+from core.pagination import PageNumberOrKeysetPagination
+from rbac.permissions import get_permission_snapshot, user_has_action
+from rbac.ranks import POLICE_RANK
+from .access import own_case_ids, readable_cases
+from .dossier import CaseDossier, parse_sections
+from .reports import report_response
 from .models import Case, ComplaintSubmission, CaseComplainant, CaseWitness, CaseLog
 from .serializers import (
+    CaseListSerializer,
     CaseSerializer,
     ComplaintSubmissionSerializer,
     CaseComplainantSerializer,
@@ -24,21 +29,8 @@ def has_any_action(user, actions):
     return user.is_superuser or any(user_has_action(user, a) for a in actions)
 
 
-POLICE_RANK = {
-    'cadet': 1,
-    'patrol officer': 2,
-    'police officer': 3,
-    'detective': 3,
-    'sergeant': 4,
-    'captain': 5,
-    'chief': 6,
-}
-
-
 def user_rank(user):
-    role_names = [r.lower() for r in user.user_roles.values_list('role__name', flat=True)]
-    ranks = [POLICE_RANK[r] for r in role_names if r in POLICE_RANK]
-    return max(ranks) if ranks else 0
+    return get_permission_snapshot(user).rank
 
 
 def is_non_cadet_police(user):
@@ -46,20 +38,48 @@ def is_non_cadet_police(user):
 
 
 def is_any_superior(approver, creator):
-    return user_rank(approver) > user_rank(creator)
+    # The creator is loaded from the database, so its materialized rank is current.
+    return user_rank(approver) > creator.police_rank
+
+
+def parse_expand(request, allowed):
+    raw = request.query_params.get('expand', '') if request else ''
+    requested = {name.strip() for name in raw.split(',') if name.strip()}
+    if 'all' in requested:
+        return set(allowed)
+    return requested & set(allowed)
 
 
 class CaseViewSet(viewsets.ModelViewSet):
     queryset = Case.objects.all().select_related('created_by', 'assigned_detective')
     serializer_class = CaseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PageNumberOrKeysetPagination
+    cursor_timestamp_field = 'updated_at'
 
     def get_queryset(self):
-        if has_any_action(self.request.user, ['case.read_all']):
-            return self.queryset.order_by('-updated_at')
-        return self.queryset.filter(
-            Q(created_by=self.request.user) | Q(complainants__user=self.request.user)
-        ).distinct().order_by('-updated_at')
+        qs = self.queryset
+        if self.action in ['list', 'retrieve']:
+            # The serializers only need the user ids, but do read the nested relations.
+            qs = qs.select_related(None)
+            for name in self.expanded_fields():
+                qs = qs.select_related(name) if name == 'complaint_submission' else qs.prefetch_related(name)
+        return readable_cases(self.request.user, qs).order_by('-updated_at', '-id')
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return CaseListSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.expanded_fields()
+        return context
+
+    def expanded_fields(self):
+        if self.action == 'list':
+            return parse_expand(self.request, CaseListSerializer.EXPANDABLE)
+        return set(CaseListSerializer.EXPANDABLE)
 
     def perform_create(self, serializer):
         case = serializer.save(created_by=self.request.user)
@@ -123,7 +143,7 @@ class CaseViewSet(viewsets.ModelViewSet):
         if case.status != Case.Status.UNDER_REVIEW:
             return Response({'detail': 'Scene case is not awaiting approval'}, status=400)
 
-        creator_rank = user_rank(case.created_by)
+        creator_rank = case.created_by.police_rank
         if creator_rank == 0:
             return Response({'detail': 'Invalid reporter role for scene case'}, status=400)
         if creator_rank >= POLICE_RANK['chief']:
@@ -146,7 +166,7 @@ class CaseViewSet(viewsets.ModelViewSet):
         if case.status != Case.Status.UNDER_REVIEW:
             return Response({'detail': 'Scene case is not awaiting approval'}, status=400)
 
-        creator_rank = user_rank(case.created_by)
+        creator_rank = case.created_by.police_rank
         if creator_rank == 0:
             return Response({'detail': 'Invalid reporter role for scene case'}, status=400)
         if creator_rank >= POLICE_RANK['chief']:
@@ -379,95 +399,36 @@ class CaseViewSet(viewsets.ModelViewSet):
         log_case(case, request.user, 'case.detective.taken')
         return Response(self.get_serializer(case).data)
 
+    @decorators.action(detail=True, methods=['get'])
+    def logs(self, request, pk=None):
+        case = self.get_object()
+        if not has_any_action(request.user, ['case.read_all', 'judiciary.verdict', 'case.send_to_court']):
+            return Response({'detail': 'No permission'}, status=403)
+
+        paginator = PageNumberOrKeysetPagination()
+        paginator.timestamp_field = 'created_at'
+        page = paginator.paginate_queryset(case.logs.order_by('-created_at', '-id'), request, view=self)
+        return paginator.get_paginated_response(CaseLogSerializer(page, many=True).data)
+
     @decorators.action(detail=True, methods=['get'])
     def global_report(self, request, pk=None):
         case = self.get_object()
         if not has_any_action(request.user, ['case.read_all', 'judiciary.verdict', 'case.send_to_court']):
             return Response({'detail': 'No permission'}, status=403)
 
-        from evidence.models import WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence
-        from evidence.serializers import (
-            WitnessEvidenceSerializer,
-            BiologicalEvidenceSerializer,
-            VehicleEvidenceSerializer,
-            IdentificationEvidenceSerializer,
-            OtherEvidenceSerializer,
-        )
-        from investigation.models import Suspect, Interrogation, SuspectSubmission
-        from investigation.serializers import SuspectSerializer, InterrogationSerializer, SuspectSubmissionSerializer
-        from judiciary.models import CourtSession
-        from judiciary.serializers import CourtSessionSerializer
-
-        def user_row(u):
-            if not u:
-                return None
-            return {
-                'id': u.id,
-                'username': u.username,
-                'first_name': u.first_name,
-                'last_name': u.last_name,
-                'national_id': u.national_id,
-                'phone': u.phone,
-                'email': u.email,
-                'roles': list(u.user_roles.values_list('role__name', flat=True)),
-            }
-
-        suspects = Suspect.objects.filter(case=case)
-        interrogations = Interrogation.objects.filter(case=case).select_related(
-            'detective', 'sergeant', 'captain_by', 'chief_by', 'suspect'
-        )
-        submissions = SuspectSubmission.objects.filter(case=case).select_related('detective', 'sergeant').prefetch_related('suspects')
-        court_sessions = CourtSession.objects.filter(case=case).select_related('judge', 'convicted_suspect').order_by('-id')
-        complainants = case.complainants.select_related('user').all()
-
-        involved_users = {}
-        for u in [case.created_by, case.assigned_detective]:
-            if u:
-                involved_users[u.id] = u
-        for log in case.logs.select_related('actor').all():
-            involved_users[log.actor_id] = log.actor
-        for row in complainants:
-            involved_users[row.user_id] = row.user
-        for i in interrogations:
-            for u in [i.detective, i.sergeant, i.captain_by, i.chief_by]:
-                if u:
-                    involved_users[u.id] = u
-        for s in submissions:
-            for u in [s.detective, s.sergeant]:
-                if u:
-                    involved_users[u.id] = u
-        for cs in court_sessions:
-            involved_users[cs.judge_id] = cs.judge
-
-        payload = {
-            'case': CaseSerializer(case).data,
-            'formed_at': case.created_at,
-            'complainants': [
-                {
-                    'id': row.id,
-                    'status': row.status,
-                    'review_note': row.review_note,
-                    'user': user_row(row.user),
-                }
-                for row in complainants
-            ],
-            'witness_statements': CaseWitnessSerializer(case.witnesses.all(), many=True).data,
-            'evidence': {
-                'witness': WitnessEvidenceSerializer(WitnessEvidence.objects.filter(case=case), many=True).data,
-                'biological': BiologicalEvidenceSerializer(BiologicalEvidence.objects.filter(case=case), many=True).data,
-                'vehicle': VehicleEvidenceSerializer(VehicleEvidence.objects.filter(case=case), many=True).data,
-                'identification': IdentificationEvidenceSerializer(IdentificationEvidence.objects.filter(case=case), many=True).data,
-                'other': OtherEvidenceSerializer(OtherEvidence.objects.filter(case=case), many=True).data,
-            },
-            'suspects': SuspectSerializer(suspects, many=True).data,
-            'criminals': SuspectSerializer(suspects.filter(status=Suspect.Status.CRIMINAL), many=True).data,
-            'interrogations': InterrogationSerializer(interrogations, many=True).data,
-            'suspect_submissions': SuspectSubmissionSerializer(submissions, many=True).data,
-            'court_sessions': CourtSessionSerializer(court_sessions, many=True).data,
-            'logs': CaseLogSerializer(case.logs.all(), many=True).data,
-            'involved_members': [user_row(u) for u in involved_users.values()],
-        }
-        return Response(payload)
+        sections = parse_sections(request)
+        dossier = CaseDossier(case, sections, contact_details=True)
+        keys = {'witnesses': 'witness_statements'}
+        extra_sections = ['criminals'] if 'suspects' in sections else []
+        values = {'formed_at': case.created_at} if 'case' in sections else {}
+
+        def build():
+            return {**values, **dossier.payload(keys, extra_sections)}
+
+        def stream():
+            return dossier.stream(keys, extra_sections, values)
+
+        return report_response(request, 'global', case, build, variant=','.join(sorted(sections)), stream=stream)
 
 
 class ComplaintSubmissionViewSet(viewsets.ReadOnlyModelViewSet):
@@ -479,9 +440,7 @@ class ComplaintSubmissionViewSet(viewsets.ReadOnlyModelViewSet):
         user = self.request.user
         if has_any_action(user, ['case.read_all']):
             return self.queryset.order_by('-id')
-        return self.queryset.filter(
-            Q(case__created_by=user) | Q(case__complainants__user=user)
-        ).distinct().order_by('-id')
+        return self.queryset.filter(case_id__in=own_case_ids(user)).order_by('-id')
 
 
 class CaseComplainantViewSet(viewsets.ReadOnlyModelViewSet):
@@ -493,9 +452,7 @@ class CaseComplainantViewSet(viewsets.ReadOnlyModelViewSet):
         user = self.request.user
         if has_any_action(user, ['case.read_all']):
             return self.queryset.order_by('-id')
-        return self.queryset.filter(
-            Q(case__created_by=user) | Q(case__complainants__user=user)
-        ).distinct().order_by('-id')
+        return self.queryset.filter(case_id__in=own_case_ids(user)).order_by('-id')
 
 
 class CaseWitnessViewSet(viewsets.ModelViewSet):
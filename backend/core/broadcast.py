@@ -0,0 +1,88 @@
+"""In-process publish/subscribe for live streams, with no external broker.
+
+Publishing only wakes subscribers: readers then load what changed themselves,
+so a slow reader holds at most one pending wake-up per channel and never a
+backlog. Only viewers served by this process are reached, so live streams
+need a single server process (or a broker behind these same functions).
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+_lock = threading.Lock()
+_subscribers = defaultdict(set)
+
+
+class Subscription:
+    """Wake-ups for one reader from any of ``channels``; read them with ``wait`` or ``wait_async``."""
+
+    def __init__(self, channels, loop=None):
+        self.channels = set(channels)
+        self.pending = set()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._loop = loop
+        self._async_ready = asyncio.Event() if loop is not None else None
+
+    def notify(self, channel):
+        with self._lock:
+            self.pending.add(channel)
+            self._ready.set()
+            if self._loop is not None:
+                try:
+                    self._loop.call_soon_threadsafe(self._async_ready.set)
+                except RuntimeError:
+                    # The reader's event loop is gone; it will unsubscribe as it unwinds.
+                    pass
+
+    def _take(self):
+        with self._lock:
+            woke, self.pending = self.pending, set()
+            self._ready.clear()
+            if self._async_ready is not None:
+                self._async_ready.clear()
+        return woke
+
+    def wait(self, timeout):
+        """Channels published since the last call, waiting up to ``timeout`` seconds for one."""
+        self._ready.wait(timeout)
+        return self._take()
+
+    async def wait_async(self, timeout):
+        if not self.pending:
+            try:
+                await asyncio.wait_for(self._async_ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._take()
+
+    def close(self):
+        with _lock:
+            for channel in self.channels:
+                _subscribers[channel].discard(self)
+                if not _subscribers[channel]:
+                    del _subscribers[channel]
+
+
+def subscribe(channels, loop=None):
+    """Start listening on ``channels``; pass the running loop to wait from async code."""
+    subscription = Subscription(channels, loop)
+    with _lock:
+        for channel in subscription.channels:
+            _subscribers[channel].add(subscription)
+    return subscription
+
+
+def publish(*channels):
+    with _lock:
+        targets = [(channel, list(_subscribers.get(channel, ()))) for channel in channels]
+    for channel, subscriptions in targets:
+        for subscription in subscriptions:
+            subscription.notify(channel)
+
+
+def publish_on_commit(*channels):
+    # Readers must not wake before the change they are told about is visible to them.
+    transaction.on_commit(lambda: publish(*channels))
@@ -0,0 +1,31 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+QUERY_COUNT_HEADER = 'X-Query-Count'
+
+
+class QueryCountMiddleware:
+    """Report the number of SQL queries a request ran in a response header."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_COUNT_HEADER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(counter))
+            response = self.get_response(request)
+        response[QUERY_COUNT_HEADER] = str(count)
+        return response
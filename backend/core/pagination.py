@@ -0,0 +1,98 @@
+import base64
+import binascii
+
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only pagination on a ``(timestamp, id)`` key, newest first.
+
+    Each page is an index range scan that starts after the last row of the
+    previous page, so there is no COUNT(*) and no OFFSET however deep the
+    client pages. The timestamp field comes from ``timestamp_field`` or the
+    view's ``cursor_timestamp_field`` and defaults to ``created_at``.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    timestamp_field = None
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.field = self.timestamp_field or getattr(view, 'cursor_timestamp_field', 'created_at')
+        queryset = queryset.order_by(f'-{self.field}', '-id')
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            timestamp, pk = self.decode_cursor(cursor)
+            # Bound the scan by the timestamp alone so the (timestamp, id) index
+            # drives it, then drop the rows of that timestamp already served.
+            queryset = queryset.filter(**{f'{self.field}__lte': timestamp}).exclude(
+                **{self.field: timestamp, 'id__gte': pk}
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(getattr(last, self.field), last.pk))
+
+    def encode_cursor(self, timestamp, pk):
+        return base64.urlsafe_b64encode(f'{timestamp.isoformat()}|{pk}'.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            timestamp, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            timestamp = parse_datetime(timestamp)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None:
+            raise NotFound(self.invalid_cursor_message)
+        return timestamp, pk
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """Page numbers by default; ``?paginate=cursor`` or a ``cursor`` switches to keyset mode."""
+
+    keyset_class = KeysetPagination
+    timestamp_field = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        params = request.query_params
+        if params.get('paginate') == 'cursor' or self.keyset_class.cursor_query_param in params:
+            self.keyset = self.keyset_class()
+            self.keyset.timestamp_field = self.timestamp_field
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
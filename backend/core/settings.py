@@ -2,6 +2,7 @@ from pathlib import Path
 from datetime import timedelta
 import importlib.util
 import os
+import shutil
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -31,17 +32,20 @@ INSTALLED_APPS = [
 
 HAS_SIMPLE_JWT = importlib.util.find_spec('rest_framework_simplejwt') is not None
 HAS_SPECTACULAR = importlib.util.find_spec('drf_spectacular') is not None
+HAS_PILLOW = importlib.util.find_spec('PIL') is not None
 if HAS_SIMPLE_JWT:
     INSTALLED_APPS.append('rest_framework_simplejwt')
 if HAS_SPECTACULAR:
     INSTALLED_APPS.append('drf_spectacular')
 
 MIDDLEWARE = [
+    'core.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'rbac.middleware.PermissionSnapshotMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -72,6 +76,43 @@ DATABASES = {
     }
 }
 
+# Use a shared backend (e.g. Redis/Memcached) when running several worker processes,
+# otherwise RBAC invalidations only reach the process that made the change.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+RBAC_CACHE_ALIAS = 'default'
+RBAC_POLICY_CACHE_TIMEOUT = 300
+CASE_REPORT_CACHE_ALIAS = 'default'
+CASE_REPORT_CACHE_TIMEOUT = 3600
+# Rows read per database round trip when a report is streamed (?stream=1).
+CASE_REPORT_STREAM_CHUNK_SIZE = 2000
+
+# Upper bound on items per POST /api/evidence/bulk/.
+EVIDENCE_BULK_MAX_ITEMS = 500
+# Chunked evidence uploads (/api/evidence/uploads/); files are written under MEDIA_ROOT.
+MEDIA_UPLOAD_CHUNK_SIZE = 8 * 1024 ** 2
+MEDIA_UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 ** 2
+MEDIA_UPLOAD_MAX_SIZE = 20 * 1024 ** 3
+# Thumbnails/previews of stored images (needs Pillow) and poster frames of videos (needs ffmpeg).
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY') or shutil.which('ffmpeg')
+MEDIA_DERIVATIVE_WORKERS = int(os.getenv('MEDIA_DERIVATIVE_WORKERS', '2'))
+MEDIA_DERIVATIVE_WAIT = 10
+MEDIA_DERIVATIVE_TIMEOUT = 60
+# Seconds before a failed derivation is attempted again.
+MEDIA_DERIVATIVE_RETRY_AFTER = 300
+# Upper bound on operations per POST /api/investigation/boards/{id}/batch/.
+BOARD_BATCH_MAX_OPERATIONS = 1000
+# Seconds between keepalive comments on /api/investigation/boards/{id}/stream/.
+BOARD_STREAM_KEEPALIVE = 15
+BOARD_GRAPH_CACHE_ALIAS = 'default'
+BOARD_GRAPH_CACHE_TIMEOUT = 3600
+
+# Adds an X-Query-Count response header (used by the bench_workflows command).
+QUERY_COUNT_HEADER = os.getenv('QUERY_COUNT_HEADER', '') == '1'
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -94,7 +135,7 @@ AUTH_USER_MODEL = 'accounts.User'
 
 auth_classes = ['rest_framework.authentication.SessionAuthentication']
 if HAS_SIMPLE_JWT:
-    auth_classes = ['rest_framework_simplejwt.authentication.JWTAuthentication']
+    auth_classes = ['rbac.authentication.PolicyJWTAuthentication']
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': auth_classes,
@@ -116,6 +157,7 @@ SPECTACULAR_SETTINGS = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'TOKEN_REFRESH_SERIALIZER': 'rbac.tokens.PolicyTokenRefreshSerializer',
 }
 
 # Zarinpal sandbox defaults
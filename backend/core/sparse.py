@@ -0,0 +1,59 @@
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _names(request, param):
+    raw = request.query_params.get(param, '')
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Serializer mixin for ``?fields=a,b`` (keep only these) and ``?omit=a,b`` (drop these).
+
+    Only the top-level serializer of a GET request is narrowed; ``id`` is always
+    kept. ``field_dependencies`` maps computed fields to the model fields they read
+    so the queryset is not deferred under them.
+    """
+
+    field_dependencies = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self._context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        keep = _names(request, FIELDS_PARAM)
+        omit = _names(request, OMIT_PARAM) - {'id'}
+        for name in list(self.fields):
+            if (keep and name not in keep and name != 'id') or name in omit:
+                self.fields.pop(name)
+
+
+def deferrable_fields(model, serializer):
+    """Concrete, non-relational model fields the serializer will not read."""
+    needed = set()
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.SerializerMethodField):
+            needed.update(getattr(serializer, 'field_dependencies', {}).get(name, ()))
+        elif field.source == '*':
+            return []
+        else:
+            needed.add(field.source.split('.')[0])
+    return [
+        f.name for f in model._meta.concrete_fields
+        if not f.primary_key and not f.is_relation and f.name not in needed
+    ]
+
+
+class SparseQuerysetMixin:
+    """ViewSet mixin that defers the columns a sparse fieldset leaves out."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        if self.action not in ['list', 'retrieve'] or not (FIELDS_PARAM in params or OMIT_PARAM in params):
+            return queryset
+        deferred = deferrable_fields(queryset.model, self.get_serializer())
+        return queryset.defer(*deferred) if deferred else queryset
@@ -0,0 +1,410 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from cases.models import Case, CaseComplainant, CaseLog, CaseWitness, ComplaintSubmission
+from cases.reports import bump_report_version
+from core.middleware import QUERY_COUNT_HEADER
+from evidence.index import index_evidence
+from evidence.models import BiologicalEvidence, IdentificationEvidence, OtherEvidence, VehicleEvidence, WitnessEvidence
+from investigation.models import (
+    BoardEdge, BoardNode, DetectiveBoard, Interrogation, Notification, Suspect, SuspectSubmission,
+)
+from judiciary.models import CourtSession
+from payments.models import BailPayment
+from rbac.models import Role, RolePermission, UserRole
+from rbac.policy import bump_policy_version
+from rewards.models import RewardClaim, Tip
+
+User = get_user_model()
+
+# Query-count ceilings per endpoint. Every endpoint is driven against datasets
+# with 1, 10 and 100 related rows and must stay within the same ceiling, so an
+# N+1 pattern fails here. Tighten a budget whenever an endpoint gets cheaper.
+# '{case}' is replaced with the id of the case that owns the related rows.
+# A ceiling of None marks a known N+1 endpoint that is exercised but not yet budgeted.
+# Case reports are measured on a warm snapshot (see cases.reports).
+QUERY_BUDGETS = [
+    # (url, ceiling)
+    ('/api/auth/me/', 1),
+    ('/api/auth/users/', 4),
+    ('/api/rbac/roles/', 3),
+    ('/api/rbac/user-roles/', 2),
+    ('/api/cases/cases/', 2),
+    ('/api/cases/cases/?expand=all', 4),
+    ('/api/cases/cases/{case}/', 3),
+    ('/api/cases/cases/?paginate=cursor', 1),
+    ('/api/cases/cases/{case}/logs/', 3),
+    ('/api/cases/cases/{case}/logs/?paginate=cursor', 2),
+    ('/api/cases/cases/{case}/global_report/', 1),
+    ('/api/cases/complaint-submissions/', 2),
+    ('/api/cases/case-complainants/', 2),
+    ('/api/cases/case-witnesses/', 2),
+    ('/api/evidence/witness/', 2),
+    ('/api/evidence/biological/', 2),
+    ('/api/evidence/vehicle/', 2),
+    ('/api/evidence/identification/', 2),
+    ('/api/evidence/other/', 2),
+    ('/api/evidence/all/?case_id={case}', 1),
+    ('/api/investigation/boards/', 4),
+    ('/api/investigation/board-nodes/', 2),
+    ('/api/investigation/board-edges/', 2),
+    ('/api/investigation/suspects/', 2),
+    ('/api/investigation/suspect-submissions/', 3),
+    ('/api/investigation/interrogations/', 2),
+    ('/api/investigation/notifications/', 2),
+    ('/api/investigation/notifications/?paginate=cursor', 1),
+    ('/api/investigation/high-alert/', 1),
+    ('/api/judiciary/court-sessions/', 2),
+    ('/api/judiciary/court-sessions/case_summary/?case_id={case}', 1),
+    ('/api/rewards/tips/', 3),
+    ('/api/rewards/tips/?paginate=cursor', 2),
+    ('/api/rewards/reward-claims/', 2),
+    ('/api/payments/bail/', 2),
+    ('/api/dashboard/stats/', 4),
+    ('/api/dashboard/modules/', 1),
+]
+
+# The same reports rebuilt from scratch, after their snapshot was invalidated.
+COLD_REPORT_BUDGETS = [
+    ('/api/cases/cases/{case}/global_report/', 17),
+    ('/api/judiciary/court-sessions/case_summary/?case_id={case}', 17),
+]
+
+# The same endpoints for a user whose access comes from a role rather than the
+# superuser bypass. Each is measured with the RBAC policy cache cold, so the two
+# lookups resolving the user's roles and their actions are counted as well. The
+# user, role and permission endpoints are superuser-only and are left out.
+# Report snapshots are keyed by the policy version, so reports only appear in
+# the cold list below.
+ROLE_QUERY_BUDGETS = [
+    # (url, ceiling)
+    ('/api/auth/me/', 1),
+    ('/api/cases/cases/', 4),
+    ('/api/cases/cases/?expand=all', 6),
+    ('/api/cases/cases/{case}/', 5),
+    ('/api/cases/cases/?paginate=cursor', 3),
+    ('/api/cases/cases/{case}/logs/', 5),
+    ('/api/cases/cases/{case}/logs/?paginate=cursor', 4),
+    ('/api/cases/complaint-submissions/', 4),
+    ('/api/cases/case-complainants/', 4),
+    ('/api/cases/case-witnesses/', 2),
+    ('/api/evidence/witness/', 4),
+    ('/api/evidence/biological/', 4),
+    ('/api/evidence/vehicle/', 4),
+    ('/api/evidence/identification/', 4),
+    ('/api/evidence/other/', 4),
+    ('/api/evidence/all/?case_id={case}', 3),
+    ('/api/investigation/boards/', 6),
+    ('/api/investigation/board-nodes/', 4),
+    ('/api/investigation/board-edges/', 4),
+    ('/api/investigation/suspects/', 4),
+    ('/api/investigation/suspect-submissions/', 5),
+    ('/api/investigation/interrogations/', 4),
+    ('/api/investigation/notifications/', 1),
+    ('/api/investigation/notifications/?paginate=cursor', 1),
+    ('/api/investigation/high-alert/', 1),
+    ('/api/judiciary/court-sessions/', 4),
+    ('/api/rewards/tips/', 4),
+    ('/api/rewards/tips/?paginate=cursor', 3),
+    ('/api/rewards/reward-claims/', 1),
+    ('/api/payments/bail/', 4),
+    ('/api/dashboard/stats/', 4),
+    ('/api/dashboard/modules/', 3),
+]
+
+ROLE_COLD_REPORT_BUDGETS = [
+    ('/api/cases/cases/{case}/global_report/', 19),
+    ('/api/judiciary/court-sessions/case_summary/?case_id={case}', 19),
+]
+
+# Every RBAC action the endpoints check, granted through one role.
+OFFICER_ACTIONS = [
+    'case.assign_detective', 'case.complaint.intern_review', 'case.complaint.officer_review', 'case.read_all',
+    'case.scene.add_complainant', 'case.scene.create', 'case.send_to_court', 'dashboard.read',
+    'evidence.biological.review', 'evidence.manage', 'interrogation.captain_decision', 'interrogation.chief_review',
+    'interrogation.manage', 'investigation.board.manage', 'judiciary.verdict', 'rbac.manage', 'reward.verify',
+    'suspect.manage', 'tip.detective_review', 'tip.officer_review', 'tip.submit',
+]
+
+
+def build_officer():
+    """A non-superuser who reaches every budgeted endpoint through a role."""
+    officer = User.objects.create_user(
+        username='budget_officer', password='Strong12345', email='budget_officer@example.com',
+        phone='09300000001', national_id='8000000001',
+    )
+    role = Role.objects.create(name='budget_chief')
+    RolePermission.objects.bulk_create([RolePermission(role=role, action=action) for action in OFFICER_ACTIONS])
+    UserRole.objects.create(user=officer, role=role)
+    return officer
+
+
+def build_dataset(size):
+    """Create ``size`` rows of every related model around one focus case."""
+    admin = User.objects.create_superuser(
+        username='budget_admin', password='Strong12345', email='budget_admin@example.com',
+        phone='09300000000', national_id='8000000000',
+    )
+    detective_role = Role.objects.create(name='detective')
+    RolePermission.objects.create(role=detective_role, action='investigation.board.manage')
+    users = []
+    for i in range(size):
+        user = User.objects.create_user(
+            username=f'budget_u{i}', password='Strong12345', email=f'budget_u{i}@example.com',
+            phone=f'0931{i:07d}', national_id=f'81{i:08d}',
+        )
+        UserRole.objects.create(user=user, role=detective_role)
+        users.append(user)
+
+    case = Case.objects.create(
+        title='Focus', description='desc', source=Case.Source.COMPLAINT, status=Case.Status.SENT_TO_COURT,
+        severity=Case.Severity.LEVEL_2, created_by=admin, assigned_detective=users[0],
+    )
+    cases = [case] + Case.objects.bulk_create([
+        Case(title=f'Case {i}', description='desc', source=Case.Source.COMPLAINT, created_by=users[i])
+        for i in range(1, size)
+    ])
+    ComplaintSubmission.objects.bulk_create([ComplaintSubmission(case=c, complainant=c.created_by) for c in cases])
+    CaseComplainant.objects.bulk_create([CaseComplainant(case=c, user=c.created_by) for c in cases])
+    CaseComplainant.objects.bulk_create([CaseComplainant(case=case, user=u) for u in users])
+    CaseWitness.objects.bulk_create([
+        CaseWitness(case=c, full_name='W', national_id='1', phone='1') for c in cases
+    ])
+    CaseLog.objects.bulk_create([CaseLog(case=case, actor=u, action='touch') for u in users])
+
+    common = {'case': case, 'description': 'desc', 'recorded_by': admin}
+    evidence = WitnessEvidence.objects.bulk_create([WitnessEvidence(title=f'W{i}', transcript='t', **common) for i in range(size)])
+    evidence += BiologicalEvidence.objects.bulk_create([
+        BiologicalEvidence(title=f'B{i}', image_urls=['http://x/1.png'], **common) for i in range(size)
+    ])
+    evidence += VehicleEvidence.objects.bulk_create([
+        VehicleEvidence(title=f'V{i}', model_name='m', color='c', plate_number=f'P{i}', **common) for i in range(size)
+    ])
+    evidence += IdentificationEvidence.objects.bulk_create([
+        IdentificationEvidence(title=f'I{i}', owner_full_name='o', **common) for i in range(size)
+    ])
+    evidence += OtherEvidence.objects.bulk_create([OtherEvidence(title=f'O{i}', **common) for i in range(size)])
+    index_evidence(evidence)
+
+    suspects = Suspect.objects.bulk_create([
+        Suspect(case=case, full_name=f'S{i}', national_id=f'NS{i}', person=users[i]) for i in range(size)
+    ])
+    Interrogation.objects.bulk_create([
+        Interrogation(case=case, suspect=s, detective=users[0], sergeant=admin, captain_by=admin, chief_by=users[-1])
+        for s in suspects
+    ])
+    submissions = SuspectSubmission.objects.bulk_create([
+        SuspectSubmission(case=case, detective=users[0], sergeant=users[i], detective_reason='r')
+        for i in range(size)
+    ])
+    for submission in submissions:
+        submission.suspects.add(suspects[0])
+    CourtSession.objects.bulk_create([
+        CourtSession(case=case, judge=users[i], verdict=CourtSession.Verdict.GUILTY, convicted_suspect=s)
+        for i, s in enumerate(suspects)
+    ])
+
+    board = DetectiveBoard.objects.create(case=case, detective=users[0])
+    nodes = BoardNode.objects.bulk_create([BoardNode(board=board, label=f'N{i}') for i in range(size + 1)])
+    BoardEdge.objects.bulk_create([
+        BoardEdge(board=board, from_node=nodes[i], to_node=nodes[i + 1]) for i in range(size)
+    ])
+
+    Notification.objects.bulk_create([Notification(recipient=admin, case=case, message='m') for _ in range(size)])
+    tips = Tip.objects.bulk_create([
+        Tip(submitter=admin, case=case, suspect=suspects[i], content='tip') for i in range(size)
+    ])
+    RewardClaim.objects.bulk_create([RewardClaim(tip=t, unique_code=f'CODE{t.id}') for t in tips])
+    BailPayment.objects.bulk_create([
+        BailPayment(case=case, suspect=s, amount=1000, created_by=admin) for s in suspects
+    ])
+    return admin, case
+
+
+class QueryBudgetMixin:
+    SIZE = None
+
+    @classmethod
+    def setUpTestData(cls):
+        # Run the RBAC cache invalidations the way a committed setup would.
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.admin, cls.case = build_dataset(cls.SIZE)
+            cls.officer = build_officer()
+
+    def test_endpoints_stay_within_query_budget(self):
+        self.client.force_authenticate(self.admin)
+        for url_template, budget in QUERY_BUDGETS:
+            url = url_template.format(case=self.case.id)
+            with self.subTest(url=url, size=self.SIZE):
+                # Warm up process-level caches (e.g. the RBAC policy cache) first.
+                self.client.get(url)
+                with CaptureQueriesContext(connection) as ctx:
+                    resp = self.client.get(url)
+                self.assertEqual(resp.status_code, 200, resp.content[:200])
+                if budget is None:
+                    continue
+                self.assertLessEqual(
+                    len(ctx.captured_queries), budget,
+                    f'{url} ran {len(ctx.captured_queries)} queries (budget {budget}) with {self.SIZE} rows',
+                )
+
+    def test_cold_reports_stay_within_query_budget(self):
+        self.client.force_authenticate(self.admin)
+        for url_template, budget in COLD_REPORT_BUDGETS:
+            url = url_template.format(case=self.case.id)
+            with self.subTest(url=url, size=self.SIZE):
+                self.client.get(url)
+                bump_report_version(self.case.id)
+                with CaptureQueriesContext(connection) as ctx:
+                    resp = self.client.get(url)
+                self.assertEqual(resp.status_code, 200, resp.content[:200])
+                self.assertLessEqual(
+                    len(ctx.captured_queries), budget,
+                    f'{url} ran {len(ctx.captured_queries)} queries (budget {budget}) with {self.SIZE} rows',
+                )
+
+    def test_endpoints_stay_within_query_budget_for_role_user(self):
+        self.client.force_authenticate(self.officer)
+        for url_template, budget in ROLE_QUERY_BUDGETS:
+            url = url_template.format(case=self.case.id)
+            with self.subTest(url=url, size=self.SIZE):
+                self.client.get(url)
+                bump_policy_version()
+                with CaptureQueriesContext(connection) as ctx:
+                    resp = self.client.get(url)
+                self.assertEqual(resp.status_code, 200, resp.content[:200])
+                self.assertLessEqual(
+                    len(ctx.captured_queries), budget,
+                    f'{url} ran {len(ctx.captured_queries)} queries (budget {budget}) with {self.SIZE} rows',
+                )
+
+    def test_cold_reports_stay_within_query_budget_for_role_user(self):
+        self.client.force_authenticate(self.officer)
+        for url_template, budget in ROLE_COLD_REPORT_BUDGETS:
+            url = url_template.format(case=self.case.id)
+            with self.subTest(url=url, size=self.SIZE):
+                self.client.get(url)
+                bump_report_version(self.case.id)
+                bump_policy_version()
+                with CaptureQueriesContext(connection) as ctx:
+                    resp = self.client.get(url)
+                self.assertEqual(resp.status_code, 200, resp.content[:200])
+                self.assertLessEqual(
+                    len(ctx.captured_queries), budget,
+                    f'{url} ran {len(ctx.captured_queries)} queries (budget {budget}) with {self.SIZE} rows',
+                )
+
+
+class QueryBudgetSize1Tests(QueryBudgetMixin, APITestCase):
+    SIZE = 1
+
+
+class QueryBudgetSize10Tests(QueryBudgetMixin, APITestCase):
+    SIZE = 10
+
+
+class QueryBudgetSize100Tests(QueryBudgetMixin, APITestCase):
+    SIZE = 100
+
+
+class QueryCountMiddlewareTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='qc_admin', password='Strong12345', email='qc_admin@example.com',
+            phone='09300000001', national_id='8000000001',
+        )
+        self.client.force_authenticate(self.admin)
+
+    def test_header_reports_query_count_when_enabled(self):
+        with self.settings(QUERY_COUNT_HEADER=True):
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get('/api/cases/cases/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(int(resp[QUERY_COUNT_HEADER]), len(ctx.captured_queries))
+
+    def test_header_absent_by_default(self):
+        resp = self.client.get('/api/cases/cases/')
+        self.assertNotIn(QUERY_COUNT_HEADER, resp)
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='ks_admin', password='Strong12345', email='ks_admin@example.com',
+            phone='09300000002', national_id='8000000002',
+        )
+        self.case = Case.objects.create(
+            title='Keyset', description='desc', source=Case.Source.COMPLAINT, created_by=self.admin,
+        )
+        Notification.objects.bulk_create([
+            Notification(recipient=self.admin, case=self.case, message=f'm{i}') for i in range(45)
+        ])
+        # Identical timestamps force the id tie-breaker to keep pages stable.
+        Notification.objects.update(created_at=timezone.now())
+        self.client.force_authenticate(self.admin)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+            ids.extend(row['id'] for row in resp.data['results'])
+            url = resp.data['next']
+        return ids
+
+    def test_cursor_mode_visits_every_row_once_in_key_order(self):
+        ids = self.walk('/api/investigation/notifications/?paginate=cursor')
+        expected = list(Notification.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_page_number_mode_stays_default(self):
+        resp = self.client.get('/api/investigation/notifications/')
+        self.assertEqual(resp.data['count'], 45)
+        self.assertIn('previous', resp.data)
+
+    def test_case_logs_action_supports_cursor_mode(self):
+        CaseLog.objects.bulk_create([CaseLog(case=self.case, actor=self.admin, action=f'a{i}') for i in range(30)])
+        ids = self.walk(f'/api/cases/cases/{self.case.id}/logs/?paginate=cursor')
+        self.assertEqual(len(ids), 30)
+        self.assertEqual(len(set(ids)), 30)
+
+    def test_invalid_cursor_is_rejected(self):
+        resp = self.client.get('/api/investigation/notifications/?cursor=not-a-cursor')
+        self.assertEqual(resp.status_code, 404)
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='sf_admin', password='Strong12345', email='sf_admin@example.com',
+            phone='09300000003', national_id='8000000003',
+        )
+        case = Case.objects.create(title='Sparse', description='desc', source=Case.Source.COMPLAINT, created_by=self.admin)
+        suspect = Suspect.objects.create(case=case, full_name='S', national_id='1')
+        Interrogation.objects.create(
+            case=case, suspect=suspect, detective=self.admin, sergeant=self.admin,
+            transcription='x' * 5000, key_values={'k': 'v'},
+        )
+        self.client.force_authenticate(self.admin)
+
+    def test_fields_limits_payload_and_defers_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/investigation/interrogations/?fields=case,suspect,detective_score')
+        self.assertEqual(set(resp.data['results'][0]), {'id', 'case', 'suspect', 'detective_score'})
+        select = [q['sql'] for q in ctx.captured_queries if 'investigation_interrogation' in q['sql']][-1]
+        self.assertNotIn('"transcription"', select)
+        self.assertNotIn('"key_values"', select)
+
+    def test_omit_drops_fields(self):
+        row = self.client.get('/api/investigation/interrogations/?omit=transcription,key_values').data['results'][0]
+        self.assertNotIn('transcription', row)
+        self.assertIn('detective_note', row)
+
+    def test_method_field_dependencies_stay_loaded(self):
+        row = self.client.get('/api/investigation/suspects/?fields=full_name,days_wanted').data['results'][0]
+        self.assertEqual(row, {'id': row['id'], 'full_name': 'S', 'days_wanted': 0})
@@ -5,13 +5,13 @@ from rest_framework.response import Response
 
 from cases.models import Case
 from investigation.models import Suspect
-from rbac.permissions import user_has_action
+from rbac.permissions import user_has_action, user_role_names
 
 User = get_user_model()
 
 
 def _modules_for_user(user):
-    role_names = set(user.user_roles.values_list('role__name', flat=True))
+    role_names = user_role_names(user)
     modules = [{'key': 'cases', 'title': 'Case Management', 'path': '/cases'}]
 
     if user.is_superuser or user_has_action(user, 'evidence.manage') or user_has_action(user, 'evidence.biological.review'):
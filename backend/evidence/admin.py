@@ -1,8 +1,11 @@
 from django.contrib import admin
-from .models import WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence
+from .models import WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence, EvidenceIndex, MediaBlob, MediaUpload
 
 admin.site.register(WitnessEvidence)
 admin.site.register(BiologicalEvidence)
 admin.site.register(VehicleEvidence)
 admin.site.register(IdentificationEvidence)
 admin.site.register(OtherEvidence)
+admin.site.register(EvidenceIndex)
+admin.site.register(MediaUpload)
+admin.site.register(MediaBlob)
@@ -0,0 +1,124 @@
+import os
+import re
+from pathlib import Path
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import MediaBlob, MediaReference
+
+BLOB_DIR = 'evidence-blobs'
+BLOB_NAME = re.compile(r'^([0-9a-f]{64})(\.[a-z0-9]{1,10})?$')
+
+
+def blob_name(sha256, filename):
+    ext = os.path.splitext(filename)[1].lower()
+    if not re.fullmatch(r'\.[a-z0-9]{1,10}', ext):
+        ext = ''
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256}{ext}'
+
+
+def store_blob(path, sha256, filename, content_type):
+    """Move a finished file into the blob store, or drop it when that content is already stored."""
+    blob = MediaBlob.objects.filter(pk=sha256).first()
+    if blob is None:
+        name = blob_name(sha256, filename)
+        target = Path(settings.MEDIA_ROOT) / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        size = path.stat().st_size
+        os.replace(path, target)
+        blob, _ = MediaBlob.objects.get_or_create(pk=sha256, defaults={
+            'name': name, 'size': size, 'content_type': content_type, 'last_uploaded_at': timezone.now(),
+        })
+    else:
+        path.unlink()
+        blob.last_uploaded_at = timezone.now()
+        blob.save(update_fields=['last_uploaded_at'])
+    return blob
+
+
+def blob_path(blob):
+    return Path(settings.MEDIA_ROOT) / blob.name
+
+
+def delete_blob(blob):
+    """Remove a blob's file, every asset derived from it, and its row."""
+    from .derivatives import VARIANTS, derived_name
+
+    for variant in VARIANTS:
+        (Path(settings.MEDIA_ROOT) / derived_name(blob.name, variant)).unlink(missing_ok=True)
+    blob_path(blob).unlink(missing_ok=True)
+    blob.delete()
+
+
+def _media_path_prefix():
+    return '/' + urlparse(settings.MEDIA_URL).path.lstrip('/')
+
+
+def blob_hash(url):
+    """sha256 of the stored blob a URL points at, or None for any other URL."""
+    path = urlparse(url).path
+    prefix = f'{_media_path_prefix().rstrip("/")}/{BLOB_DIR}/'
+    if not path.startswith(prefix):
+        return None
+    match = BLOB_NAME.match(path.rsplit('/', 1)[-1])
+    # Anything under the store that is not a blob name cannot be valid.
+    return match.group(1) if match else ''
+
+
+def unknown_blob_urls(urls):
+    """URLs into the blob store that do not resolve to a stored blob."""
+    hashes = {url: blob_hash(url) for url in urls if isinstance(url, str)}
+    wanted = {h for h in hashes.values() if h}
+    known = set(MediaBlob.objects.filter(pk__in=wanted).values_list('pk', flat=True)) if wanted else set()
+    return [url for url, h in hashes.items() if h is not None and h not in known]
+
+
+def live_ref_count():
+    """The references a blob actually has, as an expression over MediaBlob rows."""
+    counts = MediaReference.objects.filter(blob=OuterRef('pk')).values('blob').annotate(n=Count('id')).values('n')
+    return Coalesce(Subquery(counts), 0)
+
+
+def recount(blob_ids):
+    blobs = MediaBlob.objects.all() if blob_ids is None else MediaBlob.objects.filter(pk__in=blob_ids)
+    blobs.update(ref_count=live_ref_count())
+
+
+def sync_references(instances):
+    """Point the references of saved evidence rows at the blobs their media URLs name.
+
+    bulk_create callers must call this themselves; signals cover single saves.
+    """
+    affected = set()
+    by_kind = {}
+    for obj in instances:
+        by_kind.setdefault(obj.index_kind, []).append(obj)
+    for kind, rows in by_kind.items():
+        wanted = {(obj.pk, h) for obj in rows for h in map(blob_hash, obj.media_urls()) if h}
+        existing_blobs = set(MediaBlob.objects.filter(pk__in={h for _, h in wanted}).values_list('pk', flat=True))
+        wanted = {(pk, h) for pk, h in wanted if h in existing_blobs}
+        current = set(
+            MediaReference.objects.filter(kind=kind, evidence_id__in=[obj.pk for obj in rows])
+            .values_list('evidence_id', 'blob_id')
+        )
+        for pk, h in current - wanted:
+            MediaReference.objects.filter(kind=kind, evidence_id=pk, blob_id=h).delete()
+        MediaReference.objects.bulk_create(
+            [MediaReference(kind=kind, evidence_id=pk, blob_id=h) for pk, h in wanted - current],
+            ignore_conflicts=True,
+        )
+        affected |= {h for _, h in current ^ wanted}
+    if affected:
+        recount(affected)
+
+
+def release_references(instance):
+    references = MediaReference.objects.filter(kind=instance.index_kind, evidence_id=instance.pk)
+    blob_ids = list(references.values_list('blob_id', flat=True))
+    if blob_ids:
+        references.delete()
+        recount(blob_ids)
@@ -0,0 +1,172 @@
+import mimetypes
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import reverse
+
+from .blobs import BLOB_DIR, blob_hash
+
+# Longest edge in pixels of each derived asset.
+VARIANTS = {'thumb': 256, 'preview': 1024, 'poster': 1024}
+IMAGE_VARIANTS = ('thumb', 'preview')
+VIDEO_VARIANTS = ('thumb', 'poster')
+
+_executor = None
+_pending = {}
+# (name, variant) -> monotonic time of the last failed attempt.
+_failed = {}
+_lock = threading.Lock()
+
+
+def ffmpeg():
+    return getattr(settings, 'FFMPEG_BINARY', None)
+
+
+def retry_after():
+    return getattr(settings, 'MEDIA_DERIVATIVE_RETRY_AFTER', 300)
+
+
+def variants_for(name):
+    """Variants that can be derived from a stored blob with the tools installed here."""
+    content_type = mimetypes.guess_type(name)[0] or ''
+    if content_type.startswith('image/') and getattr(settings, 'HAS_PILLOW', False):
+        return IMAGE_VARIANTS
+    if content_type.startswith('video/') and ffmpeg():
+        return VIDEO_VARIANTS
+    return ()
+
+
+def source_name(url):
+    """Blob store name of a media URL, or None when it is not a stored blob."""
+    sha256 = blob_hash(url)
+    if not sha256:
+        return None
+    return f'{BLOB_DIR}/{sha256[:2]}/{url.rsplit("/", 1)[-1]}'
+
+
+def derived_name(name, variant):
+    # Stored next to the original: <sha256>.<ext> -> <sha256>.<variant>.jpg
+    base = name.rsplit('/', 1)
+    return f'{base[0]}/{base[1].split(".")[0]}.{variant}.jpg'
+
+
+def _path(name):
+    return Path(settings.MEDIA_ROOT) / name
+
+
+def render(name, variant):
+    source, target = _path(name), _path(derived_name(name, variant))
+    size = VARIANTS[variant]
+    tmp = target.with_name(f'.{target.name}.{threading.get_ident()}.tmp')
+    try:
+        if variant in IMAGE_VARIANTS and (mimetypes.guess_type(name)[0] or '').startswith('image/'):
+            from PIL import Image, ImageOps
+
+            with Image.open(source) as image:
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((size, size))
+                image.convert('RGB').save(tmp, 'JPEG', quality=82, optimize=True)
+        else:
+            subprocess.run(
+                [
+                    ffmpeg(), '-v', 'error', '-y', '-ss', '1', '-i', str(source), '-frames:v', '1',
+                    '-vf', f"scale='min({size},iw)':'min({size},ih)':force_original_aspect_ratio=decrease",
+                    '-f', 'image2', str(tmp),
+                ],
+                check=True, timeout=getattr(settings, 'MEDIA_DERIVATIVE_TIMEOUT', 60), capture_output=True,
+            )
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return target
+
+
+def _run(name, variant):
+    try:
+        return render(name, variant)
+    except Exception:
+        # Unreadable media, or a passing problem such as a full disk: hold off
+        # retrying for a while rather than on every request, but not for good.
+        with _lock:
+            _failed[(name, variant)] = time.monotonic()
+        raise
+    finally:
+        with _lock:
+            _pending.pop((name, variant), None)
+
+
+def _recently_failed(key):
+    failed_at = _failed.get(key)
+    if failed_at is None:
+        return False
+    if time.monotonic() - failed_at < retry_after():
+        return True
+    del _failed[key]
+    return False
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'MEDIA_DERIVATIVE_WORKERS', 2),
+                thread_name_prefix='media-derivatives',
+            )
+        return _executor
+
+
+def schedule(name, variant):
+    """Queue a derivation on the background workers; returns its future, or None if done or recently failed."""
+    if _path(derived_name(name, variant)).exists():
+        return None
+    executor = _get_executor()
+    with _lock:
+        if _recently_failed((name, variant)):
+            return None
+        future = _pending.get((name, variant))
+        if future is None:
+            future = _pending[(name, variant)] = executor.submit(_run, name, variant)
+        return future
+
+
+def derive_all(name):
+    """Queue every asset the tools installed here can derive from a newly stored blob."""
+    for variant in variants_for(name):
+        schedule(name, variant)
+
+
+def ensure(name, variant, wait):
+    """Path of a derived asset, deriving it on first use and waiting up to ``wait`` seconds."""
+    target = _path(derived_name(name, variant))
+    if target.exists():
+        return target
+    future = schedule(name, variant)
+    if future is None:
+        return None
+    future.result(timeout=wait)
+    return target
+
+
+def previews(url, request=None):
+    """URLs of the derived assets of one media URL.
+
+    URLs outside the blob store, or media no installed tool can read, have no
+    previews and ``None`` is returned.
+    """
+    name = source_name(url) if isinstance(url, str) else None
+    variants = variants_for(name) if name else ()
+    if not variants:
+        return None
+    sha256 = blob_hash(url)
+    result = {}
+    for variant in variants:
+        # The endpoint redirects to the file, deriving it first if the workers are behind.
+        path = reverse('media-derivative', args=[sha256, variant])
+        result[variant] = request.build_absolute_uri(path) if request is not None else path
+    return result
@@ -0,0 +1,34 @@
+from core.broadcast import publish_on_commit
+from investigation.models import case_channel
+from .models import EvidenceIndex
+
+INDEXED_FIELDS = ['case', 'title', 'recorded_at', 'recorded_by']
+
+
+def index_row(instance):
+    return EvidenceIndex(
+        case_id=instance.case_id,
+        kind=instance.index_kind,
+        evidence_id=instance.pk,
+        title=instance.title,
+        recorded_at=instance.recorded_at,
+        recorded_by_id=instance.recorded_by_id,
+    )
+
+
+def index_evidence(instances, batch_size=None):
+    """Upsert index rows for saved evidence; bulk_create callers must call this themselves."""
+    EvidenceIndex.objects.bulk_create(
+        [index_row(instance) for instance in instances],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['kind', 'evidence_id'],
+        update_fields=INDEXED_FIELDS,
+    )
+    # Open boards of these cases pick the new cards up live.
+    publish_on_commit(*{case_channel(instance.case_id) for instance in instances})
+
+
+def unindex_evidence(instance):
+    EvidenceIndex.objects.filter(kind=instance.index_kind, evidence_id=instance.pk).delete()
+
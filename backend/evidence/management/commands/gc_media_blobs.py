@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+from evidence.blobs import delete_blob, live_ref_count, recount
+from evidence.models import MediaBlob, MediaUpload
+from evidence.uploads import discard_upload
+
+
+class Command(BaseCommand):
+    help = 'Delete stored media blobs no evidence refers to, and abandoned chunked uploads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Keep blobs uploaded, and uploads started, more recently than this.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted or recounted without writing anything.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        dry_run = options['dry_run']
+
+        # Counts are maintained on every evidence write; recounting first also
+        # repairs any drift from writes that bypassed the signals. A dry run
+        # reads the live counts instead of saving them.
+        if dry_run:
+            blobs = MediaBlob.objects.annotate(live_refs=live_ref_count())
+            drifted = blobs.exclude(ref_count=F('live_refs')).count()
+            orphans = blobs.filter(live_refs=0, last_uploaded_at__lt=cutoff)
+        else:
+            recount(None)
+            orphans = MediaBlob.objects.filter(ref_count=0, last_uploaded_at__lt=cutoff)
+        freed = 0
+        blob_count = 0
+        for blob in orphans.iterator():
+            blob_count += 1
+            freed += blob.size
+            if not dry_run:
+                delete_blob(blob)
+
+        stale = MediaUpload.objects.filter(status=MediaUpload.Status.UPLOADING, created_at__lt=cutoff)
+        upload_count = 0
+        for upload in stale.iterator():
+            upload_count += 1
+            if not dry_run:
+                discard_upload(upload)
+                upload.delete()
+
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(f'{verb} {blob_count} blobs ({freed} bytes) and {upload_count} abandoned uploads.')
+        if dry_run:
+            self.stdout.write(f'Would correct the reference count of {drifted} blobs.')
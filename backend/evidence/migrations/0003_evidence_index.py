@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of the evidence models' index_kind values.
+EVIDENCE_KINDS = [
+    ('WitnessEvidence', 'witness'),
+    ('BiologicalEvidence', 'biological'),
+    ('VehicleEvidence', 'vehicle'),
+    ('IdentificationEvidence', 'identification'),
+    ('OtherEvidence', 'other'),
+]
+
+
+def backfill_evidence_index(apps, schema_editor):
+    EvidenceIndex = apps.get_model('evidence', 'EvidenceIndex')
+    for model_name, kind in EVIDENCE_KINDS:
+        model = apps.get_model('evidence', model_name)
+        rows = model.objects.values_list('id', 'case_id', 'title', 'recorded_at', 'recorded_by_id')
+        EvidenceIndex.objects.bulk_create([
+            EvidenceIndex(
+                case_id=case_id, kind=kind, evidence_id=pk, title=title,
+                recorded_at=recorded_at, recorded_by_id=recorded_by_id,
+            )
+            for pk, case_id, title, recorded_at, recorded_by_id in rows.iterator(chunk_size=2000)
+        ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0006_case_report_version'),
+        ('evidence', '0002_witnessevidence_media_items'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvidenceIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('witness', 'Witness'), ('biological', 'Biological'), ('vehicle', 'Vehicle'), ('identification', 'Identification'), ('other', 'Other')], max_length=20)),
+                ('evidence_id', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('recorded_at', models.DateTimeField()),
+                ('case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evidence_index', to='cases.case')),
+                ('recorded_by', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['case', 'recorded_at', 'id'], name='evidence_index_case_idx'), models.Index(fields=['recorded_at', 'id'], name='evidence_index_recorded_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'evidence_id'), name='evidence_index_kind_item_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_evidence_index, migrations.RunPython.noop),
+    ]
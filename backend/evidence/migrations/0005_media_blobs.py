@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence', '0004_media_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('content_type', models.CharField(blank=True, max_length=120)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_uploaded_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'last_uploaded_at'], name='media_blob_gc_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploads', to='evidence.mediablob'),
+        ),
+        migrations.CreateModel(
+            name='MediaReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('witness', 'Witness'), ('biological', 'Biological'), ('vehicle', 'Vehicle'), ('identification', 'Identification'), ('other', 'Other')], max_length=20)),
+                ('evidence_id', models.PositiveIntegerField()),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='references', to='evidence.mediablob')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'evidence_id'], name='media_reference_evidence_idx')],
+                'constraints': [models.UniqueConstraint(fields=('blob', 'kind', 'evidence_id'), name='media_reference_uniq')],
+            },
+        ),
+    ]
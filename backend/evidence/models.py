@@ -1,3 +1,5 @@
+import uuid
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
@@ -13,20 +15,37 @@ class EvidenceBase(models.Model):
     class Meta:
         abstract = True
 
+    def media_urls(self):
+        """URLs of the media files this evidence points at."""
+        return []
+
 
 class WitnessEvidence(EvidenceBase):
+    index_kind = 'witness'
+
     transcript = models.TextField(blank=True)
     media_url = models.URLField(blank=True)
     media_items = models.JSONField(default=list, blank=True)
 
+    def media_urls(self):
+        urls = [item.get('url') for item in self.media_items or [] if isinstance(item, dict)]
+        return [url for url in urls + [self.media_url] if url]
+
 
 class BiologicalEvidence(EvidenceBase):
+    index_kind = 'biological'
+
     image_urls = models.JSONField(default=list, blank=True)
     forensic_result = models.TextField(blank=True)
     identity_db_result = models.TextField(blank=True)
 
+    def media_urls(self):
+        return [url for url in self.image_urls or [] if isinstance(url, str) and url]
+
 
 class VehicleEvidence(EvidenceBase):
+    index_kind = 'vehicle'
+
     model_name = models.CharField(max_length=120)
     color = models.CharField(max_length=60)
     plate_number = models.CharField(max_length=30, blank=True)
@@ -38,9 +57,109 @@ class VehicleEvidence(EvidenceBase):
 
 
 class IdentificationEvidence(EvidenceBase):
+    index_kind = 'identification'
+
     owner_full_name = models.CharField(max_length=120)
     metadata = models.JSONField(default=dict, blank=True)
 
 
 class OtherEvidence(EvidenceBase):
-    pass
+    index_kind = 'other'
+
+
+class EvidenceIndex(models.Model):
+    """One row per evidence item of any kind, kept in step with the evidence tables."""
+
+    class Kind(models.TextChoices):
+        WITNESS = 'witness', 'Witness'
+        BIOLOGICAL = 'biological', 'Biological'
+        VEHICLE = 'vehicle', 'Vehicle'
+        IDENTIFICATION = 'identification', 'Identification'
+        OTHER = 'other', 'Other'
+
+    case = models.ForeignKey('cases.Case', on_delete=models.CASCADE, related_name='evidence_index')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    evidence_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    recorded_at = models.DateTimeField()
+    recorded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'evidence_id'], name='evidence_index_kind_item_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['case', 'recorded_at', 'id'], name='evidence_index_case_idx'),
+            models.Index(fields=['recorded_at', 'id'], name='evidence_index_recorded_idx'),
+        ]
+
+
+class MediaBlob(models.Model):
+    """One stored media file, named by the sha256 of its content and shared by every upload of it."""
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=120, blank=True)
+    # Evidence rows whose media URLs point here; kept in step with MediaReference.
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Uploading a blob again protects it from garbage collection for a grace period.
+    last_uploaded_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'last_uploaded_at'], name='media_blob_gc_idx'),
+        ]
+
+
+class MediaReference(models.Model):
+    blob = models.ForeignKey(MediaBlob, on_delete=models.CASCADE, related_name='references')
+    kind = models.CharField(max_length=20, choices=EvidenceIndex.Kind.choices)
+    evidence_id = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['blob', 'kind', 'evidence_id'], name='media_reference_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'evidence_id'], name='media_reference_evidence_idx'),
+        ]
+
+
+class MediaUpload(models.Model):
+    """A file sent in fixed-size chunks, written under MEDIA_ROOT as they arrive."""
+
+    class Status(models.TextChoices):
+        UPLOADING = 'uploading', 'Uploading'
+        COMPLETE = 'complete', 'Complete'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='media_uploads')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=120, blank=True)
+    total_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    # Checksum of the whole file, checked on completion when the client sends one.
+    sha256 = models.CharField(max_length=64, blank=True)
+    # Chunk index (as a string) -> sha256 of every chunk received so far.
+    chunks = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.UPLOADING)
+    blob = models.ForeignKey(MediaBlob, on_delete=models.SET_NULL, null=True, blank=True, related_name='uploads')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def chunk_length(self, index):
+        return min(self.chunk_size, self.total_size - index * self.chunk_size)
+
+    @property
+    def storage_name(self):
+        # Where the chunks are assembled; the finished file moves into the blob store.
+        return f'evidence-uploads/{self.id}/{self.filename}'
+
+
+EVIDENCE_MODELS = [WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence]
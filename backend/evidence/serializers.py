@@ -1,5 +1,25 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils.text import get_valid_filename
 from rest_framework import serializers
-from .models import WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence
+
+from core.sparse import SparseFieldsMixin
+from .models import (
+    WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence, EvidenceIndex, MediaUpload,
+)
+from .blobs import unknown_blob_urls
+from .derivatives import previews
+from .uploads import media_type, public_url
+
+
+def check_stored_media(field, urls):
+    """Links into the evidence blob store must name a stored blob; other URLs pass through."""
+    unknown = unknown_blob_urls(urls)
+    if unknown:
+        raise serializers.ValidationError({field: f'Unknown stored media: {", ".join(unknown)}'})
 
 
 class EvidenceBaseValidationMixin:
@@ -13,12 +33,20 @@ class EvidenceBaseValidationMixin:
         return attrs
 
 
-class WitnessEvidenceSerializer(EvidenceBaseValidationMixin, serializers.ModelSerializer):
+class WitnessEvidenceSerializer(SparseFieldsMixin, EvidenceBaseValidationMixin, serializers.ModelSerializer):
+    media_previews = serializers.SerializerMethodField()
+    field_dependencies = {'media_previews': ['media_items']}
+
     class Meta:
         model = WitnessEvidence
         fields = '__all__'
         read_only_fields = ('recorded_by', 'recorded_at')
 
+    def get_media_previews(self, obj):
+        """Derived thumbnails per entry of ``media_items``; None where the media has none."""
+        request = self.context.get('request')
+        return [previews(item.get('url'), request) if isinstance(item, dict) else None for item in obj.media_items or []]
+
     def validate(self, attrs):
         attrs = super().validate(attrs)
         transcript = (attrs.get('transcript') or '').strip()
@@ -38,20 +66,31 @@ class WitnessEvidenceSerializer(EvidenceBaseValidationMixin, serializers.ModelSe
                 raise serializers.ValidationError({'media_items': 'type must be one of image/video/audio.'})
             if not item.get('url'):
                 raise serializers.ValidationError({'media_items': 'Each media item must have a url.'})
+        check_stored_media('media_items', [item['url'] for item in media_items or []])
+        check_stored_media('media_url', [media_url])
         return attrs
 
 
-class BiologicalEvidenceSerializer(EvidenceBaseValidationMixin, serializers.ModelSerializer):
+class BiologicalEvidenceSerializer(SparseFieldsMixin, EvidenceBaseValidationMixin, serializers.ModelSerializer):
+    image_previews = serializers.SerializerMethodField()
+    field_dependencies = {'image_previews': ['image_urls']}
+
     class Meta:
         model = BiologicalEvidence
         fields = '__all__'
         read_only_fields = ('recorded_by', 'recorded_at')
 
+    def get_image_previews(self, obj):
+        """Derived thumbnails per entry of ``image_urls``; None where the image has none."""
+        request = self.context.get('request')
+        return [previews(url, request) for url in obj.image_urls or []]
+
     def validate(self, attrs):
         attrs = super().validate(attrs)
         image_urls = attrs.get('image_urls', [])
         if not isinstance(image_urls, list) or len(image_urls) == 0:
             raise serializers.ValidationError({'image_urls': 'At least one image is required for biological evidence.'})
+        check_stored_media('image_urls', image_urls)
 
         # Results must stay empty at creation and can only be filled via dedicated forensic endpoint.
         allow_results_update = self.context.get('allow_results_update', False)
@@ -66,7 +105,7 @@ class BiologicalEvidenceSerializer(EvidenceBaseValidationMixin, serializers.Mode
         return attrs
 
 
-class VehicleEvidenceSerializer(EvidenceBaseValidationMixin, serializers.ModelSerializer):
+class VehicleEvidenceSerializer(SparseFieldsMixin, EvidenceBaseValidationMixin, serializers.ModelSerializer):
     class Meta:
         model = VehicleEvidence
         fields = '__all__'
@@ -81,7 +120,7 @@ class VehicleEvidenceSerializer(EvidenceBaseValidationMixin, serializers.ModelSe
         return attrs
 
 
-class IdentificationEvidenceSerializer(EvidenceBaseValidationMixin, serializers.ModelSerializer):
+class IdentificationEvidenceSerializer(SparseFieldsMixin, EvidenceBaseValidationMixin, serializers.ModelSerializer):
     class Meta:
         model = IdentificationEvidence
         fields = '__all__'
@@ -97,8 +136,77 @@ class IdentificationEvidenceSerializer(EvidenceBaseValidationMixin, serializers.
         return attrs
 
 
-class OtherEvidenceSerializer(EvidenceBaseValidationMixin, serializers.ModelSerializer):
+class OtherEvidenceSerializer(SparseFieldsMixin, EvidenceBaseValidationMixin, serializers.ModelSerializer):
     class Meta:
         model = OtherEvidence
         fields = '__all__'
         read_only_fields = ('recorded_by', 'recorded_at')
+
+
+class EvidenceIndexSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = EvidenceIndex
+        fields = ('id', 'case', 'kind', 'evidence_id', 'title', 'recorded_at', 'recorded_by')
+
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(required=False, min_value=1)
+    total_chunks = serializers.IntegerField(read_only=True)
+    received_chunks = serializers.SerializerMethodField()
+    media_item = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MediaUpload
+        fields = (
+            'id', 'filename', 'content_type', 'total_size', 'chunk_size', 'sha256', 'status',
+            'total_chunks', 'received_chunks', 'media_item', 'created_at', 'completed_at',
+        )
+        read_only_fields = ('status', 'created_at', 'completed_at')
+
+    def get_received_chunks(self, obj):
+        return sorted(int(index) for index in obj.chunks)
+
+    def get_media_item(self, obj):
+        """Ready to append to ``media_items``; its url also fits ``image_urls`` and ``media_url``."""
+        if obj.status != MediaUpload.Status.COMPLETE or obj.blob is None:
+            return None
+        return {'type': media_type(obj.content_type), 'url': public_url(self.context['request'], obj.blob.name)}
+
+    def validate_filename(self, value):
+        try:
+            return get_valid_filename(os.path.basename(value))
+        except SuspiciousFileOperation:
+            raise serializers.ValidationError('A file name is required.')
+
+    def validate_total_size(self, value):
+        limit = getattr(settings, 'MEDIA_UPLOAD_MAX_SIZE', 20 * 1024 ** 3)
+        if not 0 < value <= limit:
+            raise serializers.ValidationError(f'Must be between 1 and {limit} bytes.')
+        return value
+
+    def validate_chunk_size(self, value):
+        limit = getattr(settings, 'MEDIA_UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 ** 2)
+        if value > limit:
+            raise serializers.ValidationError(f'At most {limit} bytes.')
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value)):
+            raise serializers.ValidationError('Must be a hex sha256 digest.')
+        return value
+
+    def validate(self, attrs):
+        # The completed upload must yield a media item that evidence accepts,
+        # so a missing or generic type falls back to the file extension.
+        content_type = attrs.get('content_type', '')
+        if media_type(content_type) is None:
+            content_type = mimetypes.guess_type(attrs.get('filename', ''))[0] or ''
+        if media_type(content_type) is None:
+            raise serializers.ValidationError({'content_type': 'Only image, video and audio files can be uploaded.'})
+        attrs['content_type'] = content_type
+        return attrs
+
+    def create(self, validated_data):
+        validated_data.setdefault('chunk_size', getattr(settings, 'MEDIA_UPLOAD_CHUNK_SIZE', 8 * 1024 ** 2))
+        return super().create(validated_data)
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+
+from .blobs import release_references, sync_references
+from .index import index_evidence, unindex_evidence
+from .models import EVIDENCE_MODELS
+
+
+def index_saved(sender, instance, **kwargs):
+    index_evidence([instance])
+    sync_references([instance])
+
+
+def unindex_deleted(sender, instance, **kwargs):
+    unindex_evidence(instance)
+    release_references(instance)
+
+
+for model in EVIDENCE_MODELS:
+    post_save.connect(index_saved, sender=model, dispatch_uid=f'evidence_index_save_{model.__name__}')
+    post_delete.connect(unindex_deleted, sender=model, dispatch_uid=f'evidence_index_delete_{model.__name__}')
@@ -1,7 +1,24 @@
+import hashlib
+import importlib.util
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from django.test import override_settings
+from unittest import skipUnless
 from rest_framework.test import APITestCase
 
 from cases.models import Case
+from evidence import derivatives
+from evidence.derivatives import VARIANTS, derived_name
+from evidence.models import BiologicalEvidence, EvidenceIndex, MediaBlob, MediaUpload, OtherEvidence, VehicleEvidence
+from investigation.models import Notification
 from rbac.models import Role, RolePermission, UserRole
 
 User = get_user_model()
@@ -128,3 +145,332 @@ class EvidenceFlowTests(APITestCase):
             'forensic_result': 'should not be here',
         }, format='json')
         self.assertEqual(resp.status_code, 400)
+
+    def test_index_follows_evidence_writes(self):
+        other = OtherEvidence.objects.create(case=self.case, title='Knife', description='d', recorded_by=self.user)
+        vehicle = VehicleEvidence.objects.create(
+            case=self.case, title='Car', description='d', recorded_by=self.user, model_name='m', color='c',
+            plate_number='P1',
+        )
+        self.assertEqual(
+            sorted(EvidenceIndex.objects.values_list('kind', 'evidence_id', 'title')),
+            [('other', other.id, 'Knife'), ('vehicle', vehicle.id, 'Car')],
+        )
+
+        other.title = 'Bloody knife'
+        other.save()
+        vehicle.delete()
+        self.assertEqual(list(EvidenceIndex.objects.values_list('kind', 'title')), [('other', 'Bloody knife')])
+
+    def test_all_evidence_is_listed_with_cursor_pagination(self):
+        for i in range(12):
+            OtherEvidence.objects.create(case=self.case, title=f'O{i}', description='d', recorded_by=self.user)
+            VehicleEvidence.objects.create(
+                case=self.case, title=f'V{i}', description='d', recorded_by=self.user, model_name='m', color='c',
+                plate_number=f'P{i}',
+            )
+        other_case = Case.objects.create(title='Other', description='d', source=Case.Source.SCENE, created_by=self.user)
+        OtherEvidence.objects.create(case=other_case, title='Elsewhere', description='d', recorded_by=self.user)
+
+        ids, url = [], f'/api/evidence/all/?case_id={self.case.id}'
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            ids += [row['id'] for row in resp.data['results']]
+            url = resp.data['next']
+        expected = EvidenceIndex.objects.filter(case=self.case).order_by('-recorded_at', '-id')
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+        self.assertEqual(len(ids), 24)
+
+        resp = self.client.get(f'/api/evidence/all/?case_id={self.case.id}&kind=vehicle')
+        self.assertEqual({row['kind'] for row in resp.data['results']}, {'vehicle'})
+
+    def test_bulk_ingestion_saves_mixed_kinds_with_one_notification(self):
+        detective = User.objects.create_user(
+            username='bulk_detective', password='Strong12345', email='bulk_detective@example.com',
+            phone='09134444444', national_id='3444',
+        )
+        self.case.assigned_detective = detective
+        self.case.save(update_fields=['assigned_detective'])
+        version = Case.objects.get(pk=self.case.pk).report_version
+        items = [
+            {'kind': 'other', 'case': self.case.id, 'title': f'Item {i}', 'description': 'd'} for i in range(5)
+        ] + [
+            {'kind': 'vehicle', 'case': self.case.id, 'title': 'Car', 'description': 'd', 'model_name': 'Sedan',
+             'color': 'Black', 'plate_number': '12A34567'},
+        ]
+        resp = self.client.post('/api/evidence/bulk/', {'items': items}, format='json')
+        self.assertEqual(resp.status_code, 201, resp.data)
+        self.assertEqual([row['title'] for row in resp.data['items']], [item['title'] for item in items])
+        self.assertEqual(resp.data['items'][-1]['kind'], 'vehicle')
+        self.assertEqual(EvidenceIndex.objects.filter(case=self.case).count(), 6)
+        self.assertEqual(Notification.objects.filter(recipient=detective, case=self.case).count(), 1)
+        self.assertGreater(Case.objects.get(pk=self.case.pk).report_version, version)
+
+    def test_bulk_ingestion_is_all_or_nothing(self):
+        resp = self.client.post('/api/evidence/bulk/', {'items': [
+            {'kind': 'other', 'case': self.case.id, 'title': 'Fine', 'description': 'd'},
+            {'kind': 'vehicle', 'case': self.case.id, 'title': 'Car', 'description': 'd', 'model_name': 'm',
+             'color': 'c'},
+            {'kind': 'spaceship', 'case': self.case.id},
+        ]}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data['items'][0], {})
+        self.assertTrue(resp.data['items'][1])
+        self.assertIn('kind', resp.data['items'][2])
+        self.assertFalse(OtherEvidence.objects.exists())
+
+
+class MediaUploadTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(
+            username='uploader', password='Strong12345', email='uploader@example.com',
+            phone='09135555555', national_id='3555',
+        )
+        role = Role.objects.create(name='evidence officer')
+        RolePermission.objects.create(role=role, action='evidence.manage')
+        UserRole.objects.create(user=self.user, role=role)
+        self.client.force_authenticate(self.user)
+        self.data = b'bodycam footage ' * 5
+
+    def start(self, **extra):
+        resp = self.client.post('/api/evidence/uploads/', {
+            'filename': '../cam 1.mp4', 'content_type': 'video/mp4', 'total_size': len(self.data), 'chunk_size': 16,
+            **extra,
+        }, format='json')
+        self.assertEqual(resp.status_code, 201, resp.data)
+        return resp.data
+
+    def put_chunk(self, upload_id, index, body, checksum=None):
+        return self.client.put(
+            f'/api/evidence/uploads/{upload_id}/chunks/{index}/', body, content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(body).hexdigest(),
+        )
+
+    def test_chunks_resume_out_of_order_and_assemble(self):
+        upload = self.start(sha256=hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(upload['total_chunks'], 5)
+        chunks = [self.data[i:i + 16] for i in range(0, len(self.data), 16)]
+
+        for index in (4, 0, 2):
+            self.assertEqual(self.put_chunk(upload['id'], index, chunks[index]).status_code, 200)
+        resp = self.client.post(f'/api/evidence/uploads/{upload["id"]}/complete/')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data['missing_chunks'], [1, 3])
+
+        resp = self.client.get(f'/api/evidence/uploads/{upload["id"]}/')
+        self.assertEqual(resp.data['received_chunks'], [0, 2, 4])
+        for index in (1, 3):
+            self.put_chunk(upload['id'], index, chunks[index])
+        resp = self.client.post(f'/api/evidence/uploads/{upload["id"]}/complete/')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data['media_item']['type'], 'video')
+        sha256 = hashlib.sha256(self.data).hexdigest()
+        self.assertTrue(resp.data['media_item']['url'].endswith(f'/media/evidence-blobs/{sha256[:2]}/{sha256}.mp4'))
+        with open(f'{self.media_root}/evidence-blobs/{sha256[:2]}/{sha256}.mp4', 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_bad_chunks_are_rejected(self):
+        upload = self.start()
+        self.assertEqual(self.put_chunk(upload['id'], 0, b'x' * 16, checksum='0' * 64).status_code, 400)
+        self.assertEqual(self.put_chunk(upload['id'], 0, b'x' * 15).status_code, 400)
+        self.assertEqual(self.put_chunk(upload['id'], 9, b'x' * 16).status_code, 400)
+        self.assertEqual(self.put_chunk(upload['id'], 0, b'x' * 16).status_code, 200)
+        self.assertEqual(self.put_chunk(upload['id'], 0, b'y' * 16).status_code, 409)
+        self.assertEqual(MediaUpload.objects.get(pk=upload['id']).chunks.keys(), {'0'})
+
+    def test_content_type_falls_back_to_the_file_name(self):
+        for content_type in ('', 'application/octet-stream'):
+            upload = self.start(content_type=content_type)
+            self.assertEqual(upload['content_type'], 'video/mp4')
+        for index in range(5):
+            self.put_chunk(upload['id'], index, self.data[index * 16:(index + 1) * 16])
+        resp = self.client.post(f'/api/evidence/uploads/{upload["id"]}/complete/')
+        self.assertEqual(resp.data['media_item']['type'], 'video')
+
+        resp = self.client.post('/api/evidence/uploads/', {
+            'filename': 'notes.txt', 'content_type': '', 'total_size': len(self.data),
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('content_type', resp.data)
+
+    def test_uploads_are_private_to_their_owner(self):
+        upload = self.start()
+        other = User.objects.create_user(
+            username='other_uploader', password='Strong12345', email='other_uploader@example.com',
+            phone='09136666666', national_id='3666',
+        )
+        UserRole.objects.create(user=other, role=Role.objects.get(name='evidence officer'))
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/api/evidence/uploads/{upload["id"]}/').status_code, 404)
+
+    def upload(self, data, filename='photo.jpg'):
+        upload = self.client.post('/api/evidence/uploads/', {
+            'filename': filename, 'content_type': 'image/jpeg', 'total_size': len(data),
+        }, format='json').data
+        self.put_chunk(upload['id'], 0, data)
+        return self.client.post(f'/api/evidence/uploads/{upload["id"]}/complete/').data['media_item']['url']
+
+    def test_duplicate_uploads_share_one_counted_blob(self):
+        url = self.upload(b'same photo')
+        self.assertEqual(self.upload(b'same photo', filename='copy.png'), url)
+        self.assertEqual(MediaBlob.objects.count(), 1)
+        self.assertEqual(len(list(Path(self.media_root, 'evidence-blobs').rglob('*.*'))), 1)
+
+        case = Case.objects.create(title='Blob', description='d', source=Case.Source.SCENE, created_by=self.user)
+        rows = [
+            self.client.post('/api/evidence/biological/', {
+                'case': case.id, 'title': f'Photo {i}', 'description': 'd', 'image_urls': [url, 'https://cdn.example.com/x.jpg'],
+            }, format='json')
+            for i in range(2)
+        ]
+        self.assertEqual([resp.status_code for resp in rows], [201, 201])
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+
+        BiologicalEvidence.objects.get(pk=rows[0].data['id']).delete()
+        second = BiologicalEvidence.objects.get(pk=rows[1].data['id'])
+        second.image_urls = ['https://cdn.example.com/x.jpg']
+        second.save()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+
+    def test_unknown_blob_urls_are_rejected(self):
+        case = Case.objects.create(title='Blob', description='d', source=Case.Source.SCENE, created_by=self.user)
+        resp = self.client.post('/api/evidence/witness/', {
+            'case': case.id, 'title': 'W', 'description': 'd',
+            'media_items': [{'type': 'image', 'url': f'http://testserver/media/evidence-blobs/aa/{"a" * 64}.jpg'}],
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('media_items', resp.data)
+
+    def test_gc_removes_orphans_after_grace_period(self):
+        kept_url = self.upload(b'kept')
+        self.upload(b'orphan')
+        case = Case.objects.create(title='Blob', description='d', source=Case.Source.SCENE, created_by=self.user)
+        BiologicalEvidence.objects.create(
+            case=case, title='Kept', description='d', recorded_by=self.user, image_urls=[kept_url],
+        )
+        abandoned = self.start()
+
+        call_command('gc_media_blobs', stdout=StringIO())
+        self.assertEqual(MediaBlob.objects.count(), 2)
+
+        MediaBlob.objects.update(last_uploaded_at=timezone.now() - timedelta(days=2))
+        MediaUpload.objects.filter(pk=abandoned['id']).update(created_at=timezone.now() - timedelta(days=2))
+        out = StringIO()
+        call_command('gc_media_blobs', stdout=out)
+        self.assertIn('Deleted 1 blobs', out.getvalue())
+        self.assertEqual(MediaBlob.objects.get().sha256, hashlib.sha256(b'kept').hexdigest())
+        self.assertFalse(MediaUpload.objects.filter(pk=abandoned['id']).exists())
+        self.assertEqual(len(list(Path(self.media_root).rglob('*.*'))), 1)
+
+    def test_gc_dry_run_writes_nothing(self):
+        kept_url = self.upload(b'kept')
+        self.upload(b'orphan')
+        case = Case.objects.create(title='Blob', description='d', source=Case.Source.SCENE, created_by=self.user)
+        BiologicalEvidence.objects.create(
+            case=case, title='Kept', description='d', recorded_by=self.user, image_urls=[kept_url],
+        )
+        MediaBlob.objects.update(ref_count=5, last_uploaded_at=timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        call_command('gc_media_blobs', '--dry-run', stdout=out)
+        self.assertIn('Would delete 1 blobs', out.getvalue())
+        self.assertIn('Would correct the reference count of 2 blobs', out.getvalue())
+        self.assertEqual(list(MediaBlob.objects.values_list('ref_count', flat=True)), [5, 5])
+
+    def test_gc_removes_derived_assets_with_their_blob(self):
+        self.upload(b'derived')
+        blob = MediaBlob.objects.get()
+        for variant in VARIANTS:
+            Path(self.media_root, derived_name(blob.name, variant)).write_bytes(b'jpeg')
+        MediaBlob.objects.update(last_uploaded_at=timezone.now() - timedelta(days=2))
+
+        call_command('gc_media_blobs', stdout=StringIO())
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertEqual(list(Path(self.media_root, blob.name).parent.iterdir()), [])
+
+    @override_settings(FFMPEG_BINARY='/usr/bin/false', MEDIA_DERIVATIVE_RETRY_AFTER=60)
+    def test_derivation_starts_on_upload_and_failures_expire(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            url = self.upload(b'broken video', filename='clip.mp4')
+        name = derivatives.source_name(url)
+        with derivatives._lock:
+            future = derivatives._pending.get((name, 'thumb'))
+        if future is not None:
+            future.exception(timeout=10)
+        self.assertIn((name, 'thumb'), derivatives._failed)
+
+        # A failure is not retried straight away, nor is previewing it an error loop.
+        self.assertIsNone(derivatives.schedule(name, 'thumb'))
+        sha256 = hashlib.sha256(b'broken video').hexdigest()
+        self.assertEqual(self.client.get(f'/api/evidence/media/{sha256}/thumb/').status_code, 404)
+        with override_settings(MEDIA_DERIVATIVE_RETRY_AFTER=0):
+            retry = derivatives.schedule(name, 'thumb')
+        self.assertIsNotNone(retry)
+        retry.exception(timeout=10)
+
+    @override_settings(FFMPEG_BINARY='/usr/bin/false')
+    def test_serializing_evidence_does_not_start_derivation(self):
+        with override_settings(FFMPEG_BINARY=None), self.captureOnCommitCallbacks(execute=True):
+            url = self.upload(b'quiet video', filename='clip.mp4')
+        case = Case.objects.create(title='Blob', description='d', source=Case.Source.SCENE, created_by=self.user)
+        resp = self.client.post('/api/evidence/witness/', {
+            'case': case.id, 'title': 'W', 'description': 'd', 'media_items': [{'type': 'video', 'url': url}],
+        }, format='json')
+        self.assertIn('poster', resp.data['media_previews'][0])
+        key = (derivatives.source_name(url), 'poster')
+        self.assertNotIn(key, derivatives._pending)
+        self.assertNotIn(key, derivatives._failed)
+
+    @override_settings(FFMPEG_BINARY='/usr/bin/false')
+    def test_bulk_ingestion_returns_absolute_preview_urls(self):
+        with override_settings(FFMPEG_BINARY=None):
+            url = self.upload(b'bulk video', filename='clip.mp4')
+        case = Case.objects.create(title='Blob', description='d', source=Case.Source.SCENE, created_by=self.user)
+        item = {'case': case.id, 'title': 'W', 'description': 'd', 'media_items': [{'type': 'video', 'url': url}]}
+        single = self.client.post('/api/evidence/witness/', item, format='json')
+        resp = self.client.post('/api/evidence/bulk/', {'items': [{'kind': 'witness', **item}]}, format='json')
+        self.assertEqual(resp.status_code, 201, resp.data)
+        poster = resp.data['items'][0]['media_previews'][0]['poster']
+        self.assertTrue(poster.startswith('http://testserver/'), poster)
+        self.assertEqual(poster, single.data['media_previews'][0]['poster'])
+
+    @override_settings(HAS_PILLOW=False, FFMPEG_BINARY=None)
+    def test_media_without_derivation_tools_has_no_previews(self):
+        url = self.upload(b'not really a jpeg')
+        case = Case.objects.create(title='Blob', description='d', source=Case.Source.SCENE, created_by=self.user)
+        resp = self.client.post('/api/evidence/biological/', {
+            'case': case.id, 'title': 'Photo', 'description': 'd', 'image_urls': [url, 'https://cdn.example.com/x.jpg'],
+        }, format='json')
+        self.assertEqual(resp.data['image_previews'], [None, None])
+        sha256 = hashlib.sha256(b'not really a jpeg').hexdigest()
+        self.assertEqual(self.client.get(f'/api/evidence/media/{sha256}/thumb/').status_code, 404)
+
+    @skipUnless(importlib.util.find_spec('PIL'), 'Pillow is not installed')
+    @override_settings(HAS_PILLOW=True)
+    def test_image_thumbnails_are_derived_on_first_request(self):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (2000, 1000), 'red').save(buffer, 'JPEG')
+        url = self.upload(buffer.getvalue())
+        case = Case.objects.create(title='Blob', description='d', source=Case.Source.SCENE, created_by=self.user)
+        resp = self.client.post('/api/evidence/biological/', {
+            'case': case.id, 'title': 'Photo', 'description': 'd', 'image_urls': [url],
+        }, format='json')
+        thumb = resp.data['image_previews'][0]['thumb']
+
+        resp = self.client.get(thumb)
+        self.assertEqual(resp.status_code, 302)
+        sha256 = hashlib.sha256(buffer.getvalue()).hexdigest()
+        self.assertTrue(resp['Location'].endswith(f'/media/evidence-blobs/{sha256[:2]}/{sha256}.thumb.jpg'))
+        with Image.open(Path(self.media_root, 'evidence-blobs', sha256[:2], f'{sha256}.thumb.jpg')) as image:
+            self.assertEqual(image.size, (256, 128))
@@ -0,0 +1,93 @@
+import hashlib
+from pathlib import Path
+from urllib.parse import urljoin
+
+from django.conf import settings
+
+from .blobs import store_blob
+
+READ_BLOCK = 64 * 1024
+
+
+class ChunkError(Exception):
+    pass
+
+
+def part_path(upload):
+    return Path(settings.MEDIA_ROOT) / f'{upload.storage_name}.part'
+
+
+def start_upload(upload):
+    path = part_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+
+
+def write_chunk(upload, index, stream, expected_sha256):
+    """Copy one chunk from ``stream`` to its offset in the partial file, a block at a time.
+
+    The data is hashed on the way through; a wrong length or checksum raises
+    ChunkError and the chunk is not recorded.
+    """
+    length = upload.chunk_length(index)
+    digest = hashlib.sha256()
+    received = 0
+    with open(part_path(upload), 'r+b') as out:
+        out.seek(index * upload.chunk_size)
+        while stream is not None:
+            block = stream.read(min(READ_BLOCK, length + 1 - received))
+            if not block:
+                break
+            received += len(block)
+            if received > length:
+                raise ChunkError(f'Chunk {index} must be {length} bytes.')
+            digest.update(block)
+            out.write(block)
+    if received != length:
+        raise ChunkError(f'Chunk {index} must be {length} bytes.')
+    if digest.hexdigest() != expected_sha256:
+        raise ChunkError(f'Chunk {index} does not match its checksum.')
+    return expected_sha256
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as src:
+        for block in iter(lambda: src.read(READ_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finish_upload(upload):
+    """Check the assembled file and hand it to the blob store; returns its MediaBlob."""
+    path = part_path(upload)
+    if path.stat().st_size != upload.total_size:
+        raise ChunkError('Assembled file has the wrong size.')
+    sha256 = file_sha256(path)
+    if upload.sha256 and sha256 != upload.sha256:
+        raise ChunkError('Assembled file does not match its checksum.')
+    blob = store_blob(path, sha256, upload.filename, upload.content_type)
+    discard_upload(upload)
+    return blob
+
+
+def discard_upload(upload):
+    path = part_path(upload)
+    path.unlink(missing_ok=True)
+    try:
+        path.parent.rmdir()
+    except OSError:
+        pass
+
+
+def public_url(request, name):
+    url = urljoin(settings.MEDIA_URL, name)
+    if '://' in url:
+        return url
+    path = '/' + url.lstrip('/')
+    return request.build_absolute_uri(path) if request is not None else path
+
+
+def media_type(content_type):
+    kind = content_type.split('/')[0]
+    return kind if kind in ('image', 'video', 'audio') else None
@@ -1,3 +1,4 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import (
     WitnessEvidenceViewSet,
@@ -5,6 +6,10 @@ from .views import (
     VehicleEvidenceViewSet,
     IdentificationEvidenceViewSet,
     OtherEvidenceViewSet,
+    EvidenceIndexViewSet,
+    EvidenceBulkViewSet,
+    MediaUploadViewSet,
+    media_derivative,
 )
 
 router = DefaultRouter()
@@ -13,5 +18,10 @@ router.register('biological', BiologicalEvidenceViewSet, basename='biological-ev
 router.register('vehicle', VehicleEvidenceViewSet, basename='vehicle-evidence')
 router.register('identification', IdentificationEvidenceViewSet, basename='identification-evidence')
 router.register('other', OtherEvidenceViewSet, basename='other-evidence')
+router.register('all', EvidenceIndexViewSet, basename='evidence-index')
+router.register('bulk', EvidenceBulkViewSet, basename='evidence-bulk')
+router.register('uploads', MediaUploadViewSet, basename='media-upload')
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path('media/<str:sha256>/<str:variant>/', media_derivative, name='media-derivative'),
+]
@@ -1,19 +1,36 @@
-from rest_framework import decorators, permissions, status, viewsets
+from collections import defaultdict
+
+from concurrent.futures import TimeoutError as DerivationTimeout
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import decorators, mixins, permissions, status, viewsets
 from rest_framework.response import Response
 
+from cases.reports import bump_report_version
+from core.pagination import KeysetPagination
+from core.sparse import SparseQuerysetMixin
 from investigation.models import Notification
 from rbac.permissions import user_has_action
-from .models import WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence
+from .blobs import sync_references
+from .derivatives import derive_all, derived_name, ensure, variants_for
+from .index import index_evidence
+from .models import WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence, EvidenceIndex, MediaBlob, MediaUpload
 from .serializers import (
     WitnessEvidenceSerializer,
     BiologicalEvidenceSerializer,
     VehicleEvidenceSerializer,
     IdentificationEvidenceSerializer,
     OtherEvidenceSerializer,
+    EvidenceIndexSerializer,
+    MediaUploadSerializer,
 )
+from .uploads import ChunkError, finish_upload, public_url, start_upload, write_chunk
 
 
-class EvidencePermissionMixin:
+class EvidencePermissionMixin(SparseQuerysetMixin):
     permission_classes = [permissions.IsAuthenticated]
 
     def check_permissions(self, request):
@@ -78,3 +95,197 @@ class IdentificationEvidenceViewSet(RecordedByMixin, viewsets.ModelViewSet):
 class OtherEvidenceViewSet(RecordedByMixin, viewsets.ModelViewSet):
     queryset = OtherEvidence.objects.select_related('case', 'recorded_by').all()
     serializer_class = OtherEvidenceSerializer
+
+
+class EvidenceIndexViewSet(EvidencePermissionMixin, viewsets.ReadOnlyModelViewSet):
+    """Evidence of every kind in one list, newest first, for ``?case_id=`` and ``?kind=``."""
+
+    queryset = EvidenceIndex.objects.all()
+    serializer_class = EvidenceIndexSerializer
+    pagination_class = KeysetPagination
+    cursor_timestamp_field = 'recorded_at'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('case_id'):
+            queryset = queryset.filter(case_id=params['case_id'])
+        if params.get('kind'):
+            queryset = queryset.filter(kind=params['kind'])
+        return queryset
+
+
+EVIDENCE_SERIALIZERS = {
+    'witness': WitnessEvidenceSerializer,
+    'biological': BiologicalEvidenceSerializer,
+    'vehicle': VehicleEvidenceSerializer,
+    'identification': IdentificationEvidenceSerializer,
+    'other': OtherEvidenceSerializer,
+}
+
+
+class EvidenceBulkViewSet(EvidencePermissionMixin, viewsets.ViewSet):
+    """``POST {"items": [{"kind": "vehicle", ...}, ...]}`` records a batch of mixed-kind evidence at once.
+
+    Items are validated with the per-kind serializers and either all saved or,
+    when any is invalid, none. Each assigned detective gets one notification
+    for the whole batch.
+    """
+
+    def create(self, request):
+        items = request.data.get('items')
+        max_items = getattr(settings, 'EVIDENCE_BULK_MAX_ITEMS', 500)
+        if not isinstance(items, list) or not items:
+            return Response({'items': 'A non-empty list is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > max_items:
+            return Response({'items': f'At most {max_items} items per request.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        checked, errors = [], []
+        for item in items:
+            serializer_class = EVIDENCE_SERIALIZERS.get(item.get('kind')) if isinstance(item, dict) else None
+            if serializer_class is None:
+                checked.append(None)
+                errors.append({'kind': f'One of: {", ".join(EVIDENCE_SERIALIZERS)}.'})
+                continue
+            serializer = serializer_class(data=item, context={'request': request})
+            checked.append(serializer)
+            errors.append({} if serializer.is_valid() else serializer.errors)
+        if any(errors):
+            return Response({'items': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        by_kind = defaultdict(list)
+        for position, serializer in enumerate(checked):
+            model = serializer.Meta.model
+            by_kind[model.index_kind].append((position, model(**serializer.validated_data, recorded_by=request.user)))
+
+        with transaction.atomic():
+            created = [None] * len(items)
+            for kind, rows in by_kind.items():
+                model = EVIDENCE_SERIALIZERS[kind].Meta.model
+                for (position, _), obj in zip(rows, model.objects.bulk_create([obj for _, obj in rows])):
+                    created[position] = obj
+            # bulk_create sends no post_save, so do what its receivers would.
+            index_evidence(created)
+            sync_references(created)
+            cases = {obj.case_id: obj.case for obj in created}
+            for case_id in cases:
+                bump_report_version(case_id)
+            self.notify_detectives(created, cases)
+
+        return Response({'items': [
+            {'kind': obj.index_kind, **EVIDENCE_SERIALIZERS[obj.index_kind](obj, context={'request': request}).data}
+            for obj in created
+        ]}, status=status.HTTP_201_CREATED)
+
+    def notify_detectives(self, created, cases):
+        titles = defaultdict(list)
+        detective_cases = defaultdict(set)
+        for obj in created:
+            detective_id = cases[obj.case_id].assigned_detective_id
+            if detective_id:
+                titles[detective_id].append(obj.title)
+                detective_cases[detective_id].add(obj.case_id)
+        notifications = []
+        for detective_id, names in titles.items():
+            case_ids = detective_cases[detective_id]
+            message = f'{len(names)} new evidence items added: {", ".join(names)}'
+            notifications.append(Notification(
+                recipient_id=detective_id,
+                case_id=next(iter(case_ids)) if len(case_ids) == 1 else None,
+                message=message if len(message) <= 255 else message[:254] + '…',
+            ))
+        Notification.objects.bulk_create(notifications)
+
+
+class MediaUploadViewSet(
+    EvidencePermissionMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Resumable uploads: create, ``PUT chunks/<n>/`` with ``X-Chunk-SHA256``, then ``complete``.
+
+    A client that lost its connection reads the upload back and resends only
+    the chunks missing from ``received_chunks``.
+    """
+
+    queryset = MediaUpload.objects.select_related('blob').all()
+    serializer_class = MediaUploadSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset().order_by('-created_at')
+        if self.request.user.is_superuser:
+            return queryset
+        return queryset.filter(owner=self.request.user)
+
+    def perform_create(self, serializer):
+        start_upload(serializer.save(owner=self.request.user))
+
+    @decorators.action(detail=True, methods=['put'], url_path=r'chunks/(?P<index>\d+)')
+    def chunk(self, request, pk=None, index=None):
+        upload = self.get_object()
+        index = int(index)
+        checksum = request.headers.get('X-Chunk-SHA256', '').lower()
+        if upload.status != MediaUpload.Status.UPLOADING:
+            return Response({'detail': 'Upload is already complete.'}, status=status.HTTP_409_CONFLICT)
+        if index >= upload.total_chunks:
+            return Response({'detail': f'Chunk index must be below {upload.total_chunks}.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not checksum:
+            return Response({'detail': 'X-Chunk-SHA256 header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        recorded = upload.chunks.get(str(index))
+        if recorded:
+            # Chunks are immutable once accepted, so a resent chunk is a no-op.
+            if recorded != checksum:
+                return Response({'detail': f'Chunk {index} was already received with another checksum.'}, status=status.HTTP_409_CONFLICT)
+            return Response(self.get_serializer(upload).data)
+
+        try:
+            write_chunk(upload, index, request.stream, checksum)
+        except ChunkError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            upload = MediaUpload.objects.select_for_update().get(pk=upload.pk)
+            upload.chunks[str(index)] = checksum
+            upload.save(update_fields=['chunks'])
+        return Response(self.get_serializer(upload).data)
+
+    @decorators.action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        upload = self.get_object()
+        if upload.status == MediaUpload.Status.COMPLETE:
+            return Response(self.get_serializer(upload).data)
+        missing = [index for index in range(upload.total_chunks) if str(index) not in upload.chunks]
+        if missing:
+            return Response({'detail': 'Some chunks are missing.', 'missing_chunks': missing}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            upload.blob = finish_upload(upload)
+        except ChunkError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        upload.sha256 = upload.blob.sha256
+        upload.status = MediaUpload.Status.COMPLETE
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=['blob', 'sha256', 'status', 'completed_at'])
+        # Previews are made ahead of the first read; serializing evidence only links to them.
+        blob_name = upload.blob.name
+        transaction.on_commit(lambda: derive_all(blob_name))
+        return Response(self.get_serializer(upload).data)
+
+
+def media_derivative(request, sha256, variant):
+    """Redirect to a thumbnail, preview or poster frame of a stored blob, deriving it on first use.
+
+    Public like the originals under MEDIA_URL: the content hash is the only key.
+    """
+    blob = MediaBlob.objects.filter(pk=sha256).only('name').first()
+    if blob is None or variant not in variants_for(blob.name):
+        raise Http404('No such media preview.')
+    try:
+        path = ensure(blob.name, variant, wait=getattr(settings, 'MEDIA_DERIVATIVE_WAIT', 10))
+    except DerivationTimeout:
+        return HttpResponse('Preview is being generated.', status=503, headers={'Retry-After': '2'})
+    except Exception:
+        raise Http404('This media cannot be previewed.')
+    if path is None:
+        raise Http404('This media cannot be previewed.')
+    return HttpResponseRedirect(public_url(request, derived_name(blob.name, variant)))
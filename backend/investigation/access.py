@@ -0,0 +1,41 @@
+from django.db.models import F, Q
+
+from rbac.permissions import user_has_action
+from .models import Interrogation, Suspect, SuspectSubmission
+
+INTERROGATION_READ_ACTIONS = ('case.read_all', 'interrogation.captain_decision', 'interrogation.chief_review')
+
+
+def visible_suspects(user, qs=None):
+    """Suspects the suspect endpoints serve to the user, for reads and writes alike."""
+    qs = Suspect.objects.all() if qs is None else qs
+    if user.is_superuser or user_has_action(user, 'case.read_all'):
+        return qs
+    return qs.filter(
+        Q(case__assigned_detective=user)
+        | Q(case__suspect_submissions__sergeant=user, case__suspect_submissions__status=SuspectSubmission.Status.APPROVED)
+    ).distinct()
+
+
+def visible_interrogations(user, qs=None):
+    """Interrogations the interrogation endpoints serve to the user, reviews included."""
+    qs = Interrogation.objects.all() if qs is None else qs
+    if user.is_superuser or any(user_has_action(user, action) for action in INTERROGATION_READ_ACTIONS):
+        return qs
+    return qs.filter(Q(detective=user) | Q(sergeant=user))
+
+
+def sergeant_approved_suspect_ids(user, suspect_ids):
+    """Suspects (of ``suspect_ids``) in a submission this sergeant approved, in one query."""
+    return set(
+        SuspectSubmission.suspects.through.objects.filter(
+            suspect_id__in=set(suspect_ids),
+            suspectsubmission__status=SuspectSubmission.Status.APPROVED,
+            suspectsubmission__sergeant=user,
+            suspectsubmission__case_id=F('suspect__case_id'),
+        ).values_list('suspect_id', flat=True)
+    )
+
+
+def is_case_sergeant(user, suspect):
+    return suspect.id in sergeant_approved_suspect_ids(user, [suspect.id])
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class InvestigationConfig(AppConfig):
     name = 'investigation'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,107 @@
+from django.db import transaction
+from django.db.models import Case, CharField, Exists, Max, OuterRef, Q, Value, When
+from django.db.models.functions import Concat
+
+from evidence.models import EvidenceIndex
+from .models import BoardNode, BoardTombstone, Suspect
+from .serializers import BoardEdgeSerializer, BoardNodeSerializer
+
+
+def _uncarded(board, reference, label):
+    """Rows with no card of that reference and label on the board, nor one deleted from it."""
+    card = {'reference_id': OuterRef(reference), 'label': OuterRef(label)}
+    return ~Exists(BoardNode.objects.filter(board=board, **card)) & ~Exists(
+        BoardTombstone.objects.filter(board_id=board.pk, kind=BoardTombstone.Kind.NODE, **card)
+    )
+
+
+def _missing_cards(board, case):
+    suspects = (
+        Suspect.objects.filter(case=case)
+        .annotate(card_label=Concat(Value('Suspect: '), 'full_name', output_field=CharField()))
+        .filter(_uncarded(board, 'id', 'card_label'))
+    )
+    kind_label = Case(*[When(kind=kind, then=Value(f'{label}: ')) for kind, label in EvidenceIndex.Kind.choices])
+    evidence = (
+        EvidenceIndex.objects.filter(case=case)
+        .annotate(card_label=Concat(kind_label, 'title', output_field=CharField()))
+        .filter(_uncarded(board, 'evidence_id', 'card_label'))
+    )
+    return suspects, evidence
+
+
+def sync_board_nodes(board, case):
+    """Add cards for the case's suspects and evidence that have none on the board yet.
+
+    Each source is matched against the board's cards in one anti-join, so this
+    costs two queries when nothing is new and six more otherwise, however large
+    the case is. Cards a detective deleted are remembered by their tombstones
+    and not added back.
+    """
+    suspects, evidence = _missing_cards(board, case)
+    if not suspects.exists() and not evidence.exists():
+        return
+
+    with transaction.atomic():
+        # Claiming the revision locks the board row, so a concurrent open waits
+        # here and then finds the cards this one adds.
+        revision = board.next_revision()
+        kind_order = {kind: position for position, kind in enumerate(EvidenceIndex.Kind.values)}
+        cards = [
+            (BoardNode.Kind.SUSPECT, ref_id, label)
+            for ref_id, label in suspects.order_by('id').values_list('id', 'card_label')
+        ] + [
+            (BoardNode.Kind.EVIDENCE, ref_id, label)
+            for _, ref_id, label in sorted(
+                evidence.values_list('kind', 'evidence_id', 'card_label'),
+                key=lambda row: (kind_order[row[0]], row[1]),
+            )
+        ]
+        if not cards:
+            transaction.set_rollback(True)
+            return
+        # Layout: suspects along the top row, evidence below, after the cards already there.
+        right_edge = board.nodes.aggregate(
+            suspect=Max('x', filter=Q(kind=BoardNode.Kind.SUSPECT)),
+            evidence=Max('x', filter=Q(kind=BoardNode.Kind.EVIDENCE)),
+        )
+        x = {
+            BoardNode.Kind.SUSPECT: (right_edge['suspect'] or -100) + 180,
+            BoardNode.Kind.EVIDENCE: (right_edge['evidence'] or -100) + 180,
+        }
+        y = {BoardNode.Kind.SUSPECT: 80, BoardNode.Kind.EVIDENCE: 230}
+        new_nodes = []
+        for kind, ref_id, label in cards:
+            # bulk_create skips BoardNode.save, so the cards take the claimed revision here.
+            new_nodes.append(BoardNode(
+                board=board, label=label, kind=kind, reference_id=ref_id, x=x[kind], y=y[kind], revision=revision,
+            ))
+            x[kind] += 180
+        BoardNode.objects.bulk_create(new_nodes)
+    board.revision = revision
+
+
+def board_changes(board, since):
+    """Nodes and edges written after revision ``since``, plus ids deleted since then.
+
+    ``since=0``, or a revision the board never reached, returns the whole
+    board with ``reset`` set.
+    """
+    reset = since == 0 or since > board.revision
+    nodes = board.nodes.all()
+    edges = board.edges.all()
+    deleted = {BoardTombstone.Kind.NODE: [], BoardTombstone.Kind.EDGE: []}
+    if not reset:
+        nodes = nodes.filter(revision__gt=since)
+        edges = edges.filter(revision__gt=since)
+        tombstones = BoardTombstone.objects.filter(board_id=board.pk, revision__gt=since).order_by('revision')
+        for kind, object_id in tombstones.values_list('kind', 'object_id'):
+            deleted[kind].append(object_id)
+    return {
+        'revision': board.revision,
+        'since': since,
+        'reset': reset,
+        'nodes': BoardNodeSerializer(nodes, many=True).data,
+        'edges': BoardEdgeSerializer(edges, many=True).data,
+        'deleted': {'nodes': deleted[BoardTombstone.Kind.NODE], 'edges': deleted[BoardTombstone.Kind.EDGE]},
+    }
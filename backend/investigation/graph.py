@@ -0,0 +1,149 @@
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import BoardEdge, BoardNode
+
+METRICS = ('components', 'centrality', 'clusters')
+
+
+def _cache():
+    return caches[getattr(settings, 'BOARD_GRAPH_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'BOARD_GRAPH_CACHE_TIMEOUT', 3600)
+
+
+def graph_key(kind, board):
+    # Every write bumps the revision, so keys never need invalidating. The
+    # case creation time guards against primary keys reused after a rollback.
+    created = int(board.case.created_at.timestamp() * 1_000_000)
+    return f'board-graph:{kind}:{board.pk}.{created}:{board.revision}'
+
+
+class BoardGraph:
+    """The cards of one board as an undirected graph; edges are kept per neighbour pair."""
+
+    def __init__(self, nodes, edges):
+        self.nodes = nodes
+        self.adjacency = {node_id: {} for node_id in nodes}
+        for edge_id, a, b in edges:
+            # Self-loops add nothing, and an edge may point at a card on another board.
+            if a != b and a in self.adjacency and b in self.adjacency:
+                self.adjacency[a].setdefault(b, edge_id)
+                self.adjacency[b].setdefault(a, edge_id)
+
+    @classmethod
+    def load(cls, board):
+        """Read the board once per revision; later reads of the same revision come from the cache."""
+        key = graph_key('graph', board)
+        data = _cache().get(key)
+        if data is None:
+            data = {
+                'nodes': {
+                    node_id: (kind, label, reference_id)
+                    for node_id, kind, label, reference_id in BoardNode.objects.filter(board=board)
+                    .order_by('id').values_list('id', 'kind', 'label', 'reference_id')
+                },
+                'edges': list(BoardEdge.objects.filter(board=board).order_by('id').values_list('id', 'from_node_id', 'to_node_id')),
+            }
+            _cache().set(key, data, _timeout())
+        return cls(data['nodes'], data['edges'])
+
+    def card(self, node_id):
+        kind, label, reference_id = self.nodes[node_id]
+        return {'node': node_id, 'kind': kind, 'label': label, 'reference_id': reference_id}
+
+    def of_kind(self, kind):
+        return [node_id for node_id, (node_kind, _, _) in self.nodes.items() if node_kind == kind]
+
+    def components(self):
+        """Connected groups of cards, largest first."""
+        seen, groups = set(), []
+        for start in self.nodes:
+            if start in seen:
+                continue
+            seen.add(start)
+            group, queue = [], deque([start])
+            while queue:
+                node_id = queue.popleft()
+                group.append(node_id)
+                for neighbour in self.adjacency[node_id]:
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        queue.append(neighbour)
+            groups.append(sorted(group))
+        groups.sort(key=lambda group: (-len(group), group[0]))
+        return [{'size': len(group), 'nodes': group} for group in groups]
+
+    def centrality(self):
+        """Degree centrality of suspect cards: distinct neighbours over the most they could have."""
+        others = max(len(self.nodes) - 1, 1)
+        rows = [
+            {**self.card(node_id), 'degree': len(self.adjacency[node_id]), 'centrality': len(self.adjacency[node_id]) / others}
+            for node_id in self.of_kind(BoardNode.Kind.SUSPECT)
+        ]
+        rows.sort(key=lambda row: (-row['degree'], row['node']))
+        return rows
+
+    def clusters(self):
+        """Evidence each suspect is linked to, directly or through notes and other evidence.
+
+        Paths stop at other suspects, so evidence tying two suspects together is
+        listed under both but evidence of one suspect does not leak to the next.
+        """
+        result = []
+        for suspect in self.of_kind(BoardNode.Kind.SUSPECT):
+            distances = self._distances(suspect, stop_kind=BoardNode.Kind.SUSPECT)
+            evidence = [
+                {**self.card(node_id), 'distance': distance}
+                for node_id, distance in distances.items()
+                if self.nodes[node_id][0] == BoardNode.Kind.EVIDENCE
+            ]
+            evidence.sort(key=lambda row: (row['distance'], row['node']))
+            result.append({**self.card(suspect), 'evidence': evidence})
+        return result
+
+    def _distances(self, start, stop_kind=None):
+        distances, queue = {start: 0}, deque([start])
+        while queue:
+            node_id = queue.popleft()
+            if node_id != start and self.nodes[node_id][0] == stop_kind:
+                continue
+            for neighbour in self.adjacency[node_id]:
+                if neighbour not in distances:
+                    distances[neighbour] = distances[node_id] + 1
+                    queue.append(neighbour)
+        return distances
+
+    def shortest_path(self, source, target):
+        """Node and edge ids along a fewest-hops path, or None when the cards are not connected."""
+        parents, queue = {source: None}, deque([source])
+        while queue and target not in parents:
+            node_id = queue.popleft()
+            for neighbour in self.adjacency[node_id]:
+                if neighbour not in parents:
+                    parents[neighbour] = node_id
+                    queue.append(neighbour)
+        if target not in parents:
+            return None
+        nodes = [target]
+        while parents[nodes[-1]] is not None:
+            nodes.append(parents[nodes[-1]])
+        nodes.reverse()
+        edges = [self.adjacency[a][b] for a, b in zip(nodes, nodes[1:])]
+        return {'nodes': nodes, 'edges': edges, 'length': len(edges)}
+
+
+def board_analytics(board, metrics=METRICS):
+    """Components, suspect centrality and evidence clusters, computed once per board revision."""
+    key = graph_key('analytics', board)
+    cache = _cache()
+    result = cache.get(key)
+    if result is None:
+        graph = BoardGraph.load(board)
+        result = {metric: getattr(graph, metric)() for metric in METRICS}
+        cache.set(key, result, _timeout())
+    return {'revision': board.revision, **{metric: result[metric] for metric in METRICS if metric in metrics}}
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.broadcast import subscribe
+from .board import board_changes, sync_board_nodes
+from .models import DetectiveBoard, board_channel, case_channel
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets ``Accept: text/event-stream`` clients through content negotiation; errors go out as one event."""
+
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return event('error', data).encode()
+
+
+def event(name, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {name}', 'data: ' + json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))]
+    return '\n'.join(lines) + '\n\n'
+
+
+# Reconnect delay the browser's EventSource is told to use.
+RETRY = 'retry: 3000\n\n'
+
+
+def keepalive_seconds():
+    return getattr(settings, 'BOARD_STREAM_KEEPALIVE', 15)
+
+
+class BoardStream:
+    """Server-sent events for one viewer of a board.
+
+    Each event is the board's ``changes`` payload since the last one sent, with
+    the revision as event id, so a reconnecting ``EventSource`` resumes from
+    ``Last-Event-ID``. Suspects and evidence recorded on the case are synced
+    into cards as they arrive, the way opening the board would.
+    """
+
+    def __init__(self, board, since):
+        self.board_id = board.pk
+        self.case_id = board.case_id
+        self.since = since
+        self.started = False
+
+    @property
+    def channels(self):
+        return [board_channel(self.board_id), case_channel(self.case_id)]
+
+    def step(self, woke=()):
+        """Events owed after a wake-up, or None once the board is gone."""
+        board = DetectiveBoard.objects.select_related('case').filter(pk=self.board_id).first()
+        if board is None:
+            return None
+        if case_channel(self.case_id) in woke:
+            sync_board_nodes(board, board.case)
+            board.refresh_from_db(fields=['revision'])
+        if self.started and self.since == board.revision:
+            return []
+        payload = board_changes(board, self.since)
+        self.since = payload['revision']
+        self.started = True
+        return [event('changes', payload, payload['revision'])]
+
+    def events(self):
+        """Sync iterator, for WSGI servers; it holds a worker thread per viewer."""
+        subscription = subscribe(self.channels)
+        try:
+            yield RETRY
+            woke = ()
+            while True:
+                chunks = self.step(woke)
+                if chunks is None:
+                    return
+                yield from chunks
+                woke = subscription.wait(keepalive_seconds())
+                if not woke:
+                    yield ': keepalive\n\n'
+        finally:
+            subscription.close()
+
+    async def aevents(self):
+        """Async iterator, for ASGI servers; a waiting viewer costs no thread."""
+        subscription = subscribe(self.channels, loop=asyncio.get_running_loop())
+        try:
+            yield RETRY
+            woke = ()
+            while True:
+                chunks = await sync_to_async(self.step)(woke)
+                if chunks is None:
+                    return
+                for chunk in chunks:
+                    yield chunk
+                woke = await subscription.wait_async(keepalive_seconds())
+                if not woke:
+                    yield ': keepalive\n\n'
+        finally:
+            subscription.close()
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0005_keyset_pagination_indexes'),
+        ('investigation', '0005_interrogation_detective_submitted_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'created_at', 'id'], name='notification_recipient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suspectsubmission',
+            index=models.Index(fields=['created_at', 'id'], name='suspect_submission_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investigation', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detectiveboard',
+            name='synced_evidence_id',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='detectiveboard',
+            name='synced_suspect_id',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
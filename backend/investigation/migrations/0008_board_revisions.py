@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investigation', '0007_board_sync_watermarks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board_id', models.PositiveBigIntegerField()),
+                ('kind', models.CharField(choices=[('node', 'Node'), ('edge', 'Edge')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('revision', models.PositiveBigIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='boardedge',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='boardnode',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='detectiveboard',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='boardedge',
+            index=models.Index(fields=['board', 'revision'], name='board_edge_revision_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boardnode',
+            index=models.Index(fields=['board', 'revision'], name='board_node_revision_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boardtombstone',
+            index=models.Index(fields=['board_id', 'revision'], name='board_tombstone_revision_idx'),
+        ),
+    ]
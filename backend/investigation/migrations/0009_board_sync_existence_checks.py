@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investigation', '0008_board_revisions'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='detectiveboard',
+            name='synced_evidence_id',
+        ),
+        migrations.RemoveField(
+            model_name='detectiveboard',
+            name='synced_suspect_id',
+        ),
+        migrations.AddField(
+            model_name='boardtombstone',
+            name='label',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='boardtombstone',
+            name='reference_id',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='boardnode',
+            index=models.Index(fields=['board', 'reference_id'], name='board_node_reference_idx'),
+        ),
+    ]
@@ -1,16 +1,58 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 
+from core.broadcast import publish_on_commit
+
 
 class DetectiveBoard(models.Model):
     case = models.OneToOneField('cases.Case', on_delete=models.CASCADE, related_name='board')
     detective = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
     exported_image_url = models.URLField(blank=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped by every node/edge write; each card carries the revision of its last change.
+    revision = models.PositiveBigIntegerField(default=0, editable=False)
+
+    def next_revision(self):
+        return next_revision(self.pk)
+
+
+def next_revision(board_id):
+    """Claim the board's next revision; call inside the transaction that writes with it.
+
+    The UPDATE holds the board row lock until commit, so revisions become
+    visible in order and a ``?since=`` reader never skips one.
+    """
+    DetectiveBoard.objects.filter(pk=board_id).update(revision=F('revision') + 1)
+    publish_on_commit(board_channel(board_id))
+    return DetectiveBoard.objects.filter(pk=board_id).values_list('revision', flat=True).first()
+
+
+def board_channel(board_id):
+    return f'board:{board_id}'
+
+
+def case_channel(case_id):
+    # Suspects and evidence recorded on a case, which become board cards at the next sync.
+    return f'case:{case_id}'
+
+
+class RevisionedBoardItem(models.Model):
+    revision = models.PositiveBigIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            self.revision = next_revision(self.board_id)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'revision'}
+            super().save(*args, **kwargs)
 
-class BoardNode(models.Model):
+
+class BoardNode(RevisionedBoardItem):
     class Kind(models.TextChoices):
         NOTE = 'note', 'Note'
         EVIDENCE = 'evidence', 'Evidence'
@@ -23,13 +65,42 @@ class BoardNode(models.Model):
     kind = models.CharField(max_length=20, choices=Kind.choices, default=Kind.NOTE)
     reference_id = models.PositiveIntegerField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'revision'], name='board_node_revision_idx'),
+            models.Index(fields=['board', 'reference_id'], name='board_node_reference_idx'),
+        ]
+
 
-class BoardEdge(models.Model):
+class BoardEdge(RevisionedBoardItem):
     board = models.ForeignKey(DetectiveBoard, on_delete=models.CASCADE, related_name='edges')
     from_node = models.ForeignKey(BoardNode, on_delete=models.CASCADE, related_name='out_edges')
     to_node = models.ForeignKey(BoardNode, on_delete=models.CASCADE, related_name='in_edges')
     reason = models.CharField(max_length=255, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['board', 'revision'], name='board_edge_revision_idx')]
+
+
+class BoardTombstone(models.Model):
+    """A deleted node or edge, kept so ``?since=`` readers learn about the deletion."""
+
+    class Kind(models.TextChoices):
+        NODE = 'node', 'Node'
+        EDGE = 'edge', 'Edge'
+
+    # Not a foreign key: tombstones are written while a deleted board's cards cascade.
+    board_id = models.PositiveBigIntegerField()
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+    revision = models.PositiveBigIntegerField()
+    # What a deleted node card showed, so board syncs do not add it back.
+    reference_id = models.PositiveIntegerField(null=True, blank=True)
+    label = models.CharField(max_length=150, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['board_id', 'revision'], name='board_tombstone_revision_idx')]
+
 
 class Suspect(models.Model):
     class Status(models.TextChoices):
@@ -106,6 +177,9 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'created_at', 'id'], name='notification_recipient_idx'),
+        ]
 
 
 class SuspectSubmission(models.Model):
@@ -128,3 +202,6 @@ class SuspectSubmission(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='suspect_submission_created_idx'),
+        ]
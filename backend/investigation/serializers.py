@@ -1,4 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
+
+from core.sparse import SparseFieldsMixin
 from .models import DetectiveBoard, BoardNode, BoardEdge, Suspect, Interrogation, Notification, SuspectSubmission
 
 
@@ -6,12 +9,14 @@ class BoardNodeSerializer(serializers.ModelSerializer):
     class Meta:
         model = BoardNode
         fields = '__all__'
+        read_only_fields = ('revision',)
 
 
 class BoardEdgeSerializer(serializers.ModelSerializer):
     class Meta:
         model = BoardEdge
         fields = '__all__'
+        read_only_fields = ('revision',)
 
 
 class DetectiveBoardSerializer(serializers.ModelSerializer):
@@ -20,11 +25,72 @@ class DetectiveBoardSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = DetectiveBoard
-        fields = ('id', 'case', 'detective', 'exported_image_url', 'updated_at', 'nodes', 'edges')
+        fields = ('id', 'case', 'detective', 'exported_image_url', 'updated_at', 'revision', 'nodes', 'edges')
+
+
+class NodeRefField(serializers.Field):
+    """A node id, or the ``ref`` of a node created in the same batch."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) and not isinstance(data, bool) and data > 0:
+            return data
+        if isinstance(data, str) and data:
+            return data
+        raise serializers.ValidationError('Expected a node id or the ref of a node created in this batch.')
+
+    def to_representation(self, value):
+        return value
+
+
+class BoardBatchNodeSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    ref = serializers.CharField(required=False, max_length=64)
+    label = serializers.CharField(required=False, max_length=150)
+    x = serializers.FloatField(required=False)
+    y = serializers.FloatField(required=False)
+    kind = serializers.ChoiceField(choices=BoardNode.Kind.choices, required=False)
+    reference_id = serializers.IntegerField(required=False, allow_null=True, min_value=0)
+
+
+class BoardBatchEdgeSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    from_node = NodeRefField(required=False)
+    to_node = NodeRefField(required=False)
+    reason = serializers.CharField(required=False, allow_blank=True, max_length=255)
+
+
+class BoardBatchSerializer(serializers.Serializer):
+    create_nodes = BoardBatchNodeSerializer(many=True, required=False)
+    update_nodes = BoardBatchNodeSerializer(many=True, required=False)
+    delete_nodes = serializers.ListField(child=serializers.IntegerField(), required=False)
+    create_edges = BoardBatchEdgeSerializer(many=True, required=False)
+    update_edges = BoardBatchEdgeSerializer(many=True, required=False)
+    delete_edges = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, attrs):
+        total = sum(len(attrs.get(name, [])) for name in self.fields)
+        max_operations = getattr(settings, 'BOARD_BATCH_MAX_OPERATIONS', 1000)
+        if not total:
+            raise serializers.ValidationError('The batch is empty.')
+        if total > max_operations:
+            raise serializers.ValidationError(f'At most {max_operations} operations per batch.')
+
+        refs = [item['ref'] for item in attrs.get('create_nodes', []) if 'ref' in item]
+        if len(refs) != len(set(refs)):
+            raise serializers.ValidationError({'create_nodes': 'Each ref must be unique.'})
+        if any('label' not in item for item in attrs.get('create_nodes', [])):
+            raise serializers.ValidationError({'create_nodes': 'label is required.'})
+        if any('from_node' not in item or 'to_node' not in item for item in attrs.get('create_edges', [])):
+            raise serializers.ValidationError({'create_edges': 'from_node and to_node are required.'})
+        for name in ('update_nodes', 'update_edges'):
+            if any('id' not in item for item in attrs.get(name, [])):
+                raise serializers.ValidationError({name: 'id is required.'})
+        return attrs
 
 
-class SuspectSerializer(serializers.ModelSerializer):
+class SuspectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     days_wanted = serializers.SerializerMethodField()
+    field_dependencies = {'days_wanted': ['marked_at']}
 
     def get_days_wanted(self, obj):
         return obj.days_wanted()
@@ -34,7 +100,7 @@ class SuspectSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class InterrogationSerializer(serializers.ModelSerializer):
+class InterrogationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     def validate(self, attrs):
         for field in ['detective_score', 'sergeant_score', 'captain_score']:
             if field in attrs and attrs[field] is not None:
@@ -48,7 +114,7 @@ class InterrogationSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = '__all__'
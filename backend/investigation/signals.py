@@ -0,0 +1,63 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save
+
+from core.broadcast import publish_on_commit
+from .models import BoardEdge, BoardNode, BoardTombstone, DetectiveBoard, Suspect, case_channel, next_revision
+
+_batch = threading.local()
+
+
+@contextmanager
+def batched_tombstones(revision):
+    """Give every delete in the block ``revision`` and write their tombstones in one insert."""
+    _batch.rows = rows = []
+    _batch.revision = revision
+    try:
+        yield
+        BoardTombstone.objects.bulk_create(rows)
+    finally:
+        del _batch.rows, _batch.revision
+
+
+def tombstone_node(sender, instance, **kwargs):
+    record_tombstone(instance, BoardTombstone.Kind.NODE)
+
+
+def tombstone_edge(sender, instance, **kwargs):
+    record_tombstone(instance, BoardTombstone.Kind.EDGE)
+
+
+def record_tombstone(instance, kind):
+    tombstone = BoardTombstone(
+        board_id=instance.board_id,
+        kind=kind,
+        object_id=instance.pk,
+        reference_id=getattr(instance, 'reference_id', None),
+        label=getattr(instance, 'label', ''),
+    )
+    rows = getattr(_batch, 'rows', None)
+    if rows is not None:
+        tombstone.revision = _batch.revision
+        rows.append(tombstone)
+        return
+    # Deletes run inside the collector's transaction, which keeps revisions in commit order.
+    tombstone.revision = next_revision(instance.board_id)
+    if tombstone.revision is not None:
+        tombstone.save()
+
+
+def drop_tombstones(sender, instance, **kwargs):
+    BoardTombstone.objects.filter(board_id=instance.pk).delete()
+
+
+def announce_suspect(sender, instance, created, **kwargs):
+    if created:
+        publish_on_commit(case_channel(instance.case_id))
+
+
+post_delete.connect(tombstone_node, sender=BoardNode, dispatch_uid='board_tombstone_node')
+post_delete.connect(tombstone_edge, sender=BoardEdge, dispatch_uid='board_tombstone_edge')
+post_delete.connect(drop_tombstones, sender=DetectiveBoard, dispatch_uid='board_tombstone_board')
+post_save.connect(announce_suspect, sender=Suspect, dispatch_uid='board_live_suspect')
@@ -1,10 +1,18 @@
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.test import APITestCase
 
 from cases.models import Case
-from evidence.models import WitnessEvidence
-from investigation.models import Interrogation, Suspect, SuspectSubmission
+from core import broadcast
+from evidence.models import OtherEvidence, WitnessEvidence
+from investigation.live import BoardStream
+from investigation.models import BoardEdge, BoardNode, BoardTombstone, DetectiveBoard, Interrogation, Suspect, SuspectSubmission
 from rbac.models import Role, RolePermission, UserRole
 
 User = get_user_model()
@@ -77,6 +85,285 @@ class BoardOpenCaseTests(APITestCase):
         labels = [n['label'] for n in second.data['board']['nodes']]
         self.assertTrue(any('Witness: Witness clip' == lbl for lbl in labels))
 
+    def open_board(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post('/api/investigation/boards/open_case_board/', {'case_id': self.case.id}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        return resp, len(ctx.captured_queries)
+
+    def add_items(self, count, tag):
+        for i in range(count):
+            Suspect.objects.create(case=self.case, full_name=f'{tag} suspect {i}')
+            OtherEvidence.objects.create(case=self.case, title=f'{tag} item {i}', description='d', recorded_by=self.detective)
+
+    def test_board_sync_is_incremental_with_constant_queries(self):
+        self.client.force_authenticate(self.detective)
+        self.open_board()
+        self.add_items(2, 'small')
+        _, small = self.open_board()
+        self.add_items(30, 'large')
+        resp, large = self.open_board()
+        self.assertEqual(small, large)
+        self.assertEqual(len(resp.data['board']['nodes']), 64)
+
+        _, unchanged = self.open_board()
+        self.assertLess(unchanged, large)
+        self.assertEqual(BoardNode.objects.filter(board__case=self.case).count(), 64)
+
+    def test_board_sync_skips_cards_that_already_exist(self):
+        self.client.force_authenticate(self.detective)
+        suspect = Suspect.objects.create(case=self.case, full_name='Known')
+        resp, _ = self.open_board()
+        board_id = resp.data['board']['id']
+        BoardNode.objects.filter(board_id=board_id).update(x=500)
+        Suspect.objects.create(case=self.case, full_name='New')
+        resp, _ = self.open_board()
+        cards = sorted((n['label'], n['x']) for n in resp.data['board']['nodes'])
+        self.assertEqual(cards, [('Suspect: Known', 500), ('Suspect: New', 680)])
+        self.assertEqual(suspect.id, BoardNode.objects.get(label='Suspect: Known').reference_id)
+
+    def test_board_sync_finds_rows_committed_out_of_id_order(self):
+        self.client.force_authenticate(self.detective)
+        Suspect.objects.create(id=30, case=self.case, full_name='Later id')
+        self.open_board()
+        # A transaction that took a lower id but committed after the sync above.
+        Suspect.objects.create(id=20, case=self.case, full_name='Earlier id')
+        labels = [n['label'] for n in self.open_board()[0].data['board']['nodes']]
+        self.assertEqual(sorted(labels), ['Suspect: Earlier id', 'Suspect: Later id'])
+
+    def test_board_sync_does_not_restore_deleted_cards(self):
+        self.client.force_authenticate(self.detective)
+        Suspect.objects.create(case=self.case, full_name='Dismissed')
+        OtherEvidence.objects.create(case=self.case, title='Noise', description='d', recorded_by=self.detective)
+        board = self.open_board()[0].data['board']
+        for node in board['nodes']:
+            self.client.delete(f'/api/investigation/board-nodes/{node["id"]}/')
+
+        self.assertEqual(self.open_board()[0].data['board']['nodes'], [])
+        # Renaming the source gives it a new card, as it did before.
+        Suspect.objects.filter(case=self.case).update(full_name='Renamed')
+        labels = [n['label'] for n in self.open_board()[0].data['board']['nodes']]
+        self.assertEqual(labels, ['Suspect: Renamed'])
+
+    def test_board_changes_since_a_revision(self):
+        self.client.force_authenticate(self.detective)
+        Suspect.objects.create(case=self.case, full_name='Synced')
+        resp, _ = self.open_board()
+        board = resp.data['board']
+        url = f'/api/investigation/boards/{board["id"]}/changes/'
+
+        full = self.client.get(url).data
+        self.assertTrue(full['reset'])
+        self.assertEqual(len(full['nodes']), 1)
+        since = full['revision']
+        self.assertEqual(self.client.get(f'{url}?since={since}').data['nodes'], [])
+
+        note = self.client.post('/api/investigation/board-nodes/', {'board': board['id'], 'label': 'Note'}, format='json').data
+        synced = full['nodes'][0]
+        self.client.post('/api/investigation/board-edges/', {
+            'board': board['id'], 'from_node': note['id'], 'to_node': synced['id'],
+        }, format='json')
+        self.client.patch(f'/api/investigation/board-nodes/{synced["id"]}/', {'x': 999}, format='json')
+        delta = self.client.get(f'{url}?since={since}').data
+        self.assertFalse(delta['reset'])
+        self.assertEqual(sorted(n['id'] for n in delta['nodes']), sorted([note['id'], synced['id']]))
+        self.assertEqual(len(delta['edges']), 1)
+        self.assertGreater(delta['revision'], since)
+
+        since = delta['revision']
+        self.client.delete(f'/api/investigation/board-nodes/{note["id"]}/')
+        delta = self.client.get(f'{url}?since={since}').data
+        self.assertEqual(delta['nodes'], [])
+        self.assertEqual(delta['deleted']['nodes'], [note['id']])
+        self.assertEqual(len(delta['deleted']['edges']), 1)
+
+        self.assertEqual(self.client.get(f'{url}?since=abc').status_code, 400)
+        self.assertTrue(self.client.get(f'{url}?since={delta["revision"] + 10}').data['reset'])
+
+    def test_board_batch_applies_changes_under_one_revision(self):
+        self.client.force_authenticate(self.detective)
+        Suspect.objects.create(case=self.case, full_name='Batched')
+        board = self.open_board()[0].data['board']
+        url = f'/api/investigation/boards/{board["id"]}/batch/'
+        synced = board['nodes'][0]['id']
+
+        resp = self.client.post(url, {
+            'create_nodes': [{'ref': 'a', 'label': 'Alibi', 'x': 10, 'y': 20}, {'ref': 'b', 'label': 'Motive'}],
+            'update_nodes': [{'id': synced, 'x': 400, 'y': 90}],
+            'create_edges': [{'from_node': 'a', 'to_node': synced, 'reason': 'contradicts'}, {'from_node': 'a', 'to_node': 'b'}],
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        revision = resp.data['revision']
+        self.assertEqual(DetectiveBoard.objects.get(pk=board['id']).revision, revision)
+        self.assertEqual(set(BoardNode.objects.filter(board_id=board['id']).values_list('revision', flat=True)), {revision})
+        self.assertEqual(BoardNode.objects.get(pk=synced).x, 400)
+        edge = BoardEdge.objects.get(from_node_id=resp.data['refs']['a'], to_node_id=synced)
+        self.assertEqual((edge.reason, edge.revision), ('contradicts', revision))
+
+        resp = self.client.post(url, {
+            'delete_nodes': [resp.data['refs']['a']], 'update_edges': [], 'delete_edges': [],
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(BoardEdge.objects.filter(board_id=board['id']).count(), 0)
+        tombstones = BoardTombstone.objects.filter(board_id=board['id'])
+        self.assertEqual(sorted(tombstones.values_list('kind', flat=True)), ['edge', 'edge', 'node'])
+        self.assertEqual(set(tombstones.values_list('revision', flat=True)), {resp.data['revision']})
+
+    def test_board_batch_cost_does_not_grow_with_its_size(self):
+        self.client.force_authenticate(self.detective)
+        board = self.open_board()[0].data['board']
+        url = f'/api/investigation/boards/{board["id"]}/batch/'
+        ids = [node.pk for node in BoardNode.objects.bulk_create(
+            [BoardNode(board_id=board['id'], label=f'n{i}') for i in range(60)]
+        )]
+        counts = []
+        for size in (2, 20):
+            moves = [{'id': pk, 'x': size, 'y': size} for pk in ids[:size]]
+            links = [{'from_node': pk, 'to_node': ids[25]} for pk in ids[:size]]
+            created = [{'label': f'new {i}'} for i in range(size)]
+            doomed = ids[30 + size:30 + 2 * size]
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.post(url, {
+                    'update_nodes': moves, 'create_edges': links, 'create_nodes': created, 'delete_nodes': doomed,
+                }, format='json')
+            self.assertEqual(resp.status_code, 200, resp.data)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_board_batch_is_all_or_nothing(self):
+        self.client.force_authenticate(self.detective)
+        board = self.open_board()[0].data['board']
+        url = f'/api/investigation/boards/{board["id"]}/batch/'
+        node = BoardNode.objects.create(board_id=board['id'], label='Keep')
+        revision = DetectiveBoard.objects.get(pk=board['id']).revision
+
+        resp = self.client.post(url, {
+            'create_nodes': [{'label': 'Lost'}], 'create_edges': [{'from_node': node.pk, 'to_node': 'nope'}],
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post(url, {'update_nodes': [{'id': node.pk + 1000, 'x': 1}]}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data['missing']['nodes'], [node.pk + 1000])
+        self.assertFalse(BoardNode.objects.filter(label='Lost').exists())
+        self.assertEqual(DetectiveBoard.objects.get(pk=board['id']).revision, revision)
+
+        other = User.objects.create_user(username='det_batch', password='Strong12345', national_id='3666')
+        UserRole.objects.create(user=other, role=Role.objects.get(name='detective_board_role'))
+        self.client.force_authenticate(other)
+        resp = self.client.post(url, {'update_nodes': [{'id': node.pk, 'x': 1}]}, format='json')
+        self.assertEqual(resp.status_code, 403)
+
+    @staticmethod
+    def read_event(chunk):
+        fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines())
+        return fields['event'], json.loads(fields['data'])
+
+    @override_settings(BOARD_STREAM_KEEPALIVE=1)
+    def test_board_stream_pushes_committed_changes(self):
+        self.client.force_authenticate(self.detective)
+        Suspect.objects.create(case=self.case, full_name='Watched')
+        board = self.open_board()[0].data['board']
+        resp = self.client.get(f'/api/investigation/boards/{board["id"]}/stream/', HTTP_ACCEPT='text/event-stream')
+        self.addCleanup(resp.close)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        chunks = (chunk.decode() for chunk in resp.streaming_content)
+        self.assertTrue(next(chunks).startswith('retry:'))
+        name, first = self.read_event(next(chunks))
+        self.assertEqual((name, first['reset'], len(first['nodes'])), ('changes', True, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            node = BoardNode.objects.create(board_id=board['id'], label='Pinned')
+        _, delta = self.read_event(next(chunks))
+        self.assertFalse(delta['reset'])
+        self.assertEqual([n['id'] for n in delta['nodes']], [node.pk])
+
+        # New evidence is turned into a card without anyone reopening the board.
+        with self.captureOnCommitCallbacks(execute=True):
+            OtherEvidence.objects.create(case=self.case, title='Live item', description='d', recorded_by=self.detective)
+        _, delta = self.read_event(next(chunks))
+        self.assertEqual([n['label'] for n in delta['nodes']], ['Other: Live item'])
+
+        resp.close()
+        self.assertNotIn(f'board:{board["id"]}', broadcast._subscribers)
+
+    @override_settings(BOARD_STREAM_KEEPALIVE=1)
+    def test_board_stream_runs_as_async_iterator(self):
+        self.client.force_authenticate(self.detective)
+        board = DetectiveBoard.objects.get(pk=self.open_board()[0].data['board']['id'])
+
+        def add_node():
+            with self.captureOnCommitCallbacks(execute=True):
+                return BoardNode.objects.create(board=board, label='Async')
+
+        async def watch():
+            events = BoardStream(board, board.revision).aevents()
+            try:
+                self.assertTrue((await anext(events)).startswith('retry:'))
+                await anext(events)
+                node = await sync_to_async(add_node)()
+                return node, self.read_event(await anext(events))[1]
+            finally:
+                await events.aclose()
+
+        node, delta = async_to_sync(watch)()
+        self.assertEqual([n['id'] for n in delta['nodes']], [node.pk])
+        self.assertNotIn(f'board:{board.pk}', broadcast._subscribers)
+
+    def build_graph(self):
+        board = DetectiveBoard.objects.create(case=self.case, detective=self.detective)
+        kinds = {'s1': 'suspect', 's2': 'suspect', 'e1': 'evidence', 'e2': 'evidence', 'e3': 'evidence', 'n': 'note', 'z': 'note'}
+        nodes = {name: BoardNode.objects.create(board=board, label=name, kind=kind) for name, kind in kinds.items()}
+        for a, b in [('s1', 'e1'), ('e1', 'n'), ('n', 'e2'), ('e2', 's2'), ('s2', 'e3')]:
+            BoardEdge.objects.create(board=board, from_node=nodes[a], to_node=nodes[b])
+        return board, {name: node.pk for name, node in nodes.items()}
+
+    @staticmethod
+    def card_reads(ctx):
+        return [q for q in ctx.captured_queries if 'FROM "investigation_board' in q['sql']]
+
+    def test_board_analytics_are_computed_once_per_revision(self):
+        self.client.force_authenticate(self.detective)
+        board, ids = self.build_graph()
+        url = f'/api/investigation/boards/{board.pk}/analytics/'
+
+        with CaptureQueriesContext(connection) as cold:
+            data = self.client.get(url).data
+        self.assertEqual(
+            [group['nodes'] for group in data['components']],
+            [sorted(ids[n] for n in ('s1', 'e1', 'n', 'e2', 's2', 'e3')), [ids['z']]],
+        )
+        self.assertEqual([(row['node'], row['degree']) for row in data['centrality']], [(ids['s2'], 2), (ids['s1'], 1)])
+        self.assertAlmostEqual(data['centrality'][0]['centrality'], 2 / 6)
+        clusters = {row['node']: [(e['node'], e['distance']) for e in row['evidence']] for row in data['clusters']}
+        self.assertEqual(clusters[ids['s1']], [(ids['e1'], 1), (ids['e2'], 3)])
+        self.assertEqual(clusters[ids['s2']], sorted([(ids['e2'], 1), (ids['e3'], 1)]) + [(ids['e1'], 3)])
+
+        with CaptureQueriesContext(connection) as warm:
+            again = self.client.get(f'{url}?metrics=centrality').data
+        self.assertEqual(set(again), {'revision', 'centrality'})
+        self.assertEqual(len(self.card_reads(cold)), 2)
+        self.assertEqual(self.card_reads(warm), [])
+
+        BoardEdge.objects.create(board=board, from_node_id=ids['s1'], to_node_id=ids['z'])
+        revision = data['revision']
+        data = self.client.get(url).data
+        self.assertEqual(data['revision'], revision + 1)
+        self.assertEqual(len(data['components']), 1)
+
+    def test_board_path_between_cards(self):
+        self.client.force_authenticate(self.detective)
+        board, ids = self.build_graph()
+        url = f'/api/investigation/boards/{board.pk}/path/'
+
+        path = self.client.get(url, {'from': ids['s1'], 'to': ids['e3']}).data['path']
+        self.assertEqual(path['nodes'], [ids[n] for n in ('s1', 'e1', 'n', 'e2', 's2', 'e3')])
+        self.assertEqual(path['length'], 5)
+        self.assertEqual(len(set(path['edges'])), 5)
+        self.assertIsNone(self.client.get(url, {'from': ids['s1'], 'to': ids['z']}).data['path'])
+        self.assertEqual(self.client.get(url, {'from': ids['s1']}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'from': ids['s1'], 'to': ids['z'] + 100}).status_code, 400)
+
     def test_non_assigned_detective_cannot_add_suspect(self):
         other = User.objects.create_user(
             username='det_other_add',
@@ -1,13 +1,20 @@
 from collections import defaultdict
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from rest_framework import decorators, permissions, status, viewsets
+from rest_framework import decorators, permissions, serializers, status, viewsets
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from cases.access import is_assigned_detective
 from cases.models import Case
 from cases.serializers import CaseSerializer, CaseLogSerializer
+from core.pagination import PageNumberOrKeysetPagination
+from core.sparse import SparseQuerysetMixin
 from evidence.models import WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence
 from evidence.serializers import (
     WitnessEvidenceSerializer,
@@ -17,8 +24,14 @@ from evidence.serializers import (
     OtherEvidenceSerializer,
 )
 from rbac.permissions import user_has_action
+from .access import is_case_sergeant, visible_interrogations, visible_suspects
+from .board import board_changes, sync_board_nodes
+from .graph import METRICS, BoardGraph, board_analytics
+from .live import BoardStream, EventStreamRenderer
+from .signals import batched_tombstones
 from .models import DetectiveBoard, BoardNode, BoardEdge, Suspect, Interrogation, Notification, SuspectSubmission
 from .serializers import (
+    BoardBatchSerializer,
     DetectiveBoardSerializer,
     BoardNodeSerializer,
     BoardEdgeSerializer,
@@ -62,52 +75,6 @@ class DetectiveBoardViewSet(viewsets.ModelViewSet):
             if not require_action(request.user, 'investigation.board.manage'):
                 self.permission_denied(request, message='No permission')
 
-    def _sync_board_nodes(self, board, case):
-        existing_keys = set(
-            board.nodes.values_list('kind', 'reference_id', 'label')
-        )
-
-        # Layout counters for new nodes only.
-        x = 80
-        y = 80
-
-        def add_if_missing(kind, ref_id, label, px, py):
-            key = (kind, ref_id, label)
-            if key in existing_keys:
-                return
-            BoardNode.objects.create(
-                board=board,
-                label=label,
-                kind=kind,
-                reference_id=ref_id,
-                x=px,
-                y=py,
-            )
-            existing_keys.add(key)
-
-        suspects = Suspect.objects.filter(case=case)
-        witness_evidence = WitnessEvidence.objects.filter(case=case)
-        biological_evidence = BiologicalEvidence.objects.filter(case=case)
-        vehicle_evidence = VehicleEvidence.objects.filter(case=case)
-        identification_evidence = IdentificationEvidence.objects.filter(case=case)
-        other_evidence = OtherEvidence.objects.filter(case=case)
-
-        for s in suspects:
-            add_if_missing(BoardNode.Kind.SUSPECT, s.id, f'Suspect: {s.full_name}', x, y)
-            x += 180
-
-        def add_evidence_nodes(rows, prefix):
-            nonlocal x
-            for row in rows:
-                add_if_missing(BoardNode.Kind.EVIDENCE, row.id, f'{prefix}: {row.title}', x, y + 150)
-                x += 180
-
-        add_evidence_nodes(witness_evidence, 'Witness')
-        add_evidence_nodes(biological_evidence, 'Biological')
-        add_evidence_nodes(vehicle_evidence, 'Vehicle')
-        add_evidence_nodes(identification_evidence, 'Identification')
-        add_evidence_nodes(other_evidence, 'Other')
-
     @decorators.action(detail=False, methods=['post'])
     def open_case_board(self, request):
         case_id = request.data.get('case_id')
@@ -132,7 +99,7 @@ class DetectiveBoardViewSet(viewsets.ModelViewSet):
             board.save(update_fields=['detective', 'updated_at'])
 
         # Sync missing suspect/evidence cards every time board is opened.
-        self._sync_board_nodes(board, case)
+        sync_board_nodes(board, case)
 
         context = {
             'board': DetectiveBoardSerializer(board).data,
@@ -149,6 +116,183 @@ class DetectiveBoardViewSet(viewsets.ModelViewSet):
         }
         return Response(context)
 
+    @decorators.action(detail=True, methods=['get'])
+    def changes(self, request, pk=None):
+        """Nodes and edges written after revision ``?since=``, plus ids deleted since then.
+
+        ``since=0`` (or a revision the board never reached) returns the whole
+        board with ``reset`` set; clients then store ``revision`` for the next call.
+        """
+        board, since, error = self._read_since(request, request.query_params.get('since', 0))
+        if error:
+            return error
+        return Response(board_changes(board, since))
+
+    @decorators.action(detail=True, methods=['get'], renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def stream(self, request, pk=None):
+        """Server-sent events carrying every change to the board as it is committed.
+
+        Resumes from ``Last-Event-ID`` (or ``?since=``); without either, the
+        first event is the whole board.
+        """
+        board, since, error = self._read_since(
+            request, request.headers.get('Last-Event-ID') or request.query_params.get('since', 0),
+        )
+        if error:
+            return error
+        live = BoardStream(board, since)
+        # Under ASGI an async iterator keeps waiting viewers off the worker threads.
+        events = live.aevents() if isinstance(request._request, ASGIRequest) else live.events()
+        return StreamingHttpResponse(
+            events,
+            content_type='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+
+    @decorators.action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """Connected components, suspect degree centrality and each suspect's evidence cluster.
+
+        ``?metrics=`` narrows the result; it is computed once per board revision.
+        """
+        board, error = self._readable_board(request)
+        if error:
+            return error
+        raw = request.query_params.get('metrics', '')
+        metrics = {name.strip() for name in raw.split(',') if name.strip()} & set(METRICS) or set(METRICS)
+        return Response(board_analytics(board, metrics))
+
+    @decorators.action(detail=True, methods=['get'])
+    def path(self, request, pk=None):
+        """Shortest chain of cards linking ``?from=`` to ``?to=`` (node ids); ``path`` is null when none exists."""
+        board, error = self._readable_board(request)
+        if error:
+            return error
+        graph = BoardGraph.load(board)
+        try:
+            source, target = int(request.query_params['from']), int(request.query_params['to'])
+        except (KeyError, ValueError):
+            return Response({'detail': 'from and to node ids are required'}, status=status.HTTP_400_BAD_REQUEST)
+        if source not in graph.nodes or target not in graph.nodes:
+            return Response({'detail': 'Both nodes must be on this board'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'revision': board.revision, 'from': source, 'to': target, 'path': graph.shortest_path(source, target),
+        })
+
+    def _readable_board(self, request):
+        board = self.get_object()
+        user = request.user
+        if not (user.is_superuser or require_action(user, 'case.read_all') or board.case.assigned_detective_id == user.id):
+            return board, Response({'detail': 'Only assigned detective can read this board'}, status=status.HTTP_403_FORBIDDEN)
+        return board, None
+
+    def _read_since(self, request, raw):
+        board, error = self._readable_board(request)
+        if error:
+            return board, None, error
+        try:
+            since = int(raw)
+        except (TypeError, ValueError):
+            since = -1
+        if since < 0:
+            return board, None, Response(
+                {'detail': 'since must be a non-negative revision'}, status=status.HTTP_400_BAD_REQUEST,
+            )
+        return board, since, None
+
+    @decorators.action(detail=True, methods=['post'])
+    def batch(self, request, pk=None):
+        """Apply many node and edge creates, updates and deletes in one transaction.
+
+        Ownership is checked once for the board and every change shares one
+        revision. Edges may name nodes created in the same batch by their ``ref``.
+        """
+        board = self.get_object()
+        if not request.user.is_superuser and board.case.assigned_detective_id != request.user.id:
+            return Response({'detail': 'Only assigned detective can modify board'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = BoardBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        create_nodes, update_nodes = data.get('create_nodes', []), data.get('update_nodes', [])
+        create_edges, update_edges = data.get('create_edges', []), data.get('update_edges', [])
+        delete_nodes, delete_edges = set(data.get('delete_nodes', [])), set(data.get('delete_edges', []))
+
+        with transaction.atomic():
+            # Taken first: the board row stays locked until commit, so other writers queue behind the batch.
+            revision = board.next_revision()
+            edge_ends = {
+                item[end] for item in create_edges + update_edges for end in ('from_node', 'to_node')
+                if isinstance(item.get(end), int)
+            }
+            nodes = board.nodes.in_bulk({item['id'] for item in update_nodes} | delete_nodes | edge_ends)
+            edges = board.edges.in_bulk({item['id'] for item in update_edges} | delete_edges)
+            missing = {
+                'nodes': sorted(({item['id'] for item in update_nodes} | delete_nodes | edge_ends) - set(nodes)),
+                'edges': sorted(({item['id'] for item in update_edges} | delete_edges) - set(edges)),
+            }
+            if missing['nodes'] or missing['edges']:
+                transaction.set_rollback(True)
+                return Response({'detail': 'Not on this board.', 'missing': missing}, status=status.HTTP_400_BAD_REQUEST)
+
+            new_nodes = [
+                BoardNode(board=board, revision=revision, **{k: v for k, v in item.items() if k not in ('id', 'ref')})
+                for item in create_nodes
+            ]
+            BoardNode.objects.bulk_create(new_nodes)
+            refs = {item['ref']: node for item, node in zip(create_nodes, new_nodes) if 'ref' in item}
+
+            def node_for(value):
+                node = refs.get(value) if isinstance(value, str) else nodes.get(value)
+                if node is None:
+                    raise serializers.ValidationError({'detail': f'Unknown node ref: {value}.'})
+                if node.pk in delete_nodes:
+                    raise serializers.ValidationError({'detail': f'Node {node.pk} is deleted in this batch.'})
+                return node
+
+            updated_nodes = self._apply_updates(nodes, update_nodes, revision, lambda field, value: value)
+            BoardNode.objects.bulk_update(updated_nodes, self._changed_fields(update_nodes))
+
+            new_edges = [
+                BoardEdge(
+                    board=board, revision=revision, reason=item.get('reason', ''),
+                    from_node=node_for(item['from_node']), to_node=node_for(item['to_node']),
+                )
+                for item in create_edges
+            ]
+            BoardEdge.objects.bulk_create(new_edges)
+            updated_edges = self._apply_updates(
+                edges, update_edges, revision, lambda field, value: value if field == 'reason' else node_for(value),
+            )
+            BoardEdge.objects.bulk_update(updated_edges, self._changed_fields(update_edges))
+
+            with batched_tombstones(revision):
+                # Edges of deleted nodes cascade, and are tombstoned along with them.
+                board.edges.filter(id__in=delete_edges).delete()
+                board.nodes.filter(id__in=delete_nodes).delete()
+
+        return Response({
+            'revision': revision,
+            'refs': {ref: node.pk for ref, node in refs.items()},
+            'nodes': BoardNodeSerializer(new_nodes + updated_nodes, many=True).data,
+            'edges': BoardEdgeSerializer(new_edges + updated_edges, many=True).data,
+        })
+
+    @staticmethod
+    def _changed_fields(items):
+        return sorted({field for item in items for field in item if field not in ('id', 'ref')} | {'revision'})
+
+    @staticmethod
+    def _apply_updates(rows, items, revision, convert):
+        updated = {}
+        for item in items:
+            row = rows[item['id']]
+            for field, value in item.items():
+                if field not in ('id', 'ref'):
+                    setattr(row, field, convert(field, value))
+            row.revision = revision
+            updated[row.pk] = row
+        return list(updated.values())
+
 
 class BoardNodeViewSet(viewsets.ModelViewSet):
     queryset = BoardNode.objects.select_related('board').all()
@@ -202,20 +346,13 @@ class BoardEdgeViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class SuspectViewSet(viewsets.ModelViewSet):
+class SuspectViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Suspect.objects.select_related('case').all()
     serializer_class = SuspectSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        qs = self.queryset
-        if user.is_superuser or require_action(user, 'case.read_all'):
-            return qs
-        return qs.filter(
-            Q(case__assigned_detective=user)
-            | Q(case__suspect_submissions__sergeant=user, case__suspect_submissions__status=SuspectSubmission.Status.APPROVED)
-        ).distinct()
+        return visible_suspects(self.request.user, self.queryset)
 
     def check_permissions(self, request):
         super().check_permissions(request)
@@ -267,14 +404,7 @@ class SuspectViewSet(viewsets.ModelViewSet):
     def arrest(self, request, pk=None):
         suspect = self.get_object()
         if not request.user.is_superuser:
-            is_assigned_detective = suspect.case.assigned_detective_id == request.user.id
-            is_case_sergeant = SuspectSubmission.objects.filter(
-                case=suspect.case,
-                status=SuspectSubmission.Status.APPROVED,
-                sergeant=request.user,
-                suspects=suspect,
-            ).exists()
-            if not (is_assigned_detective or is_case_sergeant):
+            if not (is_assigned_detective(request.user, suspect.case) or is_case_sergeant(request.user, suspect)):
                 return Response({'detail': 'Only case detective or case sergeant reviewer can arrest'}, status=403)
         suspect.status = Suspect.Status.ARRESTED
         suspect.save(update_fields=['status'])
@@ -322,7 +452,7 @@ class SuspectViewSet(viewsets.ModelViewSet):
         }, status=201)
 
 
-class InterrogationViewSet(viewsets.ModelViewSet):
+class InterrogationViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Interrogation.objects.select_related('case', 'suspect', 'detective', 'sergeant').all()
     serializer_class = InterrogationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -332,15 +462,7 @@ class InterrogationViewSet(viewsets.ModelViewSet):
         case_id = self.request.query_params.get('case_id')
         if case_id:
             qs = qs.filter(case_id=case_id)
-        user = self.request.user
-        if (
-            user.is_superuser
-            or require_action(user, 'case.read_all')
-            or require_action(user, 'interrogation.captain_decision')
-            or require_action(user, 'interrogation.chief_review')
-        ):
-            return qs.order_by('-id')
-        return qs.filter(Q(detective=user) | Q(sergeant=user)).order_by('-id')
+        return visible_interrogations(self.request.user, qs).order_by('-id')
 
     def check_permissions(self, request):
         super().check_permissions(request)
@@ -451,17 +573,11 @@ class InterrogationViewSet(viewsets.ModelViewSet):
         if wants_sergeant_update:
             if not require_action(request.user, 'suspect.manage'):
                 return Response({'detail': 'No permission for sergeant scoring.'}, status=403)
-            approved_submission = SuspectSubmission.objects.filter(
-                case=case,
-                status=SuspectSubmission.Status.APPROVED,
-                sergeant=request.user,
-                suspects=suspect,
-            ).exists()
-            is_case_sergeant = (
+            is_sergeant_reviewer = (
                 interrogation.sergeant_id == request.user.id
-                or approved_submission
+                or is_case_sergeant(request.user, suspect)
             )
-            if not request.user.is_superuser and not is_case_sergeant:
+            if not request.user.is_superuser and not is_sergeant_reviewer:
                 return Response({'detail': 'Only case sergeant reviewer can score.'}, status=403)
             if 'sergeant_score' in request.data and request.data.get('sergeant_score') is not None:
                 ss = int(request.data.get('sergeant_score'))
@@ -631,12 +747,13 @@ class InterrogationViewSet(viewsets.ModelViewSet):
         return Response(self.get_serializer(obj).data)
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PageNumberOrKeysetPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user)
+        return Notification.objects.filter(recipient=self.request.user).order_by('-created_at', '-id')
 
     @decorators.action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
@@ -650,6 +767,7 @@ class SuspectSubmissionViewSet(viewsets.ModelViewSet):
     queryset = SuspectSubmission.objects.select_related('case', 'detective', 'sergeant').prefetch_related('suspects').all()
     serializer_class = SuspectSubmissionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PageNumberOrKeysetPagination
 
     def get_queryset(self):
         qs = self.queryset
@@ -2,23 +2,19 @@ from rest_framework import decorators, permissions, viewsets
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 
+from cases.dossier import SECTIONS, CaseDossier, parse_sections
 from cases.models import Case
-from cases.serializers import CaseSerializer, CaseLogSerializer
-from evidence.models import WitnessEvidence, BiologicalEvidence, VehicleEvidence, IdentificationEvidence, OtherEvidence
-from evidence.serializers import (
-    WitnessEvidenceSerializer,
-    BiologicalEvidenceSerializer,
-    VehicleEvidenceSerializer,
-    IdentificationEvidenceSerializer,
-    OtherEvidenceSerializer,
-)
+from cases.reports import report_response
 from investigation.models import Suspect
-from investigation.serializers import SuspectSerializer, InterrogationSerializer, SuspectSubmissionSerializer
 from rbac.permissions import user_has_action
 from .models import CourtSession
 from .serializers import CourtSessionSerializer
 
 
+SUMMARY_SECTIONS = [section for section in SECTIONS if section != 'witnesses']
+SUMMARY_MEMBER_SOURCES = ('case', 'logs', 'interrogations', 'suspect_submissions')
+
+
 class CourtSessionViewSet(viewsets.ModelViewSet):
     queryset = CourtSession.objects.select_related('case', 'judge', 'convicted_suspect').all()
     serializer_class = CourtSessionSerializer
@@ -35,67 +31,24 @@ class CourtSessionViewSet(viewsets.ModelViewSet):
         if not case_id:
             return Response({'detail': 'case_id is required'}, status=400)
 
-        case = Case.objects.filter(id=case_id).select_related('created_by', 'assigned_detective').first()
+        case = Case.objects.filter(id=case_id).first()
         if not case:
             return Response({'detail': 'Case not found'}, status=404)
 
-        suspects = Suspect.objects.filter(case=case)
-        interrogations = case.interrogations.select_related(
-            'detective', 'sergeant', 'captain_by', 'chief_by', 'suspect'
-        ).all()
-        submissions = case.suspect_submissions.select_related('detective', 'sergeant').prefetch_related('suspects').all()
-
-        involved_users = {}
-        for u in [case.created_by, case.assigned_detective]:
-            if u:
-                involved_users[u.id] = u
-        for log in case.logs.select_related('actor').all():
-            involved_users[log.actor_id] = log.actor
-        for i in interrogations:
-            for u in [i.detective, i.sergeant, i.captain_by, i.chief_by]:
-                if u:
-                    involved_users[u.id] = u
-        for s in submissions:
-            for u in [s.detective, s.sergeant]:
-                if u:
-                    involved_users[u.id] = u
-
-        def user_row(u):
-            return {
-                'id': u.id,
-                'username': u.username,
-                'first_name': u.first_name,
-                'last_name': u.last_name,
-                'national_id': u.national_id,
-                'roles': list(u.user_roles.values_list('role__name', flat=True)),
-            }
-
-        payload = {
-            'case': CaseSerializer(case).data,
-            'complainant_details': [
-                {
-                    'id': row.id,
-                    'status': row.status,
-                    'review_note': row.review_note,
-                    'user': user_row(row.user),
-                }
-                for row in case.complainants.select_related('user').all()
-            ],
-            'evidence': {
-                'witness': WitnessEvidenceSerializer(WitnessEvidence.objects.filter(case=case), many=True).data,
-                'biological': BiologicalEvidenceSerializer(BiologicalEvidence.objects.filter(case=case), many=True).data,
-                'vehicle': VehicleEvidenceSerializer(VehicleEvidence.objects.filter(case=case), many=True).data,
-                'identification': IdentificationEvidenceSerializer(IdentificationEvidence.objects.filter(case=case), many=True).data,
-                'other': OtherEvidenceSerializer(OtherEvidence.objects.filter(case=case), many=True).data,
-            },
-            'suspects': SuspectSerializer(suspects, many=True).data,
-            'interrogations': InterrogationSerializer(interrogations, many=True).data,
-            'suspect_submissions': SuspectSubmissionSerializer(submissions, many=True).data,
-            'logs': CaseLogSerializer(case.logs.all(), many=True).data,
-            'involved_members': [user_row(u) for u in involved_users.values()],
-            'court_sessions': CourtSessionSerializer(case.court_sessions.order_by('-id'), many=True).data,
-        }
-        return Response(payload)
+        sections = parse_sections(request, SUMMARY_SECTIONS)
+
+        dossier = CaseDossier(case, sections, member_sources=SUMMARY_MEMBER_SOURCES)
+        keys = {'complainants': 'complainant_details'}
+
+        def build():
+            return dossier.payload(keys)
+
+        def stream():
+            return dossier.stream(keys)
+
+        return report_response(
+            request, 'summary', case, build, variant=','.join(sorted(sections)), stream=stream,
+        )
 
     def perform_create(self, serializer):
         case = serializer.validated_data['case']
@@ -1,8 +1,10 @@
 from rest_framework import serializers
+
+from core.sparse import SparseFieldsMixin
 from .models import BailPayment
 
 
-class BailPaymentSerializer(serializers.ModelSerializer):
+class BailPaymentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     def validate_amount(self, value):
         if value is None:
             raise serializers.ValidationError('Amount is required.')
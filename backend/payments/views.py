@@ -12,8 +12,9 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 from cases.models import Case
+from core.sparse import SparseQuerysetMixin
 from investigation.models import Suspect
-from rbac.permissions import user_has_action
+from rbac.permissions import user_has_action, user_role_names
 from .models import BailPayment
 from .serializers import BailPaymentSerializer
 
@@ -21,7 +22,7 @@ from .serializers import BailPaymentSerializer
 def is_sergeant_user(user):
     if user.is_superuser:
         return True
-    role_names = [r.lower().strip() for r in user.user_roles.values_list('role__name', flat=True)]
+    role_names = [r.lower().strip() for r in user_role_names(user)]
     return any(x in role_names for x in ['sergeant', 'sergent', 'sargent'])
 
 
@@ -46,7 +47,7 @@ def zarinpal_post(url, payload):
         raise ValidationError(f'Gateway HTTP {exc.code}: {err_text}')
 
 
-class BailPaymentViewSet(viewsets.ModelViewSet):
+class BailPaymentViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = BailPayment.objects.select_related('case', 'suspect', 'created_by').all()
     serializer_class = BailPaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
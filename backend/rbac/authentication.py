@@ -0,0 +1,18 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .permissions import seed_permission_snapshot
+from .tokens import snapshot_from_token
+
+
+class PolicyJWTAuthentication(JWTAuthentication):
+    """JWT authentication that trusts RBAC claims while the policy and role versions are current."""
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None:
+            return None
+        user, token = result
+        snapshot = snapshot_from_token(token)
+        if snapshot is not None:
+            seed_permission_snapshot(user, snapshot)
+        return result
@@ -0,0 +1,12 @@
+from .permissions import permission_scope
+
+
+class PermissionSnapshotMiddleware:
+    """Scope RBAC permission snapshots to a single request/response cycle."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with permission_scope():
+            return self.get_response(request)
@@ -1,10 +1,77 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from rest_framework.permissions import BasePermission
 
+from .policy import role_actions_map, user_role_ids
+from .ranks import rank_for_role_names
+
+# Per-request store of permission snapshots keyed by user id.
+# It is None outside of a request scope, in which case nothing is cached.
+_snapshots = ContextVar('rbac_permission_snapshots', default=None)
+
+
+class PermissionSnapshot:
+    __slots__ = ('role_names', 'actions', 'rank')
+
+    def __init__(self, role_names=(), actions=(), rank=None):
+        self.role_names = frozenset(role_names)
+        self.actions = frozenset(actions)
+        self.rank = rank_for_role_names(self.role_names) if rank is None else rank
+
+
+EMPTY_SNAPSHOT = PermissionSnapshot()
+
+
+@contextmanager
+def permission_scope():
+    token = _snapshots.set({})
+    try:
+        yield
+    finally:
+        _snapshots.reset(token)
+
+
+def load_permission_snapshot(user):
+    roles = role_actions_map()
+    role_names = set()
+    actions = set()
+    for role_id in user_role_ids(user.pk):
+        if role_id not in roles:
+            continue
+        role_name, role_actions = roles[role_id]
+        role_names.add(role_name)
+        actions.update(role_actions)
+    return PermissionSnapshot(role_names, actions)
+
+
+def seed_permission_snapshot(user, snapshot):
+    """Install a snapshot obtained elsewhere (e.g. token claims) for this request."""
+    snapshots = _snapshots.get()
+    if snapshots is not None and getattr(user, 'pk', None):
+        snapshots[user.pk] = snapshot
+
+
+def get_permission_snapshot(user):
+    if not getattr(user, 'pk', None):
+        return EMPTY_SNAPSHOT
+    snapshots = _snapshots.get()
+    if snapshots is None:
+        return load_permission_snapshot(user)
+    snapshot = snapshots.get(user.pk)
+    if snapshot is None:
+        snapshot = snapshots[user.pk] = load_permission_snapshot(user)
+    return snapshot
+
+
+def user_role_names(user):
+    return get_permission_snapshot(user).role_names
+
 
 def user_has_action(user, action: str) -> bool:
     if user.is_superuser:
         return True
-    return user.user_roles.filter(role__permissions__action=action).exists()
+    return action in get_permission_snapshot(user).actions
 
 
 class HasActionPermission(BasePermission):
@@ -0,0 +1,133 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Role, UserRole
+
+VERSION_KEY = 'rbac:policy:version'
+
+
+def _cache():
+    return caches[getattr(settings, 'RBAC_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'RBAC_POLICY_CACHE_TIMEOUT', 300)
+
+
+def _get_version(key):
+    cache = _cache()
+    version = cache.get(key)
+    if version is None:
+        # Start from a time based value so a restarted process never reuses
+        # version numbers that were handed out before (e.g. inside tokens).
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    cache = _cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        _get_version(key)
+        return cache.incr(key)
+
+
+def _user_version_key(user_id):
+    return f'rbac:user:{user_id}:version'
+
+
+def get_policy_version():
+    """Version of the roles and the actions they grant."""
+    return _get_version(VERSION_KEY)
+
+
+def bump_policy_version():
+    return _bump_version(VERSION_KEY)
+
+
+def get_user_role_version(user_id):
+    """Version of one user's role assignments."""
+    return _get_version(_user_version_key(user_id))
+
+
+def bump_user_role_version(user_id):
+    return _bump_version(_user_version_key(user_id))
+
+
+class VersionBump:
+    """Bumps the policy version, or one user's role version, when called on commit."""
+
+    def __init__(self, user_id=None):
+        self.user_id = user_id
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        if self.user_id is None:
+            bump_policy_version()
+        else:
+            bump_user_role_version(self.user_id)
+
+
+def bump_on_commit(user_id=None, using=None):
+    # Bumping any earlier would let concurrent readers, or a transaction that
+    # later rolls back, cache rows that are not committed under the new version.
+    transaction.on_commit(VersionBump(user_id), using=using)
+
+
+def _pending(user_id=None):
+    """Whether the open transaction changed this part of the policy without committing yet.
+
+    Such reads bypass the cache: they must see their own changes but may not
+    store them. Callbacks of rolled back savepoints are discarded with them.
+    """
+    connection = transaction.get_connection()
+    return connection.in_atomic_block and any(
+        isinstance(func, VersionBump) and not func.done and func.user_id == user_id
+        for _, func, _ in connection.run_on_commit
+    )
+
+
+def role_actions_map():
+    """Return {role_id: (role_name, frozenset(actions))} for every role."""
+    cache = _cache()
+    pending = _pending()
+    key = f'rbac:policy:{get_policy_version()}:roles'
+    data = None if pending else cache.get(key)
+    if data is None:
+        names = {}
+        actions = {}
+        for role_id, name, action in Role.objects.values_list('id', 'name', 'permissions__action'):
+            names[role_id] = name
+            actions.setdefault(role_id, set())
+            if action:
+                actions[role_id].add(action)
+        data = {role_id: (names[role_id], frozenset(actions[role_id])) for role_id in names}
+        if not pending:
+            cache.set(key, data, _timeout())
+    return data
+
+
+def _user_key(user_id):
+    return f'rbac:user:{user_id}:{get_user_role_version(user_id)}:roles'
+
+
+def user_role_ids(user_id):
+    cache = _cache()
+    pending = _pending(user_id)
+    key = _user_key(user_id)
+    role_ids = None if pending else cache.get(key)
+    if role_ids is None:
+        role_ids = tuple(UserRole.objects.filter(user_id=user_id).values_list('role_id', flat=True))
+        if not pending:
+            cache.set(key, role_ids, _timeout())
+    return role_ids
+
+
+def forget_user(user_id):
+    _cache().delete(_user_key(user_id))
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+
+from .models import UserRole
+
+POLICE_RANK = {
+    'cadet': 1,
+    'patrol officer': 2,
+    'police officer': 3,
+    'detective': 3,
+    'sergeant': 4,
+    'captain': 5,
+    'chief': 6,
+}
+
+
+def rank_for_role_names(role_names):
+    ranks = [POLICE_RANK[r.lower()] for r in role_names if r.lower() in POLICE_RANK]
+    return max(ranks) if ranks else 0
+
+
+def refresh_police_ranks(user_ids):
+    """Recompute the materialized ``User.police_rank`` for the given users."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    names = {user_id: [] for user_id in user_ids}
+    for user_id, role_name in UserRole.objects.filter(user_id__in=user_ids).values_list('user_id', 'role__name'):
+        names[user_id].append(role_name)
+    by_rank = {}
+    for user_id, role_names in names.items():
+        by_rank.setdefault(rank_for_role_names(role_names), []).append(user_id)
+    User = get_user_model()
+    for rank, ids in by_rank.items():
+        User.objects.filter(id__in=ids).exclude(police_rank=rank).update(police_rank=rank)
+
+
+def ranks_for_users(user_ids):
+    """Return ``{user_id: rank}`` for many users in one query."""
+    return dict(get_user_model().objects.filter(id__in=set(user_ids)).values_list('id', 'police_rank'))
+
+
+def superiors_of(user):
+    """Users whose police rank is strictly higher than ``user``'s."""
+    return get_user_model().objects.filter(police_rank__gt=user.police_rank)
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from .checks import MAX_CHECKS
 from .models import Role, RolePermission, UserRole
 
 User = get_user_model()
@@ -44,3 +45,14 @@ class UserRoleSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserRole
         fields = ('id', 'user', 'username', 'role', 'role_name')
+
+
+class PermissionCheckItemSerializer(serializers.Serializer):
+    action = serializers.CharField(max_length=120)
+    case = serializers.IntegerField(required=False)
+    suspect = serializers.IntegerField(required=False)
+    interrogation = serializers.IntegerField(required=False)
+
+
+class PermissionCheckSerializer(serializers.Serializer):
+    checks = PermissionCheckItemSerializer(many=True, allow_empty=False, max_length=MAX_CHECKS)
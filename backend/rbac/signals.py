@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Role, RolePermission, UserRole
+from .policy import bump_on_commit, forget_user
+from .ranks import refresh_police_ranks
+
+
+def invalidate_policy(using=None, **kwargs):
+    bump_on_commit(using=using)
+
+
+for model in (Role, RolePermission):
+    post_save.connect(invalidate_policy, sender=model, dispatch_uid=f'rbac_policy_save_{model.__name__}')
+    post_delete.connect(invalidate_policy, sender=model, dispatch_uid=f'rbac_policy_delete_{model.__name__}')
+
+
+@receiver(post_save, sender=UserRole, dispatch_uid='rbac_user_role_version_save')
+@receiver(post_delete, sender=UserRole, dispatch_uid='rbac_user_role_version_delete')
+def invalidate_user_roles(sender, instance, using=None, **kwargs):
+    # Only this user's cached roles and tokens go stale; everyone else's stay warm.
+    bump_on_commit(instance.user_id, using=using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid='rbac_policy_new_user')
+def forget_new_user(sender, instance, created, **kwargs):
+    # Primary keys can be reused (e.g. after a rollback); never trust an old entry.
+    if created:
+        forget_user(instance.pk)
+
+
+@receiver(post_save, sender=UserRole, dispatch_uid='rbac_rank_user_role_save')
+@receiver(post_delete, sender=UserRole, dispatch_uid='rbac_rank_user_role_delete')
+def refresh_rank_for_assignment(sender, instance, **kwargs):
+    refresh_police_ranks([instance.user_id])
+
+
+@receiver(post_save, sender=Role, dispatch_uid='rbac_rank_role_save')
+def refresh_rank_for_role(sender, instance, created, update_fields=None, **kwargs):
+    # Only a rename can change the rank a role grants.
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    refresh_police_ranks(instance.user_roles.values_list('user_id', flat=True))
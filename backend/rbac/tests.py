@@ -1,7 +1,17 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 
-from rbac.models import Role, UserRole
+from cases.models import Case
+from investigation.models import Interrogation, Suspect
+from rbac.models import Role, RolePermission, UserRole
+from rbac.permissions import permission_scope, user_has_action, user_role_names
+from rbac.policy import get_policy_version, role_actions_map
+from rbac.ranks import POLICE_RANK, ranks_for_users, superiors_of
 
 User = get_user_model()
 
@@ -41,3 +51,268 @@ class RBACRoleDeleteTests(APITestCase):
         self.assertEqual(resp.data['removed_user_roles'], 2)
         self.assertFalse(Role.objects.filter(id=self.role.id).exists())
         self.assertEqual(UserRole.objects.filter(role_id=self.role.id).count(), 0)
+
+
+class PermissionSnapshotTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='rbac_snap',
+            password='Strong12345',
+            email='rbac_snap@example.com',
+            phone='09120001114',
+            national_id='9000000004',
+        )
+        role = Role.objects.create(name='detective')
+        RolePermission.objects.create(role=role, action='investigation.board.manage')
+        RolePermission.objects.create(role=role, action='suspect.manage')
+        UserRole.objects.create(user=self.user, role=role)
+
+    def test_checks_inside_scope_share_one_load(self):
+        with permission_scope():
+            with self.assertNumQueries(2):
+                self.assertTrue(user_has_action(self.user, 'investigation.board.manage'))
+                self.assertTrue(user_has_action(self.user, 'suspect.manage'))
+                self.assertFalse(user_has_action(self.user, 'judiciary.verdict'))
+                self.assertEqual(user_role_names(self.user), {'detective'})
+
+    def test_checks_outside_scope_are_not_cached(self):
+        self.assertFalse(user_has_action(self.user, 'judiciary.verdict'))
+        judge = Role.objects.create(name='judge')
+        RolePermission.objects.create(role=judge, action='judiciary.verdict')
+        UserRole.objects.create(user=self.user, role=judge)
+        self.assertTrue(user_has_action(self.user, 'judiciary.verdict'))
+
+    def test_modules_endpoint_loads_permissions_once(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(3):
+            resp = self.client.get('/api/dashboard/modules/')
+        self.assertEqual(resp.status_code, 200)
+        keys = {m['key'] for m in resp.data['modules']}
+        self.assertIn('detective_board', keys)
+
+
+class PolicyCacheTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='rbac_policy_admin',
+            password='Strong12345',
+            email='rbac_policy_admin@example.com',
+            phone='09120001115',
+            national_id='9000000005',
+        )
+        self.user = User.objects.create_user(
+            username='rbac_policy_user',
+            password='Strong12345',
+            email='rbac_policy_user@example.com',
+            phone='09120001116',
+            national_id='9000000006',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role = Role.objects.create(name='cadet')
+            RolePermission.objects.create(role=self.role, action='case.complaint.intern_review')
+            UserRole.objects.create(user=self.user, role=self.role)
+
+    def test_warm_cache_answers_without_queries(self):
+        self.assertTrue(user_has_action(self.user, 'case.complaint.intern_review'))
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_action(self.user, 'case.complaint.intern_review'))
+            self.assertEqual(user_role_names(self.user), {'cadet'})
+
+    def test_role_update_replacing_permissions_invalidates_cache(self):
+        self.assertTrue(user_has_action(self.user, 'case.complaint.intern_review'))
+        version = get_policy_version()
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.patch(
+                f'/api/rbac/roles/{self.role.id}/',
+                {'permissions': [{'action': 'case.read_all'}]},
+                format='json',
+            )
+        self.assertEqual(resp.status_code, 200)
+        self.assertGreater(get_policy_version(), version)
+        self.assertFalse(user_has_action(self.user, 'case.complaint.intern_review'))
+        self.assertTrue(user_has_action(self.user, 'case.read_all'))
+
+    def test_seed_roles_invalidates_cache(self):
+        self.assertFalse(user_has_action(self.user, 'case.read_all'))
+        call_command('seed_roles', stdout=StringIO())
+        self.assertTrue(user_has_action(self.user, 'case.read_all'))
+
+    def test_removing_assignment_invalidates_cache(self):
+        self.assertEqual(user_role_names(self.user), {'cadet'})
+        UserRole.objects.filter(user=self.user).delete()
+        self.assertEqual(user_role_names(self.user), set())
+
+    def test_other_users_assignments_keep_cache_warm(self):
+        self.assertTrue(user_has_action(self.user, 'case.complaint.intern_review'))
+        version = get_policy_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.create(user=self.admin, role=self.role)
+        self.assertEqual(get_policy_version(), version)
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_action(self.user, 'case.complaint.intern_review'))
+        self.assertEqual(user_role_names(self.admin), {'cadet'})
+
+    def test_rolled_back_changes_are_not_cached(self):
+        self.assertEqual(user_role_names(self.user), {'cadet'})
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                UserRole.objects.filter(user=self.user).delete()
+                RolePermission.objects.create(role=self.role, action='case.read_all')
+                self.assertEqual(user_role_names(self.user), set())
+                self.assertIn('case.read_all', role_actions_map()[self.role.id][1])
+                raise RuntimeError
+        with self.assertNumQueries(0):
+            self.assertEqual(user_role_names(self.user), {'cadet'})
+        self.assertFalse(role_actions_map()[self.role.id][1] & {'case.read_all'})
+
+
+class PoliceRankTests(APITestCase):
+    def make_user(self, name, n):
+        return User.objects.create_user(
+            username=name,
+            password='Strong12345',
+            email=f'{name}@example.com',
+            phone=f'0912000{n:04d}',
+            national_id=f'91000{n:05d}',
+        )
+
+    def setUp(self):
+        self.cadet_role = Role.objects.create(name='Cadet')
+        self.captain_role = Role.objects.create(name='captain')
+        self.cadet = self.make_user('rank_cadet', 1)
+        self.captain = self.make_user('rank_captain', 2)
+        UserRole.objects.create(user=self.cadet, role=self.cadet_role)
+        UserRole.objects.create(user=self.captain, role=self.captain_role)
+
+    def test_rank_follows_role_assignments(self):
+        self.cadet.refresh_from_db()
+        self.assertEqual(self.cadet.police_rank, POLICE_RANK['cadet'])
+        UserRole.objects.create(user=self.cadet, role=self.captain_role)
+        self.cadet.refresh_from_db()
+        self.assertEqual(self.cadet.police_rank, POLICE_RANK['captain'])
+        UserRole.objects.filter(user=self.cadet).delete()
+        self.cadet.refresh_from_db()
+        self.assertEqual(self.cadet.police_rank, 0)
+
+    def test_role_rename_updates_rank(self):
+        self.cadet_role.name = 'chief'
+        self.cadet_role.save()
+        self.cadet.refresh_from_db()
+        self.assertEqual(self.cadet.police_rank, POLICE_RANK['chief'])
+
+    def test_batch_ranks_and_superiors(self):
+        with self.assertNumQueries(1):
+            ranks = ranks_for_users([self.cadet.id, self.captain.id])
+        self.assertEqual(ranks, {self.cadet.id: 1, self.captain.id: 5})
+        self.cadet.refresh_from_db()
+        self.assertEqual(list(superiors_of(self.cadet)), [self.captain])
+
+
+class PermissionCheckEndpointTests(APITestCase):
+    def setUp(self):
+        self.detective = User.objects.create_user(
+            username='check_det',
+            password='Strong12345',
+            email='check_det@example.com',
+            phone='09120002001',
+            national_id='9200000001',
+        )
+        self.other = User.objects.create_user(
+            username='check_other',
+            password='Strong12345',
+            email='check_other@example.com',
+            phone='09120002002',
+            national_id='9200000002',
+        )
+        role = Role.objects.create(name='detective')
+        RolePermission.objects.create(role=role, action='investigation.board.manage')
+        RolePermission.objects.create(role=role, action='suspect.manage')
+        RolePermission.objects.create(role=role, action='case.read_all')
+        UserRole.objects.create(user=self.detective, role=role)
+        UserRole.objects.create(user=self.other, role=role)
+        self.case = Case.objects.create(
+            title='c', description='d', source=Case.Source.SCENE,
+            created_by=self.detective, assigned_detective=self.detective,
+        )
+        self.suspect = Suspect.objects.create(case=self.case, full_name='S')
+
+    def check(self, user, checks):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/rbac/check/', {'checks': checks}, format='json')
+
+    def test_object_rules_follow_assignment(self):
+        checks = [
+            {'action': 'investigation.board.manage', 'case': self.case.id},
+            {'action': 'suspect.manage', 'suspect': self.suspect.id},
+            {'action': 'judiciary.verdict'},
+            {'action': 'case.read_all', 'case': 999999},
+        ]
+        mine = self.check(self.detective, checks)
+        self.assertEqual(mine.status_code, 200)
+        self.assertEqual([r['allowed'] for r in mine.data['results']], [True, True, False, False])
+        self.assertEqual(mine.data['results'][3]['detail'], 'case not found')
+
+        theirs = self.check(self.other, checks)
+        self.assertEqual([r['allowed'] for r in theirs.data['results']], [False, False, False, False])
+
+    def test_answers_match_the_object_endpoints(self):
+        # Assigned, but neither creator nor complainant and without case.read_all.
+        assignee = User.objects.create_user(
+            username='check_assignee',
+            password='Strong12345',
+            email='check_assignee@example.com',
+            phone='09120002003',
+            national_id='9200000003',
+        )
+        role = Role.objects.create(name='check_assignee_role')
+        RolePermission.objects.create(role=role, action='suspect.manage')
+        RolePermission.objects.create(role=role, action='interrogation.manage')
+        UserRole.objects.create(user=assignee, role=role)
+        case = Case.objects.create(
+            title='c2', description='d', source=Case.Source.SCENE,
+            created_by=self.detective, assigned_detective=assignee,
+        )
+        interrogation = Interrogation.objects.create(
+            case=self.case, suspect=self.suspect, detective=self.detective, sergeant=self.other,
+        )
+
+        results = self.check(assignee, [
+            {'action': 'suspect.manage', 'case': case.id},
+            {'action': 'interrogation.manage', 'interrogation': interrogation.id},
+        ]).data['results']
+        self.assertEqual([r['allowed'] for r in results], [False, False])
+        self.assertEqual(self.client.get(f'/api/cases/cases/{case.id}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/investigation/interrogations/{interrogation.id}/').status_code, 404)
+
+        reviewer = User.objects.create_user(
+            username='check_captain',
+            password='Strong12345',
+            email='check_captain@example.com',
+            phone='09120002004',
+            national_id='9200000004',
+        )
+        role = Role.objects.create(name='check_captain_role')
+        RolePermission.objects.create(role=role, action='interrogation.captain_decision')
+        UserRole.objects.create(user=reviewer, role=role)
+        results = self.check(reviewer, [
+            {'action': 'interrogation.captain_decision', 'interrogation': interrogation.id},
+            {'action': 'interrogation.captain_decision', 'interrogation': interrogation.id + 1000},
+        ]).data['results']
+        self.assertEqual([r['allowed'] for r in results], [True, False])
+        self.assertEqual(results[1]['detail'], 'interrogation not found')
+        self.assertEqual(self.client.get(f'/api/investigation/interrogations/{interrogation.id}/').status_code, 200)
+
+    def test_query_count_does_not_grow_with_items(self):
+        self.check(self.detective, [{'action': 'case.read_all'}])
+        few = [{'action': 'suspect.manage', 'suspect': self.suspect.id, 'case': self.case.id}]
+        many = few * 50
+        with CaptureQueriesContext(connection) as small:
+            self.check(self.detective, few)
+        with CaptureQueriesContext(connection) as large:
+            self.check(self.detective, many)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_requires_checks(self):
+        resp = self.check(self.detective, [])
+        self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .permissions import PermissionSnapshot, load_permission_snapshot
+from .policy import get_policy_version, get_user_role_version
+
+ROLES_CLAIM = 'roles'
+RANK_CLAIM = 'rank'
+ACTIONS_CLAIM = 'act'
+VERSION_CLAIM = 'rbac_v'
+USER_VERSION_CLAIM = 'rbac_uv'
+
+
+def encode_actions(actions):
+    """Group dotted actions by their first segment: ``case=read_all,send_to_court;tip=submit``."""
+    groups = {}
+    for action in actions:
+        prefix, _, rest = action.partition('.')
+        groups.setdefault(prefix, []).append(rest)
+    return ';'.join(f'{prefix}={",".join(sorted(rest))}' for prefix, rest in sorted(groups.items()))
+
+
+def decode_actions(value):
+    actions = set()
+    for group in filter(None, (value or '').split(';')):
+        prefix, _, rest = group.partition('=')
+        for suffix in rest.split(','):
+            actions.add(f'{prefix}.{suffix}' if suffix else prefix)
+    return actions
+
+
+def add_policy_claims(token, user):
+    # Read the versions first: if the policy or the user's roles change while we
+    # build the claims, the token carries an older version and is simply not trusted.
+    version = get_policy_version()
+    user_version = get_user_role_version(user.pk)
+    snapshot = load_permission_snapshot(user)
+    token[VERSION_CLAIM] = version
+    token[USER_VERSION_CLAIM] = user_version
+    token[ROLES_CLAIM] = sorted(snapshot.role_names)
+    token[RANK_CLAIM] = snapshot.rank
+    token[ACTIONS_CLAIM] = encode_actions(snapshot.actions)
+    return token
+
+
+def snapshot_from_token(token):
+    """Return a PermissionSnapshot from token claims, or None if they are missing or stale.
+
+    The roles' actions and the user's own assignments are versioned apart, so
+    changes to other users' roles leave the token trusted.
+    """
+    version = token.get(VERSION_CLAIM)
+    if version is None or version != get_policy_version():
+        return None
+    user_version = token.get(USER_VERSION_CLAIM)
+    if user_version is None or user_version != get_user_role_version(token.get(api_settings.USER_ID_CLAIM)):
+        return None
+    return PermissionSnapshot(
+        token.get(ROLES_CLAIM, []),
+        decode_actions(token.get(ACTIONS_CLAIM, '')),
+        token.get(RANK_CLAIM),
+    )
+
+
+class PolicyRefreshToken(RefreshToken):
+    _user = None
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token._user = user
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user = self._user
+        if user is None:
+            user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+            user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is not None:
+            add_policy_claims(access, user)
+        return access
+
+
+class PolicyTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = PolicyRefreshToken
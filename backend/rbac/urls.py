@@ -1,8 +1,11 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import RoleViewSet, UserRoleViewSet
+from .views import PermissionCheckView, RoleViewSet, UserRoleViewSet
 
 router = DefaultRouter()
 router.register('roles', RoleViewSet, basename='roles')
 router.register('user-roles', UserRoleViewSet, basename='user-roles')
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path('check/', PermissionCheckView.as_view()),
+]
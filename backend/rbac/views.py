@@ -1,7 +1,9 @@
 from rest_framework import permissions, viewsets
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from .checks import evaluate_checks
 from .models import Role, UserRole
-from .serializers import RoleSerializer, UserRoleSerializer
+from .serializers import PermissionCheckSerializer, RoleSerializer, UserRoleSerializer
 
 
 class SuperuserOnly(permissions.BasePermission):
@@ -29,3 +31,12 @@ class UserRoleViewSet(viewsets.ModelViewSet):
     queryset = UserRole.objects.select_related('user', 'role').all().order_by('id')
     serializer_class = UserRoleSerializer
     permission_classes = [SuperuserOnly]
+
+
+class PermissionCheckView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = PermissionCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'results': evaluate_checks(request.user, serializer.validated_data['checks'])})
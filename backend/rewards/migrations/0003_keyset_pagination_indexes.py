@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0005_keyset_pagination_indexes'),
+        ('investigation', '0006_keyset_pagination_indexes'),
+        ('rewards', '0002_tip_assigned_detective_tip_detective_note_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tip',
+            index=models.Index(fields=['created_at', 'id'], name='tip_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tip',
+            index=models.Index(fields=['submitter', 'created_at', 'id'], name='tip_submitter_created_idx'),
+        ),
+    ]
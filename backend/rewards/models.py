@@ -26,6 +26,12 @@ class Tip(models.Model):
     status = models.CharField(max_length=30, choices=Status.choices, default=Status.PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='tip_created_idx'),
+            models.Index(fields=['submitter', 'created_at', 'id'], name='tip_submitter_created_idx'),
+        ]
+
 
 class RewardClaim(models.Model):
     tip = models.OneToOneField(Tip, on_delete=models.CASCADE, related_name='claim')
@@ -1,8 +1,10 @@
 from rest_framework import serializers
+
+from core.sparse import SparseFieldsMixin
 from .models import Tip, RewardClaim
 
 
-class TipSerializer(serializers.ModelSerializer):
+class TipSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     claim = serializers.SerializerMethodField(read_only=True)
 
     def get_claim(self, obj):
@@ -32,7 +34,7 @@ class TipSerializer(serializers.ModelSerializer):
         read_only_fields = ('submitter', 'assigned_detective')
 
 
-class RewardClaimSerializer(serializers.ModelSerializer):
+class RewardClaimSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = RewardClaim
         fields = '__all__'
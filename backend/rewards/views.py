@@ -3,8 +3,10 @@ from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 
 from cases.models import Case
+from core.pagination import PageNumberOrKeysetPagination
+from core.sparse import SparseQuerysetMixin
 from investigation.models import Suspect
-from rbac.permissions import user_has_action
+from rbac.permissions import user_has_action, user_role_names
 from .models import Tip, RewardClaim
 from .serializers import TipSerializer, RewardClaimSerializer
 
@@ -23,7 +25,7 @@ POLICE_ROLE_KEYWORDS = [
 def is_police_rank_user(user):
     if user.is_superuser:
         return True
-    role_names = {r.lower().strip() for r in user.user_roles.values_list('role__name', flat=True)}
+    role_names = {r.lower().strip() for r in user_role_names(user)}
     for role_name in role_names:
         if any(k in role_name for k in POLICE_ROLE_KEYWORDS):
             return True
@@ -33,22 +35,23 @@ def is_police_rank_user(user):
 def is_base_user_only(user):
     if user.is_superuser:
         return False
-    role_names = {r.lower().strip() for r in user.user_roles.values_list('role__name', flat=True)}
+    role_names = {r.lower().strip() for r in user_role_names(user)}
     return role_names == {'base user'}
 
 
-class TipViewSet(viewsets.ModelViewSet):
-    queryset = Tip.objects.select_related('submitter', 'case', 'suspect').all()
+class TipViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Tip.objects.select_related('submitter', 'case', 'suspect', 'claim').all()
     serializer_class = TipSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PageNumberOrKeysetPagination
 
     def get_queryset(self):
         user = self.request.user
         if has_action(user, 'case.read_all') or has_action(user, 'tip.officer_review') or has_action(user, 'tip.detective_review'):
             if has_action(user, 'tip.detective_review') and not has_action(user, 'case.read_all') and not has_action(user, 'tip.officer_review'):
-                return self.queryset.filter(assigned_detective=user).order_by('-created_at')
-            return self.queryset.order_by('-created_at')
-        return self.queryset.filter(submitter=user).order_by('-created_at')
+                return self.queryset.filter(assigned_detective=user).order_by('-created_at', '-id')
+            return self.queryset.order_by('-created_at', '-id')
+        return self.queryset.filter(submitter=user).order_by('-created_at', '-id')
 
     def perform_create(self, serializer):
         if not has_action(self.request.user, 'tip.submit'):
@@ -133,7 +136,7 @@ class TipViewSet(viewsets.ModelViewSet):
         return Response(self.get_serializer(tip).data)
 
 
-class RewardClaimViewSet(viewsets.ReadOnlyModelViewSet):
+class RewardClaimViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = RewardClaim.objects.select_related('tip', 'tip__submitter').all()
     serializer_class = RewardClaimSerializer
     permission_classes = [permissions.IsAuthenticated]
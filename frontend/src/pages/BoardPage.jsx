@@ -200,7 +200,7 @@ export default function BoardPage() {
 
   const loadInterrogations = async (caseId) => {
     try {
-      const res = await api.get(`/investigation/interrogations/?case_id=${caseId}`)
+      const res = await api.get(`/investigation/interrogations/?case_id=${caseId}&omit=transcription,key_values`)
       setInterrogations(res.data.results || [])
     } catch {
       setInterrogations([])
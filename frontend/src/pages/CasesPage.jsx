@@ -88,7 +88,7 @@ export default function CasesPage() {
     [cases]
   )
 
-  const load = () => api.get('/cases/cases/').then((res) => setCases(res.data.results || []))
+  const load = () => api.get('/cases/cases/?expand=complainants,witnesses,complaint_submission').then((res) => setCases(res.data.results || []))
   useEffect(() => { load() }, [])
 
   const parseIds = (s) => s.split(',').map((x) => x.trim()).filter(Boolean).map((x) => Number(x))